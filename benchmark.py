@@ -0,0 +1,108 @@
+'''
+Rough timings and memory use for the parts of Pipe that run for every pipe or
+every element.
+
+Run with:
+  python benchmark.py
+'''
+import timeit
+import tracemalloc
+
+from functional_pipes import Pipe
+Pipe.load('built_in_functions')
+Pipe.add_map_method(pow)
+
+
+def identity(val):
+  return val
+
+
+def add(a, b):
+  return a + b
+
+
+def odd(a, b):
+  return a % 2
+
+
+def build_pipe():
+  return Pipe().map(identity).filter(identity).carry_key.map(identity).re_key.list()
+
+
+def bytes_per_stage(stages=1000):
+  '''
+  Memory held by a pipe that is extended with stages map segments.
+  '''
+  tracemalloc.start()
+  before = tracemalloc.get_traced_memory()[0]
+
+  pipe = Pipe()
+  for _ in range(stages):
+    pipe = pipe.map(identity)
+
+  after = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+
+  return (after - before) / stages
+
+
+def drain(pipe, data):
+  '''
+  Time to push data through pipe.
+  '''
+  return lambda: tuple(pipe(data))
+
+
+def best(func, number, repeat=5):
+  '''
+  Fastest of repeat timings, which is the least disturbed by other processes.
+  '''
+  return min(timeit.repeat(func, number=number, repeat=repeat))
+
+
+def report(label, seconds, number, unit='us'):
+  scale = dict(us=1e6, ns=1e9)[unit]
+  print('{:<40} {:>10.2f} {}'.format(label, seconds / number * scale, unit))
+
+
+if __name__ == '__main__':
+  number = 20000
+  report('construct 5 segment pipe', best(build_pipe, number=number), number)
+  print('{:<40} {:>10.0f} B'.format('bytes per map segment', bytes_per_stage()))
+
+  data = list(range(100000))
+  number = 20
+  elements = number * len(data)
+  report('reservoir, list', best(drain(Pipe(), data), number=number), elements, 'ns')
+  report('reservoir, range', best(drain(Pipe(), range(len(data))), number=number), elements, 'ns')
+  report('reservoir, generator',
+      best(lambda: tuple(Pipe()(iter(data))), number=number), elements, 'ns')
+  report('reservoir + map, list',
+      best(drain(Pipe().map(identity), data), number=number), elements, 'ns')
+
+  pairs = [(i, i + 1) for i in range(len(data))]
+  report('star map', best(drain(Pipe().map(add), pairs), number=number), elements, 'ns')
+  report('star filter', best(drain(Pipe().filter(odd), pairs), number=number), elements, 'ns')
+  report('map method with argument',
+      best(drain(Pipe().pow(2), data), number=number), elements, 'ns')
+  report('carry_key map re_key',
+      best(drain(Pipe().carry_key.map(identity).re_key, pairs), number=number), elements, 'ns')
+  blocks = [pairs[start:start + 1024] for start in range(0, len(pairs), 1024)]
+  report('block_carry_key map block_re_key',
+      best(drain(Pipe().block_carry_key.map(identity).block_re_key, blocks), number=number),
+      elements, 'ns')
+  report('grab', best(drain(Pipe().grab[1], pairs), number=number), elements, 'ns')
+
+  records = [dict(a=i, b=i) for i in range(len(data))]
+  report('two carry_dict bypasses',
+      best(drain(Pipe().carry_dict['a'].map(identity).return_dict
+        .carry_dict['b'].map(identity).return_dict, records), number=number), elements, 'ns')
+  report('carry_dict with two keys',
+      best(drain(Pipe().carry_dict[['a', 'b']].map(identity).return_dict, records),
+        number=number), elements, 'ns')
+
+  Pipe.optimize_pipes = False
+  report('keyed map', best(drain(Pipe().keyed.map(identity), data), number=number), elements, 'ns')
+  Pipe.optimize_pipes = True
+  report('keyed map, optimized',
+      best(drain(Pipe().keyed.map(identity), data), number=number), elements, 'ns')
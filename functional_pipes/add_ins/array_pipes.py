@@ -0,0 +1,143 @@
+'''
+Valves that collect the pipe into compact typed storage instead of a list of
+python objects. The results support the buffer protocol so they can be passed to
+numpy.frombuffer, memoryview or file.write without a copy.
+
+Values are packed with struct a chunk at a time so the copying runs in C.
+'''
+from array import array
+from itertools import chain, islice, starmap
+from operator import length_hint
+from struct import Struct, error as StructError
+
+
+CHUNK = 4096  # number of values packed by each struct call
+
+
+# definitions for methods
+
+def to_array(iterable, typecode):
+  '''
+  Collects the values into an array.array of typecode.
+  If the length of the pipe is known the array is allocated once and filled.
+
+  typecode - array.array typecode, 'b', 'B', 'h', 'H', 'i', 'I', 'l', 'L', 'q',
+    'Q', 'f', 'd' or 'u'
+
+  Example:
+  >>> Pipe(range(4)).map(lambda x: x * x).to_array('q')
+  array('q', [0, 1, 4, 9])
+  '''
+  try:
+    chunk_struct = Struct('{}{}'.format(CHUNK, typecode))
+  except StructError:
+    # typecodes without a struct format ('u', 'w')
+    return array(typecode, iterable)
+
+  size = length_hint(iterable, -1)
+  iterator = iter(iterable)
+
+  if size > 0:
+    values = array(typecode, (0,)) * size
+    filled = _fill(values, iterator, typecode, chunk_struct, size)
+    if filled < size:
+      del values[filled:]
+      return values
+
+  else:
+    values = array(typecode)
+
+  _extend(values, iterator, typecode, chunk_struct)
+  return values
+
+
+def _fill(values, iterator, typecode, chunk_struct, stop):
+  '''
+  Packs up to stop objects from iterator into the preallocated values array.
+  Returns the number of objects packed.
+  '''
+  itemsize = values.itemsize
+  filled = 0
+
+  while filled < stop:
+    wanted = min(CHUNK, stop - filled)
+    chunk = tuple(islice(iterator, wanted))
+
+    if len(chunk) == CHUNK:
+      chunk_struct.pack_into(values, filled * itemsize, *chunk)
+    elif chunk:
+      Struct('{}{}'.format(len(chunk), typecode)).pack_into(values, filled * itemsize, *chunk)
+
+    filled += len(chunk)
+    if len(chunk) < wanted:
+      break
+
+  return filled
+
+
+def _extend(values, iterator, typecode, chunk_struct):
+  '''
+  Packs the rest of iterator onto the end of the values array.
+  '''
+  while True:
+    chunk = tuple(islice(iterator, CHUNK))
+
+    if len(chunk) < CHUNK:
+      if chunk:
+        values.frombytes(Struct('{}{}'.format(len(chunk), typecode)).pack(*chunk))
+      return
+
+    values.frombytes(chunk_struct.pack(*chunk))
+
+
+def to_bytes(iterable, fmt):
+  '''
+  Packs each value with the struct format fmt and returns the concatenated bytes.
+  If fmt has more than one field each value must be an iterable of the fields.
+
+  fmt - struct format of one value. Use a byte order prefix ('<', '>', '=', '!')
+    for a fixed layout.
+
+  Example:
+  >>> Pipe((1, 2)).to_bytes('<h')
+  b'\\x01\\x00\\x02\\x00'
+  >>> Pipe(((1, 0.5), (2, 1.5))).to_bytes('<Bf')
+  b'\\x01\\x00\\x00\\x00?\\x02\\x00\\x00\\xc0?'
+  '''
+  record = Struct(fmt)
+  fields = len(record.unpack(bytes(record.size)))
+
+  order = fmt[:1] if fmt[:1] in ('@', '=', '<', '>', '!') else ''
+  body = fmt[len(order):]
+
+  chunk_struct = Struct(order + body * CHUNK)
+  if chunk_struct.size != record.size * CHUNK:
+    # native alignment pads between records, pack one record at a time
+    if fields == 1:
+      return b''.join(map(record.pack, iterable))
+    return b''.join(starmap(record.pack, iterable))
+
+  iterator = iter(iterable)
+  parts = []
+
+  while True:
+    chunk = tuple(islice(iterator, CHUNK))
+    if fields > 1:
+      chunk = tuple(chain.from_iterable(chunk))
+
+    if len(chunk) < CHUNK * fields:
+      if chunk:
+        parts.append(Struct(order + body * (len(chunk) // fields)).pack(*chunk))
+      return b''.join(parts)
+
+    parts.append(chunk_struct.pack(*chunk))
+
+
+methods_to_add = (
+    dict(gener=to_array, is_valve=True),
+    dict(gener=bytearray, name='to_bytearray', is_valve=True),
+    dict(gener=to_bytes, is_valve=True),
+  )
+
+
+map_methods_to_add = ()
@@ -1,6 +1,31 @@
 '''
 Methods that come from python's built in functions
 '''
+import builtins
+from itertools import compress, starmap, tee
+from operator import add
+
+from functional_pipes.checkpoint import fold
+
+
+def starfilter(function, iterable):
+  '''
+  filter for functions that take each object unpacked into their arguments.
+  The unpacking and the filtering both run in C.
+  '''
+  to_pass, to_test = tee(iterable)
+  return compress(to_pass, starmap(function, to_test))
+
+
+def sum(iterable, start=0):
+  '''
+  The built in sum, which keeps its running total in the checkpoints of the pipe
+  if it has any.
+  '''
+  if getattr(iterable, 'checkpoint', None) is None:
+    return builtins.sum(iterable, start)
+  return fold(iterable, add, start)
+
 
 methods_to_add = (
     # collection
@@ -24,9 +49,9 @@ methods_to_add = (
     dict(gener=sorted, name='sorted_kargs', is_valve=True, double_star_wrap='key'),  # https://github.com/BebeSparkelSparkel/functional_pipes/issues/3
 
     # non valve functions
-    dict(gener=enumerate),
-    dict(gener=filter, iter_index=1, star_wrap=0),  # https://github.com/BebeSparkelSparkel/functional_pipes/issues/3
-    dict(gener=filter, name='filter_kargs', iter_index=1, double_star_wrap=0),  # https://github.com/BebeSparkelSparkel/functional_pipes/issues/3
+    dict(gener=enumerate, keeps_length=True),
+    dict(gener=filter, iter_index=1, star_wrap=0, star_gener=starfilter, per_object=True),  # https://github.com/BebeSparkelSparkel/functional_pipes/issues/3
+    dict(gener=filter, name='filter_kargs', iter_index=1, double_star_wrap=0, per_object=True),  # https://github.com/BebeSparkelSparkel/functional_pipes/issues/3
     dict(gener=zip),
   )
 
@@ -42,7 +67,7 @@ map_methods_to_add = (
     dict(func=sorted, name='sorted_e'), # https://github.com/BebeSparkelSparkel/functional_pipes/issues/4
     dict(func=max, name='max_e'), # https://github.com/BebeSparkelSparkel/functional_pipes/issues/4
     dict(func=min, name='min_e'), # https://github.com/BebeSparkelSparkel/functional_pipes/issues/4
-    dict(func=sum, name='sum_e'), # https://github.com/BebeSparkelSparkel/functional_pipes/issues/4
+    dict(func=builtins.sum, name='sum_e'), # https://github.com/BebeSparkelSparkel/functional_pipes/issues/4
 
     str,
     abs,
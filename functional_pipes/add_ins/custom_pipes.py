@@ -2,6 +2,15 @@
 custom methods that are not other libraries
 '''
 
+from heapq import nlargest, nsmallest
+from itertools import islice
+from operator import length_hint
+
+from more_itertools import ilen
+
+from functional_pipes.checkpoint import fold
+from functional_pipes.close_iter import close_iter
+from functional_pipes.pipe import _takes_many
 from functional_pipes.wrap_gener import wrap_gener
 
 
@@ -40,10 +49,236 @@ def zip_to_dict(iterable):
       break
 
 
+def count(iterable):
+  '''
+  Returns the number of objects in iterable.
+  If the length is known (a sized reservoir and only length keeping segments) it is
+  returned without running the pipe and the values left in the reservoir are
+  dropped, the loaded source is not closed. Else the objects are drawn and counted.
+
+  Example:
+  >>> Pipe(range(10)).map(lambda x: x * 2).count()
+  10
+  >>> Pipe(range(10)).filter(lambda x: x % 2).count()
+  5
+  '''
+  size = length_hint(iterable, -1)
+  if size < 0:
+    return ilen(iterable)
+
+  empty = getattr(iterable, 'empty', None)
+  if empty is not None:
+    empty()
+  else:
+    close_iter(iterable)
+  return size
+
+
+def take(iterable, n):
+  '''
+  Returns a list of the first n objects.
+  The rest of the pipe is not run, the pipe is closed instead.
+
+  Example:
+  >>> Pipe(range(10)).take(3)
+  [0, 1, 2]
+  '''
+  taken = list(islice(iterable, n))
+  close_iter(iterable)
+  return taken
+
+
+def top_k(iterable, n, key=None, reverse=False):
+  '''
+  Returns a list of the n smallest objects in order, or the n largest if reverse
+  is True. The same as sorted(...).take(n) in O(n) memory with heapq.
+
+  key - function that returns the value to compare
+  reverse - True for the largest objects
+
+  Example:
+  >>> Pipe((3, 1, 4, 1, 5)).top_k(2, reverse=True)
+  [5, 4]
+  '''
+  return (nlargest if reverse else nsmallest)(n, iterable, key)
+
+
+def join(iterable, other, left_key, right_key=None, how='inner'):
+  '''
+  Hash join of the pipe (left) with other (right).
+  Yields (left, right) pairs for every left and right object with equal keys, so
+  carry_key can carry the left object while the right one is worked on.
+
+  A hash table is built from the smaller side when the lengths of both sides are
+  known, else from other, and the other side is streamed. Pairs come in the order
+  of the streamed side. Unmatched left objects of a left join come after the
+  matched pairs if the left side was hashed.
+
+  other - iterable of right objects. Must be re-iterable (list, tuple, ...) if the
+    pipe is reused.
+  left_key - function that returns the key of a left object
+    star wrapped if it takes more than one argument
+  right_key - function that returns the key of a right object
+    defaults to left_key, star wrapped like left_key
+  how - 'inner' to drop left objects without a match
+    'left' to yield (left, None) for left objects without a match
+
+  Example:
+  >>> names = (1, 'John'), (2, 'Billy')
+  >>> ages = (1, 5), (1, 6), (3, 9)
+  >>> Pipe(names).join(ages, lambda id, name: id).tuple()
+  (((1, 'John'), (1, 5)), ((1, 'John'), (1, 6)))
+  '''
+  if how not in ('inner', 'left'):
+    raise ValueError("how must be 'inner' or 'left' not {!r}".format(how))
+
+  left_key, right_key = _join_keys(left_key, right_key)
+
+  left_size = length_hint(iterable, -1)
+  right_size = length_hint(other, -1)
+
+  if 0 <= left_size < right_size:
+    yield from _join_hash_left(iterable, other, left_key, right_key, how)
+    return
+
+  table = {}
+  for right in other:
+    table.setdefault(right_key(right), []).append(right)
+
+  for left in iterable:
+    matches = table.get(left_key(left))
+
+    if matches:
+      for right in matches:
+        yield left, right
+
+    elif how == 'left':
+      yield left, None
+
+
+def _join_hash_left(iterable, other, left_key, right_key, how):
+  '''
+  join with the hash table built from the left side and the right side streamed.
+  '''
+  table = {}
+  for left in iterable:
+    table.setdefault(left_key(left), []).append(left)
+
+  matched = set()
+  for right in other:
+    key = right_key(right)
+    matches = table.get(key)
+
+    if matches:
+      matched.add(key)
+      for left in matches:
+        yield left, right
+
+  if how == 'left':
+    for key, lefts in table.items():
+      if key not in matched:
+        for left in lefts:
+          yield left, None
+
+
+def merge_join(iterable, other, left_key, right_key=None, how='inner'):
+  '''
+  Join of the pipe (left) with other (right) when both are sorted by their keys.
+  Yields (left, right) pairs in the order of the left side.
+  Only the right objects sharing the current key are held in memory.
+
+  other - iterable of right objects sorted by right_key
+  left_key, right_key - see join
+  how - 'inner' or 'left', see join
+
+  Example:
+  >>> Pipe((1, 2, 2, 4)).merge_join((2, 3, 4), lambda x: x).tuple()
+  ((2, 2), (2, 2), (4, 4))
+  '''
+  if how not in ('inner', 'left'):
+    raise ValueError("how must be 'inner' or 'left' not {!r}".format(how))
+
+  left_key, right_key = _join_keys(left_key, right_key)
+
+  rights = iter(other)
+  right = next(rights, _exhausted)
+  group_key = _exhausted
+  group = []
+
+  for left in iterable:
+    key = left_key(left)
+
+    if group_key is _exhausted or group_key != key:
+      # skip the right objects with smaller keys and collect the equal ones
+      while right is not _exhausted and right_key(right) < key:
+        right = next(rights, _exhausted)
+
+      group_key = key
+      group = []
+      while right is not _exhausted and right_key(right) == key:
+        group.append(right)
+        right = next(rights, _exhausted)
+
+    if group:
+      for matched in group:
+        yield left, matched
+
+    elif how == 'left':
+      yield left, None
+
+
+def _join_keys(left_key, right_key):
+  '''
+  Returns (left_key, right_key) with right_key defaulting to left_key and each
+  star wrapped if it takes more than one argument, however it was passed.
+  '''
+  if right_key is None:
+    right_key = left_key
+  return _star_key(left_key), _star_key(right_key)
+
+
+def _star_key(key):
+  if not _takes_many(key):
+    return key
+
+  def star_key(obj):
+    return key(*obj)
+  return star_key
+
+
+def aggregate(iterable, function, initial):
+  '''
+  Returns the running value after function(running value, object) is applied to
+  each object, like functools.reduce.
+  The running value is kept in the checkpoints of the pipe if it has any.
+
+  function - takes the running value and an object and returns the new running value
+  initial - the starting running value
+
+  Example:
+  >>> Pipe((1, 2, 3)).aggregate(lambda total, x: total + x * x, 0)
+  14
+  '''
+  return fold(iterable, function, initial)
+
+
+class _exhausted:
+  '''
+  Marks the end of the right side in merge_join.
+  '''
+  pass
+
+
 # profile methods to add
 methods_to_add = (
     wrap_gener(zip_internal),
     wrap_gener(zip_to_dict),
+    dict(gener=count, is_valve=True),
+    dict(gener=wrap_gener(join), pass_spout=True),
+    dict(gener=wrap_gener(merge_join)),
+    dict(gener=aggregate, is_valve=True),
+    dict(gener=take, is_valve=True),
+    dict(gener=top_k, is_valve=True, star_wrap='key'),
   )
 
 
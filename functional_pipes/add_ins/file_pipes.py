@@ -0,0 +1,286 @@
+'''
+Valves that write the pipe to files in large blocks.
+
+The objects are joined in chunks, so there is one str.join and one encode for
+every chunk instead of one write call for every object. The blocks are kept
+until they add up to buffer_size and then handed to the operating system with
+a single os.writev call. The blocks are not copied into one buffer first.
+Where os.writev is not available (Windows), the blocks are joined and written
+with os.write.
+'''
+import os
+from collections import namedtuple
+from itertools import islice
+
+
+# number of objects joined into one block
+_CHUNK = 1024
+
+# objects at least this large on average are written as they are instead of joined
+_LARGE = 1 << 16
+
+# most blocks in one os.writev call
+try:
+  _IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError):
+  _IOV_MAX = 1024
+
+
+def _write_joined(fd, blocks):
+  return os.write(fd, b''.join(blocks))
+
+
+_writev = getattr(os, 'writev', _write_joined)
+
+
+Written = namedtuple('Written', ('objects', 'bytes'))
+Written.__doc__ = '''
+Number of objects and bytes written to a file.
+'''
+
+
+class _FileBuffer:
+  '''
+  Blocks of bytes waiting to be written to a file, written once they add up to
+  buffer_size.
+  '''
+  __slots__ = ('fd', 'blocks', 'pending', 'buffer_size', 'objects', 'written')
+
+  def __init__(self, path, buffer_size):
+    '''
+    path - file to write, replaced if it exists
+    buffer_size - bytes to collect before writing
+    '''
+    if buffer_size < 1:
+      raise ValueError('buffer_size must be at least 1 not {}'.format(buffer_size))
+
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+    self.fd = os.open(path, flags, 0o666)
+    self.blocks = []
+    self.pending = 0
+    self.buffer_size = buffer_size
+    self.objects = 0
+    self.written = 0
+
+  def add(self, block, objects):
+    '''
+    Adds a block of bytes that holds objects objects.
+    '''
+    self.blocks.append(block)
+    self.pending += len(block)
+    self.objects += objects
+    if self.pending >= self.buffer_size:
+      self.flush()
+
+  def flush(self):
+    '''
+    Writes the blocks, continuing after partial writes.
+    '''
+    blocks = self.blocks
+    while blocks:
+      batch = blocks[:_IOV_MAX]
+      written = _writev(self.fd, batch)
+      self.written += written
+
+      # drop the blocks that were written and the written part of the next one
+      index = 0
+      while index < len(batch) and written >= len(batch[index]):
+        written -= len(batch[index])
+        index += 1
+      del blocks[:index]
+      if written:
+        blocks[0] = memoryview(blocks[0])[written:]
+
+    self.pending = 0
+
+  def close(self, flush=True):
+    '''
+    Writes what is left and closes the file.
+    Returns the Written counts.
+
+    flush - False to drop what is left, after the objects failed to come
+    '''
+    try:
+      if flush:
+        self.flush()
+    finally:
+      os.close(self.fd)
+    return Written(self.objects, self.written)
+
+
+def _close_all(file_buffers, flush=True):
+  '''
+  Closes every file buffer. If one fails to close the rest are still closed,
+  without writing what they hold, and the error is raised.
+  Returns a list of the Written counts.
+  '''
+  written = []
+  try:
+    for file_buffer in file_buffers:
+      written.append(file_buffer.close(flush))
+  finally:
+    if len(written) < len(file_buffers):
+      # a close failed, close the files after it without writing them
+      _close_all(file_buffers[len(written) + 1:], flush=False)
+  return written
+
+
+def _line_adder(encoding, newline):
+  '''
+  Function that adds a list of objects to a _FileBuffer as a block of lines.
+  '''
+  def add(file_buffer, objects):
+    count = len(objects)
+    # the empty string at the end gives the last line its newline
+    objects.append('')
+    try:
+      text = newline.join(objects)
+    except TypeError:
+      # str on every object costs more than the join, so only when needed
+      text = newline.join(map(str, objects))
+    file_buffer.add(text.encode(encoding), count)
+  return add
+
+
+def _add_bytes(file_buffer, objects):
+  '''
+  Adds bytes-like objects to file_buffer, joining them unless they are large.
+  '''
+  size = sum(map(len, objects))
+  if size >= _LARGE * len(objects):
+    for obj in objects:
+      file_buffer.add(obj, 1)
+  else:
+    file_buffer.add(b''.join(objects), len(objects))
+
+
+def _write(iterable, file_buffer, add):
+  '''
+  Adds the objects to file_buffer a chunk at a time and closes it.
+  If the objects fail to come the file is closed without writing what is left,
+  so the original error is raised.
+  '''
+  try:
+    iterator = iter(iterable)
+    while True:
+      chunk = list(islice(iterator, _CHUNK))
+      if not chunk:
+        break
+      add(file_buffer, chunk)
+  except BaseException:
+    file_buffer.close(flush=False)
+    raise
+  return file_buffer.close()
+
+
+# definitions for methods
+
+def write_lines(iterable, path, encoding='utf-8', buffer_size=1 << 20, newline='\n'):
+  '''
+  Writes each object as a line of text to the file at path, replacing the file.
+  Objects that are not str are passed through str.
+  Returns Written(objects, bytes).
+
+  path - file to write
+  encoding - text encoding
+  buffer_size - bytes to collect before each write
+  newline - put after each object
+
+  Example:
+  >>> Pipe(range(3)).write_lines('numbers.txt')
+  Written(objects=3, bytes=6)
+  '''
+  return _write(iterable, _FileBuffer(path, buffer_size), _line_adder(encoding, newline))
+
+
+def write_bytes(iterable, path, buffer_size=1 << 20):
+  '''
+  Writes the bytes-like objects one after another to the file at path, replacing
+  the file. Small objects are joined into blocks, large ones are written without
+  being copied.
+  Returns Written(objects, bytes).
+
+  path - file to write
+  buffer_size - bytes to collect before each write
+
+  Example:
+  >>> Pipe((b'ab', b'c')).write_bytes('out.bin')
+  Written(objects=2, bytes=3)
+  '''
+  return _write(iterable, _FileBuffer(path, buffer_size), _add_bytes)
+
+
+def write_sharded(iterable, pattern, n, key=None, encoding='utf-8', buffer_size=1 << 20,
+    newline='\n', binary=False):
+  '''
+  Spreads the objects over n files, each with its own buffer of buffer_size, as
+  lines of text or, if binary is True, as bytes.
+  Returns a tuple with the Written(objects, bytes) of each file.
+
+  pattern - file names, formatted with the shard number 0 to n - 1
+  n - number of files
+  key - function that returns an int for an object, which goes to shard
+    key(obj) % n. Star wrapped when passed by position.
+    If None the objects are dealt to the shards in turn.
+  encoding, newline - as in write_lines, not used if binary is True
+  buffer_size - bytes to collect for each file before writing it
+  binary - True to write bytes-like objects as in write_bytes
+
+  Example:
+  >>> Pipe(range(10)).write_sharded('part-{}.txt', 2, lambda x: x // 5)
+  (Written(objects=5, bytes=10), Written(objects=5, bytes=10))
+  '''
+  if n < 1:
+    raise ValueError('n must be at least 1 not {}'.format(n))
+
+  add = _add_bytes if binary else _line_adder(encoding, newline)
+
+  file_buffers = []
+  try:
+    for shard in range(n):
+      file_buffers.append(_FileBuffer(pattern.format(shard), buffer_size))
+
+    iterator = iter(iterable)
+    if key is None:
+      # a chunk that is a multiple of n keeps dealing the objects in turn
+      chunk_size = _CHUNK * n
+      while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+          break
+        for shard, file_buffer in enumerate(file_buffers):
+          shard_chunk = chunk[shard::n]
+          if shard_chunk:
+            add(file_buffer, shard_chunk)
+
+    else:
+      chunks = [[] for _ in range(n)]
+      for obj in iterator:
+        shard = key(obj) % n
+        chunk = chunks[shard]
+        chunk.append(obj)
+        if len(chunk) == _CHUNK:
+          add(file_buffers[shard], chunk)
+          chunks[shard] = []
+
+      for chunk, file_buffer in zip(chunks, file_buffers):
+        if chunk:
+          add(file_buffer, chunk)
+
+  except BaseException:
+    _close_all(file_buffers, flush=False)
+    raise
+
+  return tuple(_close_all(file_buffers))
+
+
+methods_to_add = (
+    dict(gener=write_lines, is_valve=True),
+    dict(gener=write_bytes, is_valve=True),
+    dict(gener=write_sharded, is_valve=True, star_wrap=3),
+  )
+
+
+# definitions for map methods
+
+map_methods_to_add = ()
@@ -2,6 +2,9 @@
 These methods are loaded automatically because they are inherent methods for using
 pipes.
 '''
+from itertools import starmap
+from operator import itemgetter, methodcaller
+
 from functional_pipes.wrap_gener import wrap_gener
 
 
@@ -23,7 +26,7 @@ def flatten(iterable):
 
 class grab:
   '''
-  allows the dict to bypass one pipe segment
+  Pipe.grab[key] maps each element to element[key]
   '''
   def __init__(self, pipe):
     self.pipe = pipe
@@ -34,28 +37,46 @@ class grab:
     key - the index key for each element that passes through
     '''
 
-    return self.pipe.map(lambda indexable: indexable[key])
+    return self.pipe.map(itemgetter(key))
+
+
+def call_method(iterable, name, *args, **kargs):
+  '''
+  Calls the method name on each object with args and kargs.
+
+  Example:
+  >>> Pipe(('a b', 'c d')).call_method('split', ' ').tuple()
+  (['a', 'b'], ['c', 'd'])
+  '''
+  return map(methodcaller(name, *args, **kargs), iterable)
+
+
+def _one_iterable(function, *iterables):
+  '''
+  True if map was given no iterables other than the pipe, so it gives one object
+  for each object. With more iterables it stops at the shortest.
+  '''
+  return not iterables
 
 
 methods_to_add = (
-    dict(gener=map, iter_index=1, star_wrap=0),
-    dict(gener=map, name='map_kargs', iter_index=1, double_star_wrap=0),
+    dict(gener=map, iter_index=1, star_wrap=0, keeps_length=_one_iterable, star_gener=starmap,
+      per_object=True),
+    dict(gener=map, name='map_kargs', iter_index=1, double_star_wrap=0, keeps_length=_one_iterable,
+      per_object=True),
     wrap_gener(flatten),
-    dict(gener=grab, as_property=True),
+    dict(gener=grab, as_property=True, add_wrapper=False),
+    dict(gener=call_method, keeps_length=True, per_object=True),
   )
 
 
 # definitions for map methods
 
-def drop_key(key_val):
-  '''
-  drops the key in the key value pairs
-
-  Ex: ((1, 2), (3, 4), (5, 6)) => (2, 4, 6)
-  '''
-  return key_val[1]
+# drops the key in the key value pairs
+# Ex: ((1, 2), (3, 4), (5, 6)) => (2, 4, 6)
+drop_key = itemgetter(1)
 
 
 map_methods_to_add = (
-    dict(func=drop_key, as_property=True),
+    dict(func=drop_key, name='drop_key', as_property=True),
   )
\ No newline at end of file
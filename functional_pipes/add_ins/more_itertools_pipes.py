@@ -1,34 +1,67 @@
 '''
-Cannot be used yet.
+methods that come from the more_itertools package
+
+Everything except divide and distribute is a streaming stage that holds at most
+one chunk or window, so chunking a huge reservoir never buffers the whole stream.
+divide reads the whole stream and distribute buffers the objects its iterators
+have not reached yet.
 '''
+from itertools import islice
 
 import more_itertools as mi
 
+from functional_pipes.wrap_gener import wrap_gener
+
+
+# definitions for methods
+
+def sliced(iterable, n):
+  '''
+  Yields tuples of n objects. The last tuple may be shorter.
+  Like more_itertools.sliced but works on a stream instead of slicing a sequence.
+
+  Example:
+  >>> Pipe(range(5)).sliced(2).tuple()
+  ((0, 1), (2, 3), (4,))
+  '''
+  iterator = iter(iterable)
+  return iter(lambda: tuple(islice(iterator, n)), ())
+
+
+def distribute(iterable, n):
+  '''
+  Yields n iterators that each take every n-th object from the pipe, drawing from
+  the pipe only as they are iterated.
+  more_itertools.distribute with the iterable as the first argument.
+  The iterators share the pipe through itertools.tee, so the objects drawn for
+  one iterator are buffered until the others reach them. Reading the iterators
+  one after the other (map(list)) buffers the whole stream, read them in step
+  (zip) to hold about n objects.
+
+  Example:
+  >>> Pipe(range(5)).distribute(2).map(list).tuple()
+  ([0, 2, 4], [1, 3])
+  '''
+  return iter(mi.distribute(n, iterable))
+
 
-# gener,
-# is_valve = False,
-# iter_index = 0,
-# name = None,
-# no_over_write = True,
-# empty_error = None,
-# star_wrap = None,
-# double_star_wrap = None,
 methods_to_add = (
-  # iterable valves
-  dict(gener=mi.chunked, is_valve=True),
-  dict(gener=mi.distribute, is_valve=True, iter_index=1),
-  dict(gener=mi.divide, is_valve=True, iter_index=1),
-
-  # non valve
-  dict(gener=mi.split_before, star_wrap=1),
-  dict(gener=mi.split_before, name='split_before_kargs',  double_star_wrap='pred'),
-  dict(gener=mi.split_after, star_wrap=1),
-  dict(gener=mi.split_after, name='split_after_kargs',  double_star_wrap='pred'),
-
-)
-maps_to_add = (
-
-)
-not_added = (
-mi.sliced
-)
\ No newline at end of file
+    # streaming
+    wrap_gener(mi.chunked),
+    wrap_gener(mi.windowed),
+    wrap_gener(sliced),
+    wrap_gener(mi.ichunked),
+    dict(gener=wrap_gener(mi.split_before), star_wrap=1),
+    dict(gener=wrap_gener(mi.split_before), name='split_before_kargs',  double_star_wrap=1),
+    dict(gener=wrap_gener(mi.split_after), star_wrap=1),
+    dict(gener=wrap_gener(mi.split_after), name='split_after_kargs',  double_star_wrap=1),
+    wrap_gener(distribute),
+
+    # iterable valves
+    dict(gener=mi.divide, is_valve=True, iter_index=1),
+  )
+
+
+# map methods
+map_methods_to_add = (
+  )
@@ -1,18 +1,291 @@
 '''
 Methods from numpy
 
-Will probably have to be expanded into multiple libries.
+Numeric pipes run fastest when numpy works on whole arrays instead of one
+element at a time. np_blocks packs the elements of the pipe into fixed size arrays
+(blocks), the np_ map methods apply ufuncs to each block, the np_ reductions
+combine the partial results of the blocks and np_unblock goes back to elements.
+
+Example:
+>>> Pipe(range(10)).np_blocks(4).np_add(1).np_sqrt().np_sum()
+22.4682...
+>>> Pipe((-2, 1, 5)).np_blocks(2).np_clip(0, 3).np_unblock().tuple()
+(0.0, 1.0, 3.0)
 '''
+from itertools import chain, islice
+from operator import length_hint
 
 import numpy as np
 
+from functional_pipes.close_iter import close_iter
+from functional_pipes.wrap_gener import wrap_gener
+
+
+# definitions for methods
+
+def fromiter(iterable, dtype, count=-1):
+  '''
+  numpy.fromiter that passes the length of the pipe as count when it is known so
+  the array is allocated once.
+
+  Example:
+  >>> Pipe(range(3)).map(float).fromiter(float)
+  array([0., 1., 2.])
+  '''
+  if count < 0:
+    count = length_hint(iterable, -1)
+
+  return np.fromiter(iterable, dtype, count)
+
+
+def np_blocks(iterable, size=1024, dtype=float):
+  '''
+  Packs the elements into 1-d arrays of length size. The last block may be shorter.
+
+  size - number of elements in each block
+  dtype - numpy dtype of the blocks
+
+  Example:
+  >>> Pipe(range(5)).np_blocks(2, int).tuple()
+  (array([0, 1]), array([2, 3]), array([4]))
+  '''
+  iterator = iter(iterable)
+
+  while True:
+    block = np.fromiter(islice(iterator, size), dtype)
+    if not len(block):
+      return
+    yield block
+
+
+def np_unblock(iterable):
+  '''
+  Unpacks blocks into python scalars one at a time.
+
+  Example:
+  >>> Pipe(range(3)).np_blocks(2, int).np_unblock().tuple()
+  (0, 1, 2)
+  '''
+  return chain.from_iterable(map(np.ndarray.tolist, iterable))
+
+
+def np_sum(iterable):
+  '''
+  Sum of all the elements in all the blocks.
+
+  Example:
+  >>> Pipe(range(5)).np_blocks(2).np_sum()
+  10.0
+  '''
+  total = 0
+  for block in iterable:
+    total += block.sum()
+  return total
+
+
+def np_mean(iterable):
+  '''
+  Mean of all the elements in all the blocks.
+  Raises ValueError if there are no elements.
+
+  Example:
+  >>> Pipe(range(5)).np_blocks(2).np_mean()
+  2.0
+  '''
+  total = count = 0
+  for block in iterable:
+    total += block.sum()
+    count += block.size
+
+  if not count:
+    raise ValueError('np_mean() arg is an empty sequence')
+
+  return total / count
+
+
+def np_argmax(iterable):
+  '''
+  Index of the largest element counted across all the blocks.
+  The first index is returned if there are ties.
+  Raises ValueError if there are no elements.
+
+  Example:
+  >>> Pipe((3, 1, 4, 1, 5)).np_blocks(2).np_argmax()
+  4
+  '''
+  best_index = best_value = None
+  offset = 0
+
+  for block in iterable:
+    if block.size:
+      index = int(block.argmax())
+      value = block.flat[index]
+      if best_index is None or value > best_value:
+        best_index, best_value = offset + index, value
+    offset += block.size
+
+  if best_index is None:
+    raise ValueError('np_argmax() arg is an empty sequence')
+
+  return best_index
+
+
+class _np_rolling:
+  '''
+  Base class for rolling statistics over blocks.
+  The last window - 1 values of each block are carried into the next block so the
+  windows run across block boundaries. A block of results is yielded for each
+  block once window values have been seen.
+  '''
+  __slots__ = ('iterable', 'window', 'tail')
+
+  def __init__(self, iterable, window):
+    '''
+    iterable - blocks from np_blocks
+    window - number of values in each window
+    '''
+    if window < 1:
+      raise ValueError('window must be at least 1 not {}'.format(window))
+
+    self.iterable = iter(iterable)
+    self.window = window
+    self.tail = None
+
+  def __iter__(self):
+    return self
 
-method_names = set() # holds all the method names that were added to Pipe
+  def __next__(self):
+    window = self.window
+
+    while True:
+      try:
+        block = next(self.iterable)
+      except StopIteration:
+        self.tail = None
+        raise
+
+      values = block if self.tail is None else np.concatenate((self.tail, block))
+      self.tail = values[max(len(values) - window + 1, 0):]
+
+      if len(values) >= window:
+        return self.reduce(values)
+
+  def close(self):
+    '''
+    Drops the carried values and closes the iterable feeding the blocks.
+    '''
+    self.tail = None
+    close_iter(self.iterable)
+
+  def windows(self, values):
+    return np.lib.stride_tricks.sliding_window_view(values, self.window)
+
+
+class np_rolling_sum(_np_rolling):
+  '''
+  Sum of each window of values, from the differences of a cumulative sum.
+
+  Example:
+  >>> Pipe((1, 2, 3, 4)).np_blocks(3).np_rolling_sum(2).np_unblock().tuple()
+  (3.0, 5.0, 7.0)
+  '''
+  __slots__ = ()
+
+  def reduce(self, values):
+    totals = np.concatenate(((0,), np.cumsum(values)))
+    return totals[self.window:] - totals[:-self.window]
+
+
+class np_rolling_mean(np_rolling_sum):
+  '''
+  Mean of each window of values.
+  '''
+  __slots__ = ()
+
+  def reduce(self, values):
+    return super().reduce(values) / self.window
+
+
+class np_rolling_var(_np_rolling):
+  '''
+  Variance of each window of values.
+
+  ddof - delta degrees of freedom, the divisor is window - ddof
+  '''
+  __slots__ = ('ddof',)
+
+  def __init__(self, iterable, window, ddof=1):
+    if window <= ddof:
+      raise ValueError('window must be larger than ddof')
+
+    self.ddof = ddof
+    super().__init__(iterable, window)
+
+  def reduce(self, values):
+    return self.windows(values).var(axis=1, ddof=self.ddof)
+
+
+class np_rolling_min(_np_rolling):
+  '''
+  Smallest value of each window.
+  '''
+  __slots__ = ()
+
+  def reduce(self, values):
+    return self.windows(values).min(axis=1)
+
+
+class np_rolling_max(_np_rolling):
+  '''
+  Largest value of each window.
+  '''
+  __slots__ = ()
+
+  def reduce(self, values):
+    return self.windows(values).max(axis=1)
 
 
 methods_to_add = (
-    dict(gener=np.fromiter, is_valve=True),
+    dict(gener=fromiter, is_valve=True),
+
+    # element and block conversion
+    wrap_gener(np_blocks),
+    wrap_gener(np_unblock),
+
+    # block reductions
+    dict(gener=np_sum, is_valve=True),
+    dict(gener=np_mean, is_valve=True, empty_error=ValueError),
+    dict(gener=np_argmax, is_valve=True, empty_error=ValueError),
+
+    # rolling windows over blocks
+    np_rolling_sum,
+    np_rolling_mean,
+    np_rolling_var,
+    np_rolling_min,
+    np_rolling_max,
   )
 
 
-map_methods_to_add = ()
+# definitions for map methods
+
+def np_where(block, condition, other=0):
+  '''
+  Keeps the elements of block where condition(block) is True and replaces the
+  others with other.
+
+  condition - function that takes a block and returns a boolean array
+  other - replacement value or array
+
+  Example:
+  >>> Pipe((-1, 2, -3)).np_blocks(3).np_where(lambda b: b > 0).np_unblock().tuple()
+  (0.0, 2.0, 0.0)
+  '''
+  return np.where(condition(block), block, other)
+
+
+map_methods_to_add = (
+    dict(func=np.add, name='np_add'),
+    dict(func=np.sqrt, name='np_sqrt'),
+    dict(func=np.clip, name='np_clip'),
+    np_where,
+  )
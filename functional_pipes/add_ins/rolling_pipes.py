@@ -0,0 +1,231 @@
+'''
+Rolling window statistics that update in O(1) for each object instead of
+recomputing the whole window.
+
+A value is yielded for each object once the window holds window values, so the
+first window - 1 objects only fill the window. Inside a carry_key bypass the keys
+of those objects are dropped and every result keeps the key of the object that
+completed its window.
+
+key - optional function that extracts the value from each object.
+  It is star wrapped so it can take the unpacked object.
+
+Example:
+>>> Pipe((1, 2, 3, 4)).rolling_sum(2).tuple()
+(3, 5, 7)
+>>> Pipe((('a', 1), ('b', 5), ('c', 3))).carry_key.rolling_max(2).re_key.tuple()
+(('b', 5), ('c', 5))
+'''
+from collections import deque
+
+from functional_pipes.close_iter import close_iter
+
+
+# definitions for methods
+
+class _rolling:
+  '''
+  Base class for the rolling stages.
+  These are classes instead of generators so that they keep their window when a
+  Drip passes through them inside a bypass, and they empty their window when the
+  pipe runs dry so the pipe can be reused.
+
+  Each stage defines:
+  reset() - empties the window
+  push(value) - adds value to the window and returns True if the window is full
+  result() - the statistic of the full window
+  '''
+  __slots__ = ('iterable', 'window', 'key')
+
+  def __init__(self, iterable, window, key=None):
+    '''
+    iterable - the objects to aggregate
+    window - number of values in each window
+    key - function that extracts the value from each object
+    '''
+    if window < 1:
+      raise ValueError('window must be at least 1 not {}'.format(window))
+
+    self.iterable = iter(iterable)
+    self.window = window
+    self.key = key
+    self.reset()
+
+  def __iter__(self):
+    return self
+
+  def __next__(self):
+    key = self.key
+
+    while True:
+      try:
+        obj = next(self.iterable)
+      except StopIteration:
+        self.reset()
+        raise
+
+      if self.push(obj if key is None else key(obj)):
+        return self.result()
+
+  def close(self):
+    '''
+    Empties the window and closes the iterable feeding it.
+    '''
+    self.reset()
+    close_iter(self.iterable)
+
+
+class rolling_sum(_rolling):
+  '''
+  Sum of the last window values.
+
+  Example:
+  >>> Pipe((1, 2, 3, 4)).rolling_sum(3).tuple()
+  (6, 9)
+  '''
+  __slots__ = ('values', 'total')
+
+  def reset(self):
+    self.values = deque()
+    self.total = 0
+
+  def push(self, value):
+    values = self.values
+    values.append(value)
+    self.total += value
+
+    if len(values) > self.window:
+      self.total -= values.popleft()
+      return True
+
+    return len(values) == self.window
+
+  def result(self):
+    return self.total
+
+
+class rolling_mean(rolling_sum):
+  '''
+  Mean of the last window values.
+
+  Example:
+  >>> Pipe((1, 2, 3, 4)).rolling_mean(2).tuple()
+  (1.5, 2.5, 3.5)
+  '''
+  __slots__ = ()
+
+  def result(self):
+    return self.total / self.window
+
+
+class rolling_var(_rolling):
+  '''
+  Variance of the last window values, updated with Welford's method.
+
+  ddof - delta degrees of freedom, the divisor is window - ddof
+
+  Example:
+  >>> Pipe((1, 2, 4, 8)).rolling_var(2).tuple()
+  (0.5, 2.0, 8.0)
+  '''
+  __slots__ = ('ddof', 'values', 'mean', 'm2')
+
+  def __init__(self, iterable, window, key=None, ddof=1):
+    if window <= ddof:
+      raise ValueError('window must be larger than ddof')
+
+    self.ddof = ddof
+    super().__init__(iterable, window, key)
+
+  def reset(self):
+    self.values = deque()
+    self.mean = 0.
+    self.m2 = 0.
+
+  def push(self, value):
+    values = self.values
+    values.append(value)
+    old_mean = self.mean
+
+    if len(values) > self.window:
+      dropped = values.popleft()
+      self.mean = old_mean + (value - dropped) / self.window
+      self.m2 += (value - dropped) * (value - self.mean + dropped - old_mean)
+      return True
+
+    self.mean = old_mean + (value - old_mean) / len(values)
+    self.m2 += (value - old_mean) * (value - self.mean)
+    return len(values) == self.window
+
+  def result(self):
+    return max(self.m2, 0.) / (self.window - self.ddof)
+
+
+class rolling_min(_rolling):
+  '''
+  Smallest of the last window values.
+  Keeps a deque of (index, value) that is increasing in value so each value is
+  added and removed once.
+
+  Example:
+  >>> Pipe((3, 1, 4, 1, 5)).rolling_min(3).tuple()
+  (1, 1, 1)
+  '''
+  __slots__ = ('candidates', 'index')
+
+  def reset(self):
+    self.candidates = deque()
+    self.index = 0
+
+  def push(self, value):
+    candidates = self.candidates
+    index = self.index
+
+    while candidates and not self.before(candidates[-1][1], value):
+      candidates.pop()
+    candidates.append((index, value))
+
+    if candidates[0][0] <= index - self.window:
+      candidates.popleft()
+
+    self.index = index + 1
+    return self.index >= self.window
+
+  def result(self):
+    return self.candidates[0][1]
+
+  @staticmethod
+  def before(kept, value):
+    '''
+    True if kept can still be the result when value is in the window.
+    '''
+    return kept < value
+
+
+class rolling_max(rolling_min):
+  '''
+  Largest of the last window values.
+
+  Example:
+  >>> Pipe((3, 1, 4, 1, 5)).rolling_max(3).tuple()
+  (4, 4, 5)
+  '''
+  __slots__ = ()
+
+  @staticmethod
+  def before(kept, value):
+    return kept > value
+
+
+methods_to_add = (
+    dict(gener=rolling_sum, star_wrap='key'),
+    dict(gener=rolling_mean, star_wrap='key'),
+    dict(gener=rolling_var, star_wrap='key'),
+    dict(gener=rolling_min, star_wrap='key'),
+    dict(gener=rolling_max, star_wrap='key'),
+  )
+
+
+# definitions for map methods
+
+map_methods_to_add = ()
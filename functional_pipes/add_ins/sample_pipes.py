@@ -0,0 +1,199 @@
+'''
+Random samples of streams of unknown length in O(k) memory.
+
+The random number generator is only called for the objects that are kept, the
+objects in between are skipped with islice in C.
+'''
+from heapq import heapify, heapreplace
+from itertools import count, islice
+from math import exp, floor, log
+from random import Random
+from sys import maxsize
+
+from functional_pipes.close_iter import close_iter
+
+
+# definitions for methods
+
+def _uniform(rand):
+  '''
+  Uniform random number in (0, 1] so its log is finite.
+  '''
+  return 1. - rand.random()
+
+
+def sample(iterable, k, seed=None):
+  '''
+  Returns a list of k objects chosen uniformly at random, or all the objects if
+  there are fewer than k. Uses reservoir sampling with Algorithm L, so the number
+  of random draws grows with log(n) instead of n.
+
+  k - number of objects in the sample
+  seed - seed for random.Random
+
+  Example:
+  >>> len(Pipe(range(1000)).sample(10, seed=1))
+  10
+  '''
+  if k < 0:
+    raise ValueError('k must not be negative not {}'.format(k))
+
+  iterator = iter(iterable)
+  reservoir = list(islice(iterator, k))
+  if len(reservoir) < k or not k:
+    return reservoir
+
+  rand = Random(seed)
+  threshold = exp(log(_uniform(rand)) / k)
+
+  while True:
+    skip = floor(log(_uniform(rand)) / log(1 - threshold)) if threshold < 1 else 0
+
+    for obj in islice(iterator, skip, skip + 1):
+      reservoir[rand.randrange(k)] = obj
+      break
+    else:
+      return reservoir
+
+    threshold *= exp(log(_uniform(rand)) / k)
+
+
+class sample_rate:
+  '''
+  Passes on each object independently with probability p.
+  The gaps between kept objects are drawn from the geometric distribution and
+  skipped in C.
+  A class so the skip is kept when a Drip passes through it inside a bypass.
+
+  p - probability of passing an object on
+  seed - seed for random.Random, reset each time the pipe runs dry
+
+  Example:
+  >>> Pipe(range(10)).sample_rate(1).tuple()
+  (0, 1, 2, 3, 4, 5, 6, 7, 8, 9)
+  '''
+  __slots__ = ('iterable', 'p', 'seed', 'rand', 'skip')
+
+  def __init__(self, iterable, p, seed=None):
+    if not 0 <= p <= 1:
+      raise ValueError('p must be from 0 to 1 not {}'.format(p))
+
+    self.iterable = iter(iterable)
+    self.p = p
+    self.seed = seed
+    self.reset()
+
+  def __iter__(self):
+    return self
+
+  def __next__(self):
+    if self.skip is None:
+      self.skip = self.draw_skip()
+
+    counter = count()
+    try:
+      obj, _ = next(islice(zip(self.iterable, counter), self.skip, None))
+
+    except StopIteration:
+      self.reset()
+      raise
+
+    except Exception:
+      # counter only advanced for the objects that were drawn
+      self.skip -= next(counter)
+      raise
+
+    self.skip = None
+    return obj
+
+  def draw_skip(self):
+    '''
+    Number of objects to drop before the next kept object.
+    '''
+    p = self.p
+    if p == 1:
+      return 0
+    if p == 0:
+      return maxsize
+    return floor(log(_uniform(self.rand)) / log(1 - p))
+
+  def reset(self):
+    '''
+    Restarts the random numbers from seed.
+    '''
+    self.rand = Random(self.seed)
+    self.skip = None
+
+  def close(self):
+    '''
+    Restarts the random numbers and closes the iterable.
+    '''
+    self.reset()
+    close_iter(self.iterable)
+
+
+def sample_weighted(iterable, k, weight, seed=None):
+  '''
+  Returns a list of k objects chosen without replacement with probability
+  proportional to weight(object), or all objects with positive weight if there are
+  fewer than k. Uses Algorithm A-ExpJ, which draws random numbers only when the
+  sample changes. Objects with a weight of 0 or less are never chosen.
+
+  k - number of objects in the sample
+  weight - function that returns the weight of an object, star wrapped when
+    passed by position
+  seed - seed for random.Random
+
+  Example:
+  >>> Pipe((('a', 1), ('b', 0), ('c', 5))).sample_weighted(2, lambda name, w: w, seed=1)
+  [('a', 1), ('c', 5)]
+  '''
+  if k < 0:
+    raise ValueError('k must not be negative not {}'.format(k))
+  if not k:
+    return []
+
+  rand = Random(seed)
+  iterator = iter(iterable)
+
+  # heap of (log key, order, object), the smallest key is dropped first
+  heap = []
+  order = count()
+  for obj in iterator:
+    obj_weight = weight(obj)
+    if obj_weight > 0:
+      heap.append((log(_uniform(rand)) / obj_weight, next(order), obj))
+      if len(heap) == k:
+        break
+  else:
+    return [obj for _, _, obj in sorted(heap, key=lambda entry: entry[1])]
+
+  heapify(heap)
+  jump = log(_uniform(rand)) / heap[0][0]
+
+  for obj in iterator:
+    obj_weight = weight(obj)
+    if obj_weight <= 0:
+      continue
+
+    jump -= obj_weight
+    if jump <= 0:
+      # the new key is drawn above the smallest key in the sample
+      lowest = exp(heap[0][0] * obj_weight)
+      new_key = log(lowest + (1 - lowest) * _uniform(rand)) / obj_weight
+      heapreplace(heap, (new_key, next(order), obj))
+      jump = log(_uniform(rand)) / heap[0][0]
+
+  return [obj for _, _, obj in sorted(heap, key=lambda entry: entry[1])]
+
+
+methods_to_add = (
+    dict(gener=sample, is_valve=True),
+    sample_rate,
+    dict(gener=sample_weighted, is_valve=True, star_wrap=2),
+  )
+
+
+# definitions for map methods
+
+map_methods_to_add = ()
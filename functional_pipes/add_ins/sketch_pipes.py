@@ -0,0 +1,166 @@
+'''
+Methods that summarize or filter streams in bounded memory with the structures in
+functional_pipes.sketches.
+'''
+from itertools import groupby
+from operator import itemgetter
+
+from functional_pipes.checkpoint import checkpointed
+from functional_pipes.close_iter import close_iter
+from functional_pipes.sketches import BloomFilter, DigestSet, HyperLogLog, TDigest
+from functional_pipes.wrap_gener import wrap_gener
+
+
+# definitions for methods
+
+class unique:
+  '''
+  Yields the objects whose key has not been seen before.
+
+  key - function that returns the key of an object, defaults to the object.
+    It is star wrapped so it can take the unpacked object.
+  mode - 'exact' keeps a DigestSet of 16 byte key digests
+    'bloom' keeps a BloomFilter, which uses less memory but drops a new object
+    with probability error_rate
+  capacity - number of distinct keys the bloom filter is sized for.
+    The digest set grows as keys are added.
+  error_rate - false positive rate of the bloom filter
+
+  Example:
+  >>> Pipe((3, 1, 3, 2, 1)).unique().tuple()
+  (3, 1, 2)
+  >>> Pipe((('a', 1), ('b', 1), ('c', 2))).unique(key=lambda name, id: id).tuple()
+  (('a', 1), ('c', 2))
+  '''
+  __slots__ = ('iterable', 'key', 'mode', 'capacity', 'error_rate', 'seen')
+
+  def __init__(self, iterable, key=None, mode='exact', capacity=1000000, error_rate=0.001):
+    if mode not in ('exact', 'bloom'):
+      raise ValueError("mode must be 'exact' or 'bloom' not {!r}".format(mode))
+
+    self.iterable = iter(iterable)
+    self.key = key
+    self.mode = mode
+    self.capacity = capacity
+    self.error_rate = error_rate
+    self.seen = None
+
+  def __iter__(self):
+    return self
+
+  def __next__(self):
+    if self.seen is None:
+      self.reset()
+
+    add = self.seen.add
+    key = self.key
+
+    while True:
+      try:
+        obj = next(self.iterable)
+      except StopIteration:
+        self.seen = None
+        raise
+
+      if add(obj if key is None else key(obj)):
+        return obj
+
+  def reset(self):
+    '''
+    Forgets the keys that have been seen.
+    '''
+    if self.mode == 'exact':
+      self.seen = DigestSet()
+    else:
+      self.seen = BloomFilter(capacity=self.capacity, error_rate=self.error_rate)
+
+  def close(self):
+    '''
+    Forgets the keys that have been seen and closes the iterable.
+    '''
+    self.seen = None
+    close_iter(self.iterable)
+
+
+def unique_sorted(iterable, key=None):
+  '''
+  Yields the first object of each run of equal keys.
+  Holds no keys so it is the fast path for input sorted by key.
+
+  key - function that returns the key of an object, defaults to the object
+
+  Example:
+  >>> Pipe((1, 1, 2, 3, 3, 3)).unique_sorted().tuple()
+  (1, 2, 3)
+  '''
+  return map(next, map(itemgetter(1), groupby(iterable, key)))
+
+
+def hyperloglog(iterable, precision=14, key=None):
+  '''
+  Returns a HyperLogLog sketch of the distinct keys.
+  Sketches from shards of a stream merge with HyperLogLog.merge. The sketch is
+  kept in the checkpoints of the pipe if it has any.
+
+  precision - 2 ** precision registers, relative error about 1.04 / sqrt(2 ** precision)
+  key - function that returns the key of an object, defaults to the object
+  '''
+  sketch = checkpointed(iterable, HyperLogLog(precision))
+  sketch.update(iterable if key is None else map(key, iterable))
+  return sketch
+
+
+def count_distinct_approx(iterable, precision=14, key=None):
+  '''
+  Estimated number of distinct keys, from a HyperLogLog sketch.
+
+  Example:
+  >>> Pipe(range(1000)).map(lambda x: x % 100).count_distinct_approx()
+  100
+  '''
+  return hyperloglog(iterable, precision, key).count()
+
+
+def tdigest(iterable, compression=100):
+  '''
+  Returns a TDigest of the values.
+  Digests from shards of a stream merge with TDigest.merge. The digest is kept in
+  the checkpoints of the pipe if it has any.
+
+  compression - size limit of the digest, higher is more accurate
+  '''
+  digest = checkpointed(iterable, TDigest(compression))
+  digest.update(iterable)
+  return digest
+
+
+def quantiles_approx(iterable, qs, compression=100):
+  '''
+  Estimated values at the quantiles in qs, from a TDigest.
+  Raises ValueError if there are no values.
+
+  qs - iterable of numbers from 0 to 1
+
+  Example:
+  >>> Pipe(range(1001)).quantiles_approx((0, 0.5, 1))
+  (0.0, 500.0, 1000.0)
+  '''
+  digest = tdigest(iterable, compression)
+  return tuple(map(digest.quantile, qs))
+
+
+methods_to_add = (
+    dict(gener=unique, star_wrap='key'),
+    dict(gener=wrap_gener(unique_sorted), star_wrap='key'),
+
+    # valves
+    dict(gener=hyperloglog, is_valve=True, star_wrap='key'),
+    dict(gener=count_distinct_approx, is_valve=True, star_wrap='key'),
+    dict(gener=tdigest, is_valve=True),
+    dict(gener=quantiles_approx, is_valve=True, empty_error=ValueError),
+  )
+
+
+# definitions for map methods
+
+map_methods_to_add = ()
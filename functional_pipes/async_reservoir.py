@@ -0,0 +1,210 @@
+'''
+Runs reusable pipes on async sources: async iterables and asyncio queues.
+
+The objects are pulled from the source in batches and each batch is put through
+the pipe the same way as calling the reusable pipe with a list, so the segments
+stay synchronous. The event loop gets control back at least every time slice:
+the batch being drawn through the pipe is paused after the slice runs out, and
+the batch size shrinks when the pipe ran longer than a slice without giving an
+object, as a segment that drops most objects does.
+
+Each batch is a separate call of the pipe, so segments that read ahead (sorted,
+chunked, windowed) start over with each batch. Pipes that end in a valve raise
+ValueError, as the valve would give a result for each batch and the batches
+depend on when the objects arrive.
+
+Example:
+>>> async for obj in Pipe().map(json.loads).filter(wanted)(websocket):
+...   await handle(obj)
+'''
+import asyncio
+from time import perf_counter
+
+
+class QueueEnd:
+  '''
+  Put in an asyncio.Queue to end the objects a pipe reads from it.
+  '''
+  pass
+
+
+# asyncio.Queue.shutdown was added in python 3.13, except () catches nothing
+_QueueShutDown = getattr(asyncio, 'QueueShutDown', ())
+
+
+class AsyncReservoir:
+  '''
+  Pulls batches of objects from an async iterable or an asyncio.Queue.
+  A batch is sent as soon as it is full or no more objects came within the time
+  slice after its first object.
+  Pass one to a reusable pipe instead of the source to set the batch size and
+  time slice.
+  '''
+  __slots__ = ('queue', 'iterator', 'pending', 'size', 'most', 'time_slice', 'done')
+
+  def __init__(self, source, size=1000, time_slice=0.01):
+    '''
+    source - async iterable, or asyncio.Queue ended by putting QueueEnd in it
+    size - most objects in a batch. The first batch has one object and the size
+      doubles while the pipe is fast, so a slow segment cannot hold the event loop
+      for a whole batch before the size is known.
+    time_slice - most seconds the pipe runs before the event loop gets control
+      back, unless a single object takes longer. Also the time to wait for more
+      objects after the first object of a batch.
+    '''
+    if size < 1:
+      raise ValueError('size must be at least 1 not {}'.format(size))
+
+    if isinstance(source, asyncio.Queue):
+      self.queue, self.iterator = source, None
+    else:
+      self.queue, self.iterator = None, source.__aiter__()
+
+    self.pending = None
+    self.size = 1
+    self.most = size
+    self.time_slice = time_slice
+    self.done = False
+
+  async def batch(self):
+    '''
+    Returns a list of the next objects, empty once the source is done.
+    '''
+    if self.done:
+      return []
+    if self.queue is not None:
+      return await self.queue_batch()
+    return await self.iterator_batch()
+
+  async def queue_batch(self):
+    queue = self.queue
+    batch = []
+
+    try:
+      obj = await queue.get()
+      deadline = perf_counter() + self.time_slice
+      while obj is not QueueEnd:
+        batch.append(obj)
+        if len(batch) >= self.size:
+          return batch
+
+        if queue.empty():
+          timeout = deadline - perf_counter()
+          if timeout <= 0:
+            return batch
+          try:
+            obj = await asyncio.wait_for(queue.get(), timeout)
+          except asyncio.TimeoutError:
+            return batch
+        else:
+          obj = queue.get_nowait()
+    except _QueueShutDown:
+      pass
+
+    self.done = True
+    return batch
+
+  async def iterator_batch(self):
+    batch = []
+    deadline = None
+
+    while len(batch) < self.size:
+      if self.pending is None:
+        # a task so that waiting for it can time out without cancelling the iterator
+        self.pending = asyncio.ensure_future(self.iterator.__anext__())
+
+      if batch:
+        timeout = deadline - perf_counter()
+        if timeout <= 0:
+          break
+        finished, _ = await asyncio.wait((self.pending,), timeout=timeout)
+        if not finished:
+          break
+      else:
+        await asyncio.wait((self.pending,))
+        deadline = perf_counter() + self.time_slice
+
+      pending, self.pending = self.pending, None
+      try:
+        batch.append(pending.result())
+      except StopAsyncIteration:
+        self.done = True
+        break
+
+    return batch
+
+  def resize(self, longest):
+    '''
+    Shrinks the batch size if the pipe ran longer than the time slice without
+    giving an object, and doubles it up to the most objects in a batch if it ran
+    less than half of it.
+
+    longest - longest run of the pipe without giving an object, in seconds
+    '''
+    time_slice = self.time_slice
+    if longest > time_slice:
+      self.size = max(1, int(self.size * time_slice / longest))
+    elif 2 * longest < time_slice:
+      self.size = min(self.most, 2 * self.size)
+
+  def close(self):
+    '''
+    Cancels the object being waited for.
+    '''
+    if self.pending is not None:
+      self.pending.cancel()
+      self.pending = None
+
+
+def run_async(pipe, source):
+  '''
+  Returns an async generator that puts the objects from source through the
+  reusable pipe in batches and yields the objects out of it.
+  Used by Pipe.__call__ for async sources.
+  Raises ValueError if the pipe ends in a valve.
+
+  pipe - reusable Pipe
+  source - async iterable, asyncio.Queue or AsyncReservoir
+  '''
+  if pipe.valve:
+    raise ValueError('a pipe that ends in a valve cannot run on an async source, '
+                     'the valve would give a result for each batch')
+
+  reservoir = source if isinstance(source, AsyncReservoir) else AsyncReservoir(source)
+  return _run_async(pipe, reservoir)
+
+
+async def _run_async(pipe, reservoir):
+  time_slice = reservoir.time_slice
+
+  try:
+    while True:
+      batch = await reservoir.batch()
+      if not batch:
+        return
+
+      pipe(batch)
+      longest = 0.
+      start = perf_counter()
+      while True:
+        pulled = perf_counter()
+        try:
+          obj = next(pipe)
+        except StopIteration:
+          break
+        longest = max(longest, perf_counter() - pulled)
+
+        try:
+          yield obj
+        except GeneratorExit:
+          pipe.close()
+          raise
+
+        if perf_counter() - start >= time_slice:
+          await asyncio.sleep(0)
+          start = perf_counter()
+
+      reservoir.resize(max(longest, perf_counter() - pulled))
+      await asyncio.sleep(0)
+  finally:
+    reservoir.close()
@@ -0,0 +1,148 @@
+'''
+Picklable descriptions of pipes.
+
+A Pipe holds live iterators, so it cannot be sent to another process. Its
+Blueprint holds only the steps that built it: the names of the methods, properties
+and [key] lookups and the arguments they were called with. Rebuilding the steps on
+an empty Pipe gives a pipe that does the same thing.
+
+Functions in the arguments are pickled by reference (module and name). Lambdas and
+closures need cloudpickle, which Blueprint.dumps uses when it is installed.
+
+Example:
+>>> blueprint = Pipe().map(abs).filter(bool).tuple().blueprint()
+>>> Blueprint.loads(blueprint.dumps()).build()((-1, 0, 2))
+(1, 2)
+'''
+import pickle
+from collections import namedtuple
+
+try:
+  import cloudpickle
+except ImportError:
+  cloudpickle = None
+
+
+'''
+One step of building a pipe.
+
+kind - 'call' for a method call, 'attr' for a property and 'item' for a property
+  followed by a [key] lookup (carry_dict['a'])
+name - method or property name
+args - positional arguments of a call, (key,) for an item
+kargs - keyword arguments of a call
+'''
+Step = namedtuple('Step', ('kind', 'name', 'args', 'kargs'), defaults=((), None))
+
+
+def apply_step(pipe, step):
+  '''
+  Returns the pipe made by taking step on pipe.
+  '''
+  extended = getattr(pipe, step.name)
+
+  if step.kind == 'call':
+    return extended(*step.args, **(step.kargs or {}))
+  if step.kind == 'item':
+    return extended[step.args[0]]
+  return extended
+
+
+class Blueprint:
+  '''
+  The steps that build a pipe and the add-ins they need.
+  Made with Pipe.blueprint.
+  '''
+  __slots__ = ('steps', 'add_ins')
+
+  def __init__(self, steps, add_ins=()):
+    '''
+    steps - tuple of Step in the order they are taken
+    add_ins - names of the add-ins that are loaded before building
+    '''
+    self.steps = tuple(steps)
+    self.add_ins = tuple(add_ins)
+
+  def build(self):
+    '''
+    Returns a new reusable Pipe made by taking the steps on an empty Pipe.
+    Add-ins that are not loaded yet are loaded first.
+    '''
+    # imported here because pipe.py imports this module
+    from functional_pipes.pipe import Pipe
+
+    to_load = [add_in for add_in in self.add_ins if add_in not in Pipe.added_methods]
+    if to_load:
+      Pipe.load(*to_load)
+
+    pipe = Pipe()
+    for step in self.steps:
+      pipe = apply_step(pipe, step)
+
+    return pipe
+
+  def dumps(self):
+    '''
+    Returns the blueprint pickled to bytes, with cloudpickle if it is installed
+    so lambdas and closures can be included.
+    '''
+    return (cloudpickle or pickle).dumps(self, pickle.HIGHEST_PROTOCOL)
+
+  @staticmethod
+  def loads(data):
+    '''
+    Returns the Blueprint pickled by Blueprint.dumps.
+    '''
+    return pickle.loads(data)
+
+  def __getstate__(self):
+    return self.steps, self.add_ins
+
+  def __setstate__(self, state):
+    self.steps, self.add_ins = state
+
+  def __eq__(self, other):
+    return (isinstance(other, Blueprint) and self.steps == other.steps
+            and self.add_ins == other.add_ins)
+
+  def __repr__(self):
+    return 'Blueprint({!r}, {!r})'.format(self.steps, self.add_ins)
+
+
+_worker_pipe = None
+
+
+def init_worker(data):
+  '''
+  Builds the pipe a worker process runs.
+  Pass as the initializer of a process pool so the pipe is sent to each worker
+  once instead of with every task.
+
+  data - bytes from Blueprint.dumps
+
+  Example:
+  >>> data = Pipe().map(abs).sum().blueprint().dumps()
+  >>> with ProcessPoolExecutor(initializer=init_worker, initargs=(data,)) as pool:
+  ...   sum(pool.map(run_worker, ((-1, 2), (3, -4))))
+  10
+  '''
+  global _worker_pipe
+  _worker_pipe = Blueprint.loads(data).build()
+
+
+def run_worker(iterable):
+  '''
+  Runs the pipe built by init_worker on iterable.
+  Returns the valve's result, or a list of the objects if the pipe has no valve.
+  '''
+  result = _worker_pipe(iterable)
+  return result if _worker_pipe.valve else list(result)
+
+
+def run_worker_each(iterable):
+  '''
+  Runs the pipe built by init_worker on each object of iterable on its own.
+  Returns a list with the list of objects the pipe gave for each object, so a
+  pipe that filters or expands the objects can be lined up with its input.
+  '''
+  return [list(_worker_pipe((obj,))) for obj in iterable]
@@ -3,6 +3,32 @@ Use to carry values around multiple pipe segments
 and reconnect them later.
 '''
 
+import sys
+from collections import namedtuple
+
+from functional_pipes.blueprint import Step
+from functional_pipes.close_iter import close_iter
+
+
+'''
+Information held by a bypass Pipe about how to merge the bypass back into the
+main pipe.
+
+open_name - method name that opened the bypass
+close_name - method name that closes the bypass
+  None if the bypass closes itself after the first method
+split - function that splits an object into (carried object, bypass object)
+merge - function that merges the carried object with the bypass output
+close_bypass - function that closes the bypass Pipe
+bypass_class - class that carries the objects around the bypass
+  defaults to Bypass
+'''
+BypassProperties = namedtuple(
+    'BypassProperties',
+    ('open_name', 'close_name', 'split', 'merge', 'close_bypass', 'bypass_class'),
+    defaults = (None, None, None, None, None),
+  )
+
 
 class Bypass:
   '''
@@ -16,6 +42,8 @@ class Bypass:
   If the bypass iterator does not return a value for the input then the self.store
   object is dropped and the next object from iterable is put into the bypass.
   '''
+  __slots__ = ('bypass', 'iterable', 'drip_handle', 'split', 'merge', 'store')
+
   def __init__(self, bypass, iterable, drip_handle, split, merge):
     '''
     bypass - Inteded to be a Pipe but it can be any iterator that initally iterates
@@ -57,6 +85,9 @@ class Bypass:
           continue
 
       else:
+        # the stream is over, empty the bypass segments so the pipe can be reused
+        self.store = None
+        _close_segments(self.bypass, self.drip_handle)
         raise StopIteration
 
     return to_return
@@ -64,6 +95,14 @@ class Bypass:
   def __iter__(self):
     return self
 
+  def close(self):
+    '''
+    Drops the carried object and closes the bypass and the iterable feeding it.
+    '''
+    self.store = None
+    _close_segments(self.bypass, self.drip_handle)
+    close_iter(self.iterable)
+
 
 class Drip(Exception):
   '''
@@ -72,7 +111,9 @@ class Drip(Exception):
   Call with an object to return when next is called on it.
   After first next is called the second next will raise a Drip exception.
   Used by the Bypass class to control flow into the bypass pipe.
+  Not slotted since an Exception always has a __dict__.
   '''
+
   def __init__(self):
     self.to_drip = _drip_empty
 
@@ -96,6 +137,48 @@ class Drip(Exception):
   def __iter__(self):
     return self
 
+  def close(self):
+    '''
+    Drops the object waiting to be dripped.
+    '''
+    self.to_drip = _drip_empty
+
+class BlockDrip(Drip):
+  '''
+  Root iterator of a block bypass.
+  Call with a column to give its values when next is called on it, then a Drip
+  exception, so the segments of the bypass keep their state from one block to
+  the next as they do between the objects of a Bypass. row is the index of the
+  last value given.
+  '''
+
+  def __init__(self):
+    super().__init__()
+    self.iterator = iter(())
+    self.row = -1
+
+  def __call__(self, column):
+    '''
+    Sets the column of values to give.
+    '''
+    self.iterator = iter(column)
+    self.row = -1
+
+  def __next__(self):
+    value = next(self.iterator, _drip_empty)
+    if value is _drip_empty:
+      raise Drip
+
+    self.row += 1
+    return value
+
+  def close(self):
+    '''
+    Drops the values waiting to be given.
+    '''
+    self.iterator = iter(())
+
+
 class _drip_empty:
   '''
   Exclusive use in Drip class for indicating if it is empty or not.
@@ -103,6 +186,139 @@ class _drip_empty:
   pass
 
 
+class BlockBypass(Bypass):
+  '''
+  Use to carry part of each block of records around a pipe segment.
+
+  Each object from the iterable is a whole block (a list of records or a numpy
+  array). split takes the column that goes through the bypass out of the block
+  and the bypass draws all of its values in one run, without a Drip handshake
+  for each value. If every segment in the bypass keeps the length the values
+  line up with the rows of the block. Otherwise the row each value came from is
+  recorded, so a bypass that filters or expands the values gives merge the rows
+  to keep or repeat in the carried part.
+
+  The segments see the columns of all the blocks as one stream, as the segments
+  of a Bypass see its objects, so segments that keep state (rolling windows,
+  enumerate) carry it from one block to the next. A value is merged with the row
+  that was last given to the bypass when it came out.
+
+  If every segment is a map of a numpy ufunc that takes one argument, a numpy
+  column is put through the ufuncs whole instead of one value at a time.
+
+  drip_handle - a BlockDrip
+  merge - function that takes in three arguments and returns the merged block.
+    The first argument is the carried block, the second is None if every row was
+    kept once, else a list of the row index that each value came from, and the
+    third is the list of values that came out of the bypass.
+  '''
+  __slots__ = ('keeps_length', 'column_functions')
+
+  def __init__(self, bypass, iterable, drip_handle, split, merge):
+    super().__init__(bypass, iterable, drip_handle, split, merge)
+    self.keeps_length = _keeps_length(bypass, drip_handle)
+    self.column_functions = _column_functions(bypass, drip_handle)
+
+  def __next__(self):
+    bypass = getattr(self.bypass, 'function_pipe', self.bypass)
+    drip_handle = self.drip_handle
+
+    try:
+      block = next(self.iterable)
+    except StopIteration:
+      # the stream is over, empty the bypass segments so the pipe can be reused
+      _close_segments(self.bypass, self.drip_handle)
+      raise
+
+    store, column = self.split(block)
+
+    functions = self.column_functions
+    if functions is not None and not isinstance(column, (list, tuple)):
+      for function in functions:
+        column = function(column)
+      return self.merge(store, None, column)
+
+    drip_handle(column)
+
+    values = []
+    if self.keeps_length:
+      try:
+        # the values drawn before the Drip stay in the list
+        values.extend(bypass)
+      except Drip:
+        pass
+      return self.merge(store, None, values)
+
+    rows = []
+    try:
+      while True:
+        value = next(bypass)
+        rows.append(drip_handle.row)
+        values.append(value)
+    except Drip:
+      pass
+
+    return self.merge(store, rows, values)
+
+
+def _close_segments(bypass, drip_handle):
+  '''
+  Closes the segments from the end of the bypass pipe back to drip_handle and
+  drip_handle itself, but not the pipe the bypass was opened on or its source.
+  bypass can also be a plain iterator over drip_handle.
+  '''
+  pipe = bypass
+  while getattr(pipe, 'function_pipe', drip_handle) is not drip_handle:
+    close_iter(pipe.function_pipe)
+    pipe = pipe.upstream_pipe if pipe.upstream_pipe is not None else pipe.enclosing_pipe
+
+  if not hasattr(bypass, 'function_pipe'):
+    close_iter(bypass)
+  close_iter(drip_handle)
+
+
+def _column_functions(bypass, drip_handle):
+  '''
+  Returns the functions of the segments from drip_handle to the end of the bypass
+  pipe, in order, if every segment is a map of a numpy ufunc that takes one
+  argument, else None.
+  '''
+  numpy = sys.modules.get('numpy')
+  if numpy is None:
+    return None
+
+  functions = []
+  pipe = bypass
+  while getattr(pipe, 'function_pipe', drip_handle) is not drip_handle:
+    step = pipe.step
+    if step is None or step.name != 'map' or len(step.args) != 1 or step.kargs:
+      return None
+
+    function = step.args[0]
+    if not isinstance(function, numpy.ufunc) or function.nin != 1:
+      return None
+
+    functions.append(function)
+    pipe = pipe.upstream_pipe
+
+  functions.reverse()
+  return functions or None
+
+
+def _keeps_length(bypass, drip_handle):
+  '''
+  True if every segment from drip_handle to the end of the bypass pipe gives one
+  object for each object it gets.
+  '''
+  pipe = bypass
+  while getattr(pipe, 'function_pipe', drip_handle) is not drip_handle:
+    if not pipe.keeps_length:
+      return False
+    pipe = pipe.upstream_pipe if pipe.upstream_pipe is not None else pipe.enclosing_pipe
+
+  return pipe is not bypass
+
+
 def close_bypass_default(close_name):
   '''
   courier function for close_bypass
@@ -126,9 +342,11 @@ def close_bypass_default(close_name):
       raise TypeError('Recieved a {} but was expecting a {} when closing a {} bypass Pipe.'.format(
           close_name, b_props.close_name, b_props.open_name,))
 
-    bpp = Bypass(
+    bypass_class = b_props.bypass_class if b_props.bypass_class else Bypass
+
+    bpp = bypass_class(
         bypass = self,
-        iterable = enclosing_pipe,
+        iterable = enclosing_pipe.function_pipe,
         drip_handle = self.reservoir,
         split = b_props.split,
         merge = b_props.merge,
@@ -140,6 +358,11 @@ def close_bypass_default(close_name):
         iterable_pre_load = enclosing_pipe.preloaded,
         function_pipe = bpp,
         reservoir = enclosing_pipe.reservoir,
+        enclosing_pipe = enclosing_pipe.enclosing_pipe,
+        bypass_properties = enclosing_pipe.bypass_properties,
+        upstream_pipe = self,
+        # a single segment bypass is closed again by the step of its segment
+        step = Step('attr', close_name) if close_name else None,
       )
 
   return close_bypass
@@ -2,8 +2,13 @@
 Bypass method definitions
 '''
 
-from functional_pipes.more_collections import dotdict
-from functional_pipes.bypass import Drip, close_bypass_default
+from itertools import compress
+from operator import itemgetter
+
+from functional_pipes.blueprint import Step
+from functional_pipes.bypass import (
+    BlockBypass, BlockDrip, BypassProperties, Drip, close_bypass_default,
+  )
 
 
 def add_bypasses(pipe_class):
@@ -12,9 +17,69 @@ def add_bypasses(pipe_class):
 
 
 
+def _plain_key(key):
+  '''
+  Returns the key of a list of one key, so it works the same as the key on its own.
+  '''
+  if isinstance(key, list) and len(key) == 1:
+    return key[0]
+  return key
+
+
+def _dict_split_merge(key):
+  '''
+  Returns the (split, merge) functions of a bypass that carries the dictionary
+  around the value at key.
+  If key is a list of several keys the bypass gets a tuple of the values of the
+  keys, which star wraps into functions that take one argument for each key, and
+  gives back a tuple of as many values to write back. A list of one key is the
+  same as the key.
+  '''
+  key = _plain_key(key)
+  if not isinstance(key, list):
+    def merge(dictionary, value):
+      dictionary[key] = value
+      return dictionary
+
+    return lambda dictionary: (dictionary, dictionary[key]), merge
+
+  keys = tuple(key)
+  if not keys:
+    raise ValueError('The list of keys is empty.')
+
+  values_of = _dict_values_getter(keys)
+
+  def merge_all(dictionary, values):
+    _set_dict_values(dictionary, keys, values)
+    return dictionary
+
+  return lambda dictionary: (dictionary, values_of(dictionary)), merge_all
+
+
+def _dict_values_getter(keys):
+  '''
+  Function that returns the values of keys in a dictionary as a tuple.
+  '''
+  if len(keys) == 1:
+    key, = keys
+    return lambda dictionary: (dictionary[key],)
+  return itemgetter(*keys)
+
+
+def _set_dict_values(dictionary, keys, values):
+  '''
+  Writes values into dictionary at keys, one value for each key.
+  '''
+  if len(values) != len(keys):
+    raise ValueError('Got {} values for the {} keys {}.'.format(len(values), len(keys), keys))
+  dictionary.update(zip(keys, values))
+
+
 class dict_carry_open:
   '''
   Class that allows dictionary object to bypass a Pipe.
+  carry_dict[['a', 'b']] carries the dictionary around a tuple of the values of
+  several keys in one bypass.
   '''
   open_name = 'carry_dict'
   close_name = 'return_dict'
@@ -25,30 +90,153 @@ class dict_carry_open:
   def __getitem__(self, key):
     '''
     self - pipe instance
+    key - a key or a list of keys
     '''
     enclosing_pipe = self.enclosing_pipe
+    split, merge = _dict_split_merge(key)
 
-    def merge(dictionary, value):
-      dictionary[key] = value
-      return dictionary
+    pipe_class = self.enclosing_pipe.__class__
+
+    return pipe_class(
+        reservoir = Drip(),
+        enclosing_pipe = enclosing_pipe,
+        step = Step('item', self.open_name, (key,)),
+        bypass_properties = BypassProperties(
+            open_name = self.open_name,
+            close_name = self.close_name,
+            split = split,
+            merge = merge,
+          ),
+      )
+
+
+class RowMask:
+  '''
+  Returned by the segments of a carry_column bypass to drop rows from the batch.
+  The rows where mask is false are dropped from every column.
+
+  mask - list or numpy array of one bool for each row of the column
+  column - new values of the column for the rows that are kept, defaults to
+    the kept rows of the column that went into the bypass
+  '''
+  __slots__ = ('mask', 'column')
+
+  def __init__(self, mask, column=None):
+    self.mask = mask
+    self.column = column
+
+
+class column_carry_open:
+  '''
+  Class that allows a batch of records stored as a dict of columns (lists, tuples
+  or numpy arrays) to bypass a Pipe.
+  The whole column at key goes through the bypass as one object, so the segments
+  work on all of its values at once (numpy ufuncs, np_ methods, functions of
+  lists). What comes out of the bypass for a batch is either a column of the
+  same length, which is written back into a copy of the batch, or a RowMask,
+  which drops the rows where the mask is false from every column.
+  A batch the bypass drops is dropped and a batch it gives several columns for
+  is given once for each.
+
+  Example:
+  >>> batch = dict(name=['John', 'Billy', 'Cait'], age=np.array([5, 9, 12]))
+  >>> Pipe([batch]).carry_column['age'].map(lambda age: RowMask(age > 6)).return_column.tuple()
+  ({'name': ['Billy', 'Cait'], 'age': array([ 9, 12])},)
+  '''
+  open_name = 'carry_column'
+  close_name = 'return_column'
+
+  def __init__(self, enclosing_pipe):
+    self.enclosing_pipe = enclosing_pipe
+
+  def __getitem__(self, key):
+    '''
+    self - pipe instance
+    key - the name of the column that goes through the bypass
+    '''
+    enclosing_pipe = self.enclosing_pipe
+
+    def merge(batch, out):
+      column = batch[key]
+      merged = dict(batch)
+
+      if isinstance(out, RowMask):
+        mask = out.mask
+        if len(mask) != len(column):
+          raise ValueError('The mask of column {!r} has {} rows not {}.'.format(
+              key, len(mask), len(column)))
+
+        for name, other_column in batch.items():
+          merged[name] = _mask_rows(other_column, mask)
+        if out.column is not None:
+          merged[key] = _column_like(merged[key], out.column)
+
+      elif len(out) != len(column):
+        raise ValueError('The bypass of column {!r} gave {} values for {} rows, return a '
+                         'RowMask to drop rows.'.format(key, len(out), len(column)))
+
+      else:
+        merged[key] = _column_like(column, out)
+
+      return merged
 
     pipe_class = self.enclosing_pipe.__class__
 
     return pipe_class(
         reservoir = Drip(),
         enclosing_pipe = enclosing_pipe,
-        bypass_properties = dotdict(
+        step = Step('item', self.open_name, (key,)),
+        bypass_properties = BypassProperties(
             open_name = self.open_name,
             close_name = self.close_name,
-            split = lambda dictionary: (dictionary, dictionary[key]),
+            split = lambda batch: (batch, batch[key]),
             merge = merge,
           ),
       )
 
 
+def _mask_rows(column, mask):
+  '''
+  Returns the values of column where mask is true.
+  Lists and tuples stay the same type and anything else (numpy arrays) is
+  indexed with the mask.
+  '''
+  if isinstance(column, (list, tuple)):
+    return type(column)(compress(column, mask))
+  return column[mask]
+
+
+def _take_rows(column, rows):
+  '''
+  Returns the values of column at the indexes in rows.
+  Lists and tuples stay the same type and anything else (numpy arrays) is
+  indexed with the list of rows.
+  '''
+  if isinstance(column, (list, tuple)):
+    return type(column)(map(column.__getitem__, rows))
+  return column[rows]
+
+
+def _column_like(column, values):
+  '''
+  Returns values as the same kind of column as column.
+  '''
+  if isinstance(column, list):
+    return values if isinstance(values, list) else list(values)
+  if isinstance(column, tuple):
+    return tuple(values)
+  if hasattr(column, '__array__'):
+    # only reached with numpy arrays so numpy is already imported
+    from numpy import asarray
+    # an empty list would become float64
+    return asarray(values) if len(values) else asarray(values, dtype=column.dtype)
+  return values
+
+
 class dict_key:
   '''
   allows the dict to bypass one pipe segment
+  dict_key[['a', 'b']] passes a tuple of the values of several keys.
   '''
   open_name = 'dict_key'
 
@@ -58,33 +246,152 @@ class dict_key:
   def __getitem__(self, key):
     '''
     self - pipe instance
+    key - a key or a list of keys
     '''
     enclosing_pipe = self.enclosing_pipe
-
-    def merge(dictionary, value):
-      dictionary[key] = value
-      return dictionary
+    split, merge = _dict_split_merge(key)
 
     pipe_class = self.enclosing_pipe.__class__
 
     return pipe_class(
         reservoir = Drip(),
         enclosing_pipe = enclosing_pipe,
-        bypass_properties = dotdict(
+        step = Step('item', self.open_name, (key,)),
+        bypass_properties = BypassProperties(
             open_name = self.open_name,
             close_name = None,
-            split = lambda dictionary: (dictionary, dictionary[key]),
+            split = split,
             merge = merge,
             close_bypass = close_bypass_default(None),
           ),
       )
 
 
+def block_pairs_open(open_name, close_name, carried):
+  '''
+  Returns the opening property of a bypass over blocks of (key, value) pairs:
+  lists or tuples of pairs, or numpy arrays with two columns.
+  Index carried of each pair is carried around the bypass and the other index
+  goes through it. Rows dropped or repeated by the bypass are dropped or repeated
+  in the carried column.
+
+  Example:
+  >>> Pipe([[(1, 2), (3, 4)]]).block_carry_key.map(lambda b: 2 * b).block_re_key.tuple()
+  ([(1, 4), (3, 8)],)
+  '''
+  processed = 1 - carried
+
+  def split(block):
+    if isinstance(block, (list, tuple)):
+      return block, list(map(itemgetter(processed), block))
+    return block, block[:, processed]
+
+  def merge(block, rows, values):
+    if isinstance(block, (list, tuple)):
+      if rows is not None:
+        block = _take_rows(block, rows)
+      carried_values = map(itemgetter(carried), block)
+      pairs = zip(carried_values, values) if carried == 0 else zip(values, carried_values)
+      return type(block)(pairs)
+
+    # only reached with numpy arrays so numpy is already imported
+    from numpy import column_stack
+    carried_column = block[:, carried] if rows is None else block[rows, carried]
+    return column_stack((carried_column, values) if carried == 0 else (values, carried_column))
+
+  def open_bypass(enclosing_pipe):
+    return enclosing_pipe.__class__(
+        reservoir = BlockDrip(),
+        enclosing_pipe = enclosing_pipe,
+        step = Step('attr', open_name),
+        bypass_properties = BypassProperties(
+            open_name = open_name,
+            close_name = close_name,
+            split = split,
+            merge = merge,
+            bypass_class = BlockBypass,
+          ),
+      )
+
+  return property(open_bypass)
+
+
+class block_dict_carry_open:
+  '''
+  Class that allows the dictionaries in blocks (lists or tuples of dictionaries)
+  to bypass a Pipe. The values of a key, or tuples of the values of a list of
+  keys, go through the bypass for the whole block and are written back into the
+  dictionaries. Dictionaries of rows dropped by the bypass are dropped and
+  repeated rows are copies.
+
+  Example:
+  >>> block = [dict(name='John', age=5), dict(name='Cait', age=12)]
+  >>> Pipe([block]).block_carry_dict['age'].filter(lambda age: age > 6).block_return_dict.tuple()
+  ([{'name': 'Cait', 'age': 12}],)
+  '''
+  open_name = 'block_carry_dict'
+  close_name = 'block_return_dict'
+
+  def __init__(self, enclosing_pipe):
+    self.enclosing_pipe = enclosing_pipe
+
+  def __getitem__(self, key):
+    '''
+    self - pipe instance
+    key - a key or a list of keys
+    '''
+    key = _plain_key(key)
+    if isinstance(key, list):
+      keys = tuple(key)
+      if not keys:
+        raise ValueError('The list of keys is empty.')
+      values_of = _dict_values_getter(keys)
+    else:
+      values_of = itemgetter(key)
+
+    def merge(block, rows, values):
+      if rows is None:
+        dictionaries = block
+      else:
+        dictionaries = []
+        seen = set()
+        for row in rows:
+          dictionary = block[row]
+          if row in seen:
+            dictionary = dict(dictionary)
+          seen.add(row)
+          dictionaries.append(dictionary)
+
+      if isinstance(key, list):
+        for dictionary, value in zip(dictionaries, values):
+          _set_dict_values(dictionary, keys, value)
+      else:
+        for dictionary, value in zip(dictionaries, values):
+          dictionary[key] = value
+
+      return type(block)(dictionaries)
+
+    pipe_class = self.enclosing_pipe.__class__
+
+    return pipe_class(
+        reservoir = BlockDrip(),
+        enclosing_pipe = self.enclosing_pipe,
+        step = Step('item', self.open_name, (key,)),
+        bypass_properties = BypassProperties(
+            open_name = self.open_name,
+            close_name = self.close_name,
+            split = lambda block: (block, list(map(values_of, block))),
+            merge = merge,
+            bypass_class = BlockBypass,
+          ),
+      )
+
+
 bypass_definitions = (
     dict(
         open_name = 'carry_key',
         close_name = 're_key',
-        split = lambda key_val: (key_val[0], key_val[1]),
+        split = itemgetter(0, 1),
         merge = lambda key, bypass_val: (key, bypass_val),
       ),
     dict(
@@ -96,7 +403,7 @@ bypass_definitions = (
     dict(
         open_name = 'carry_value',
         close_name = 're_value',
-        split = lambda key_val: (key_val[1], key_val[0]),
+        split = itemgetter(1, 0),
         merge = lambda val, bypass_key: (bypass_key, val),
       ),
     dict(
@@ -105,9 +412,31 @@ bypass_definitions = (
         close_name = dict_carry_open.close_name,
         open_bypass = property(dict_carry_open),
       ),
+    dict(
+        # column_carry_open
+        open_name = column_carry_open.open_name,
+        close_name = column_carry_open.close_name,
+        open_bypass = property(column_carry_open),
+      ),
     dict(
         # dict_key
         open_name = dict_key.open_name,
         open_bypass = property(dict_key),
       ),
+    dict(
+        open_name = 'block_carry_key',
+        close_name = 'block_re_key',
+        open_bypass = block_pairs_open('block_carry_key', 'block_re_key', carried=0),
+      ),
+    dict(
+        open_name = 'block_carry_value',
+        close_name = 'block_re_value',
+        open_bypass = block_pairs_open('block_carry_value', 'block_re_value', carried=1),
+      ),
+    dict(
+        # block_dict_carry_open
+        open_name = block_dict_carry_open.open_name,
+        close_name = block_dict_carry_open.close_name,
+        open_bypass = property(block_dict_carry_open),
+      ),
   )
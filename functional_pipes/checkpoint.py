@@ -0,0 +1,206 @@
+'''
+Checkpoints that let a long running pipe continue where it stopped.
+
+A Checkpoint segment counts the objects that pass through it and every n objects
+writes a file holding the position of the reservoir and the state of the valve
+at the end of the pipe. Resuming from that file moves the reservoir to the saved
+position, so input that was already processed is neither read nor recomputed.
+
+The reservoir position is the index into a sized iterable (list, tuple, range) or
+the tell() of a seekable file. Other iterables are run from the start and the
+objects that already passed the checkpoint are dropped before they reach the
+valve.
+
+Valves that keep their state between checkpoints (sum, aggregate, hyperloglog,
+tdigest, ...) get it with checkpointed or fold. Resuming a pipe that ends in any
+other valve raises ValueError, as the valve would only see the objects after the
+checkpoint. A pipe without a valve (read with a for loop) skips the input that
+was already processed.
+'''
+import os
+import pickle
+from functools import reduce
+from tempfile import NamedTemporaryFile
+
+from more_itertools import consume
+
+from functional_pipes.close_iter import close_iter
+
+
+class Checkpoint:
+  '''
+  Pipe segment that saves the progress of the pipe to path every n objects.
+  The file is replaced atomically, so a crash while saving leaves the previous
+  checkpoint in place.
+
+  The reservoir position is taken between two objects, after everything before
+  the checkpoint has been drawn for the last object and before the next one is
+  drawn. Segments before the checkpoint that read ahead (sorted, chunked, windowed)
+  would make the position skip objects, so the checkpoint should come before them.
+  '''
+  __slots__ = (
+      'iterable', 'reservoir', 'path', 'every', 'passed', 'saved', 'state', 'resume_from', 'valve',
+    )
+
+  def __init__(self, iterable, reservoir, path, every=1000):
+    '''
+    iterable - the objects passing through
+    reservoir - the Reservoir at the start of the pipe
+    path - file the checkpoint is written to
+    every - number of objects between checkpoints
+    '''
+    if every < 1:
+      raise ValueError('every must be at least 1 not {}'.format(every))
+
+    self.iterable = iter(iterable)
+    self.reservoir = reservoir
+    self.path = path
+    self.every = every
+    self.resume_from = None
+    # set when a valve is added after the checkpoint
+    self.valve = False
+    self.reset()
+
+  def __iter__(self):
+    return self
+
+  def __next__(self):
+    if self.resume_from is not None:
+      self.skip()
+
+    if self.passed - self.saved >= self.every:
+      self.save()
+
+    try:
+      obj = next(self.iterable)
+    except StopIteration:
+      self.reset()
+      raise
+
+    self.passed += 1
+    return obj
+
+  def reset(self):
+    '''
+    Forgets the count and the valve state.
+    '''
+    self.passed = self.saved = 0
+    self.state = None
+
+  def keep(self, state):
+    '''
+    Saves state with each checkpoint.
+    Returns the state saved in the checkpoint being resumed, if there is one,
+    else state.
+
+    state - object that the valve updates in place
+    '''
+    if self.resume_from is not None and self.resume_from['state'] is not None:
+      state = self.resume_from['state']
+
+    self.state = state
+    return state
+
+  def save(self):
+    '''
+    Writes the checkpoint to a temporary file in the directory of path and then
+    replaces path with it.
+    '''
+    checkpoint = dict(
+        offset = self.reservoir.position(),
+        passed = self.passed,
+        state = self.state,
+      )
+
+    directory = os.path.dirname(os.path.abspath(self.path))
+    with NamedTemporaryFile('wb', dir=directory, delete=False) as file:
+      try:
+        pickle.dump(checkpoint, file, pickle.HIGHEST_PROTOCOL)
+        file.flush()
+        os.fsync(file.fileno())
+      except BaseException:
+        file.close()
+        os.remove(file.name)
+        raise
+
+    os.replace(file.name, self.path)
+    self.saved = self.passed
+
+  def resume(self, path=None):
+    '''
+    Makes the next run continue from the checkpoint at path.
+    If there is no checkpoint file the next run starts from the beginning.
+
+    path - checkpoint file, defaults to the file this checkpoint writes to
+    '''
+    self.resume_from = read_checkpoint(self.path if path is None else path)
+
+  def skip(self):
+    '''
+    Moves past the input that was processed before the checkpoint being resumed.
+    '''
+    checkpoint = self.resume_from
+    self.resume_from = None
+
+    if checkpoint['passed'] and self.valve and self.state is None:
+      # keep the source open so the pipe can be run again from the beginning
+      self.reservoir.empty()
+      raise ValueError('the valve after the checkpoint does not keep its state in the '
+                       'checkpoints, resuming would leave out the first {} objects'.format(
+                           checkpoint['passed']))
+
+    if checkpoint['offset'] is None or not self.reservoir.seek(checkpoint['offset']):
+      # the objects are recomputed up to here but do not reach the valve again
+      consume(self.iterable, checkpoint['passed'])
+
+    self.passed = self.saved = checkpoint['passed']
+
+  def close(self):
+    '''
+    Forgets the count and closes the iterable.
+    '''
+    self.reset()
+    close_iter(self.iterable)
+
+
+def read_checkpoint(path):
+  '''
+  Returns the dict saved in the checkpoint file at path, or None if there is no file.
+  Its keys are offset (the reservoir position or None), passed (the number of
+  objects that passed the checkpoint) and state (the valve state or None).
+  '''
+  try:
+    with open(path, 'rb') as file:
+      return pickle.load(file)
+  except FileNotFoundError:
+    return None
+
+
+def checkpointed(iterable, state):
+  '''
+  Used by valves to save their state with the checkpoints of the pipe.
+  Returns the state to continue from: the saved state when the pipe is resuming,
+  else state.
+
+  iterable - the Spout passed into the valve
+  state - picklable object that the valve updates in place
+  '''
+  checkpoint = getattr(iterable, 'checkpoint', None)
+  return state if checkpoint is None else checkpoint.keep(state)
+
+
+def fold(iterable, function, initial):
+  '''
+  functools.reduce that saves its running value with the checkpoints of the pipe.
+  Runs reduce in C when there is no checkpoint.
+
+  function - takes the running value and an object and returns the new running value
+  initial - the starting running value
+  '''
+  if getattr(iterable, 'checkpoint', None) is None:
+    return reduce(function, iterable, initial)
+
+  value = checkpointed(iterable, [initial])
+  for obj in iterable:
+    value[0] = function(value[0], obj)
+  return value[0]
@@ -0,0 +1,12 @@
+def close_iter(iterator):
+  '''
+  Calls the close method of iterator if it has one.
+  Generators, files, sockets and the pipe segment classes all have a close method
+  that releases what they hold. Iterators without one (map, filter, tuple iterators)
+  are left alone.
+
+  iterator - any object
+  '''
+  close = getattr(iterator, 'close', None)
+  if close is not None:
+    close()
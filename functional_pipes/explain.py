@@ -0,0 +1,295 @@
+'''
+Text rendering of the segments of a pipe, used by Pipe.explain.
+
+Each row is one segment, indented inside bypasses, with the flags:
+valve - the segment consumes the pipe and returns a value
+star / double star - the objects are unpacked into the segment's function
+keeps length - one object out for each object in
+fusable - handles each object on its own, so it can be fused with its neighbours
+vectorizable - runs in C for each object, or works on whole numpy blocks
+parallel - safe to run on several workers, the same as fusable outside a valve
+
+A sample run adds the number of objects in and out of each segment and the time
+spent in the segment for each object that went in.
+'''
+from time import perf_counter
+from types import FunctionType, MethodType
+
+from functional_pipes.blueprint import apply_step
+from functional_pipes.bypass import Bypass, Drip
+from functional_pipes.close_iter import close_iter
+
+
+class Probe:
+  '''
+  Iterator that counts the objects drawn through it and the time spent drawing
+  them, including the time spent in the segments before it.
+  '''
+  __slots__ = ('iterable', 'count', 'time')
+
+  def __init__(self, iterable):
+    self.iterable = iterable
+    self.count = 0
+    self.time = 0.
+
+  def __iter__(self):
+    return self
+
+  def __next__(self):
+    start = perf_counter()
+    try:
+      obj = next(self.iterable)
+    finally:
+      self.time += perf_counter() - start
+
+    self.count += 1
+    return obj
+
+  def close(self):
+    close_iter(self.iterable)
+
+
+def explain(pipe, sample=None):
+  '''
+  Returns the table of pipe's segments described in the module docstring.
+
+  pipe - the Pipe to explain
+  sample - optional iterable that a copy of the pipe, rebuilt from its blueprint,
+    is run on to measure each segment
+  '''
+  segments = list(pipe.segments())
+  segments.reverse()
+
+  stats = iter(_sample_run(pipe, sample)) if sample is not None else None
+  pending = None
+
+  rows = [('', 'segment', 'flags', 'in', 'out', 'time/obj')]
+  for index, segment in enumerate(segments):
+    measured = ('', '', '')
+    if stats is not None:
+      if segment.step is not None:
+        pending = next(stats)
+      if index + 1 == len(segments) or segments[index + 1].step is not None:
+        # the step of a single segment bypass is measured where the bypass closes
+        measured, pending = pending or measured, None
+
+    rows.append((
+        str(index),
+        '  ' * _depth(segment) + label(segment),
+        ', '.join(_flags(segment)),
+      ) + measured)
+
+  widths = [max(map(len, column)) for column in zip(*rows)]
+  return '\n'.join(
+      '  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+      for row in rows
+    )
+
+
+def _depth(segment):
+  '''
+  Number of bypasses the segment is inside of. The segment that opens a bypass is
+  drawn at the depth of the pipe it was opened on.
+  '''
+  function_pipe = segment.function_pipe
+  if isinstance(function_pipe, Probe):
+    function_pipe = function_pipe.iterable
+  depth = -1 if isinstance(function_pipe, Drip) else 0
+
+  pipe = segment.enclosing_pipe
+  while pipe is not None:
+    depth += 1
+    pipe = pipe.enclosing_pipe
+
+  return depth
+
+
+def label(segment):
+  '''
+  Short text for the step that made segment.
+  '''
+  step = segment.step
+
+  if step is None:
+    if isinstance(segment.function_pipe, Bypass):
+      return 'close bypass'
+    return 'reservoir'
+
+  if step.kind == 'attr':
+    return step.name
+  if step.kind == 'item':
+    return '{}[{!r}]'.format(step.name, step.args[0])
+
+  args = [_short_repr(arg) for arg in step.args]
+  args.extend('{}={}'.format(key, _short_repr(value)) for key, value in (step.kargs or {}).items())
+  return '{}({})'.format(step.name, ', '.join(args))
+
+
+def _short_repr(obj):
+  name = getattr(obj, '__name__', None)
+  if callable(obj) and name:
+    return name
+
+  text = repr(obj)
+  return text if len(text) <= 20 else text[:17] + '...'
+
+
+def _flags(segment):
+  step = segment.step
+  function_pipe = segment.function_pipe
+
+  if isinstance(function_pipe, Drip):
+    return ['bypass open']
+  if isinstance(function_pipe, Bypass):
+    return ['bypass close']
+  if step is None:
+    return []
+
+  flags = []
+  info = segment.__class__.method_info.get(step.name)
+
+  if segment.valve:
+    flags.append('valve')
+
+  if info is not None:
+    if _wrapped(step, info, info.star_wrap):
+      flags.append('star')
+    if _wrapped(step, info, info.double_star_wrap):
+      flags.append('double star')
+
+  if segment.keeps_length:
+    flags.append('keeps length')
+
+  per_object = info is not None and info.per_object
+  if per_object:
+    flags.append('fusable')
+  if _vectorizable(segment):
+    flags.append('vectorizable')
+  if per_object and not segment.valve:
+    flags.append('parallel')
+
+  return flags
+
+
+def _wrapped(step, info, wrap_val):
+  '''
+  True if the argument at wrap_val was given a function that the objects are
+  unpacked into.
+  '''
+  # imported here because pipe.py imports this module
+  from functional_pipes.pipe import _takes_many
+
+  if wrap_val is True:
+    # map methods unpack every object
+    return True
+
+  if isinstance(wrap_val, int):
+    index = wrap_val if wrap_val < info.iter_index else wrap_val - 1
+    return index < len(step.args) and _takes_many(step.args[index])
+
+  if isinstance(wrap_val, str):
+    kargs = step.kargs or {}
+    return wrap_val in kargs and _takes_many(kargs[wrap_val])
+
+  return False
+
+
+def _vectorizable(segment):
+  '''
+  True if the segment is a C iterator calling C functions, or a numpy_pipes method.
+  '''
+  step = segment.step
+  if step.name in segment.__class__.added_methods.get('numpy_pipes', ()):
+    return True
+
+  if segment.valve or type(segment.function_pipe).__module__ not in ('builtins', 'itertools'):
+    return False
+
+  arguments = list(step.args) + list((step.kargs or {}).values())
+  return not any(isinstance(arg, (FunctionType, MethodType)) for arg in arguments)
+
+
+def _sample_run(pipe, sample):
+  '''
+  Rebuilds pipe from its blueprint with a Probe after each step, runs it on
+  sample and returns (in, out, time/obj) strings for each step.
+  '''
+  probed = build_probed(pipe, lambda built: Probe(built.function_pipe))
+  built = probed[-1]
+
+  start = perf_counter()
+  result = built(sample)
+  if not built.valve:
+    for _ in result:
+      pass
+  total = perf_counter() - start
+
+  stats = []
+  for built in probed[1:]:
+    inputs = [_probe_of(source) for source in _inputs(built)]
+    inputs = [probe for probe in inputs if probe is not None]
+    count_in = inputs[0].count if inputs else None
+
+    if built.valve:
+      count_out, inclusive = 1, total
+    else:
+      count_out, inclusive = built.function_pipe.count, built.function_pipe.time
+
+    if isinstance(built.function_pipe, Probe) and isinstance(built.function_pipe.iterable, Drip):
+      # the time of the pipe feeding a bypass is counted where the bypass closes
+      own = inclusive
+    else:
+      own = inclusive - sum(probe.time for probe in inputs)
+
+    stats.append((
+        '' if count_in is None else str(count_in),
+        str(count_out),
+        '{:.2f} us'.format(1e6 * max(own, 0.) / count_in) if count_in else '',
+      ))
+
+  return stats
+
+
+def build_probed(pipe, make_probe):
+  '''
+  Rebuilds pipe from its blueprint and puts make_probe(built pipe) in place of the
+  iterator of the empty pipe and of the pipe made by each step, except for valves.
+  Returns the list of the empty pipe and the pipes made by each step.
+  '''
+  built = pipe.__class__()
+  built.function_pipe = make_probe(built)
+  probed = [built]
+
+  for step in pipe.blueprint().steps:
+    built = apply_step(built, step)
+    if not built.valve:
+      built.function_pipe = make_probe(built)
+    probed.append(built)
+
+  # rebuilding an optimized pipe on the first call would drop the probes
+  built.optimized = True
+  return probed
+
+
+def _probe_of(pipe):
+  '''
+  The Probe of the nearest probed pipe at or upstream of pipe.
+  '''
+  while pipe is not None:
+    if isinstance(pipe.function_pipe, Probe):
+      return pipe.function_pipe
+    pipe = pipe.upstream_pipe
+  return None
+
+
+def _inputs(pipe):
+  '''
+  The pipes whose objects flow straight into pipe, the main input first.
+  '''
+  if isinstance(pipe.function_pipe, Probe) and isinstance(pipe.function_pipe.iterable, Bypass):
+    opener = pipe.upstream_pipe
+    while opener.upstream_pipe is not None:
+      opener = opener.upstream_pipe
+    return [opener.enclosing_pipe, pipe.upstream_pipe]
+
+  return [pipe.upstream_pipe]
@@ -0,0 +1,158 @@
+'''
+Memory use of each segment of a pipe, measured with tracemalloc. Used by
+Pipe.memory_profile.
+
+A copy of the pipe, rebuilt from its blueprint, is run on a sample with a probe
+after each segment that reads the traced memory before and after the segment
+makes each object, and around the valve's whole run.
+
+peak - highest rise in traced memory while the segment, and the segments feeding
+  it, made one object. For the valve, the highest rise during the whole run.
+retained - bytes the segment's own work left allocated, summed over its objects.
+  The objects a segment gives are counted in it until the segment after it drops
+  them, so a segment that drops objects (a filter) can retain less than nothing.
+  The ints the probes keep the readings in are traced too, which adds up to about
+  a hundred bytes per object to each segment, so only large numbers stand out.
+
+The allocation sites are the lines that allocated the most memory still held
+when the run ended (the valve's result, caches, state kept between objects).
+Memory freed before the end of the run only shows in the peak column.
+'''
+import tracemalloc
+
+from functional_pipes.bypass import Drip
+from functional_pipes.explain import Probe, _depth, _inputs, _probe_of, build_probed, label
+
+
+class MemoryProbe(Probe):
+  '''
+  Iterator that tracks the traced memory used to draw each object through it.
+  Probes are nested when segments draw from each other, so the probes of one pipe
+  share a stack of the peaks seen by the probes that are drawing.
+  '''
+  __slots__ = ('stack', 'peak', 'retained')
+
+  def __init__(self, iterable, stack):
+    super().__init__(iterable)
+    self.stack = stack
+    self.peak = 0
+    self.retained = 0
+
+  def __next__(self):
+    stack = self.stack
+    before, peak = tracemalloc.get_traced_memory()
+    if stack:
+      # the peak is reset below so pass on the one seen so far to the drawing probe
+      stack[-1] = max(stack[-1], peak)
+    tracemalloc.reset_peak()
+
+    stack.append(before)
+    try:
+      obj = next(self.iterable)
+    finally:
+      after, peak = tracemalloc.get_traced_memory()
+      peak = max(stack.pop(), peak)
+      if stack:
+        stack[-1] = max(stack[-1], peak)
+
+      self.peak = max(self.peak, peak - before)
+
+    # a Drip raised in a bypass is freed where it is caught, so only count draws
+    # that return
+    self.retained += after - before
+    self.count += 1
+    return obj
+
+
+def memory_profile(pipe, sample, sites=5):
+  '''
+  Returns the table of the memory used by each segment of pipe and the largest
+  allocation sites, described in the module docstring.
+
+  pipe - the Pipe to profile
+  sample - iterable that a copy of the pipe is run on
+  sites - number of allocation sites to list
+  '''
+  stack = []
+  probed = build_probed(pipe, lambda built: MemoryProbe(built.function_pipe, stack))
+  built = probed[-1]
+
+  started = not tracemalloc.is_tracing()
+  if started:
+    tracemalloc.start()
+
+  try:
+    first = tracemalloc.take_snapshot()
+
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+
+    result = built(sample)
+    if not built.valve:
+      for _ in result:
+        pass
+
+    after, peak = tracemalloc.get_traced_memory()
+    last = tracemalloc.take_snapshot()
+  finally:
+    if started:
+      tracemalloc.stop()
+
+  excluded = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+  first, last = first.filter_traces(excluded), last.filter_traces(excluded)
+
+  run_peak, run_retained = max(peak, before) - before, after - before
+
+  rows = [('', 'segment', 'in', 'out', 'peak', 'retained')]
+  for index, built in enumerate(probed):
+    inputs = [_probe_of(source) for source in _inputs(built)] if index else []
+    inputs = [probe for probe in inputs if probe is not None]
+
+    if built.valve:
+      count_out, peak, retained = 1, run_peak, run_retained
+    else:
+      probe = built.function_pipe
+      count_out, peak, retained = probe.count, probe.peak, probe.retained
+
+    if built.valve or not isinstance(built.function_pipe.iterable, Drip):
+      # the memory of the pipe feeding a bypass is counted where the bypass closes
+      retained -= sum(probe.retained for probe in inputs)
+
+    # a single segment bypass is closed by a pipe without a step, show the segment
+    shown = built if index == 0 or built.step is not None else built.upstream_pipe
+    rows.append((
+        str(index),
+        '  ' * _depth(shown) + label(shown),
+        str(inputs[0].count) if inputs else '',
+        str(count_out),
+        _size(peak),
+        _size(retained),
+      ))
+
+  widths = [max(map(len, column)) for column in zip(*rows)]
+  lines = [
+      '  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+      for row in rows
+    ]
+
+  lines.append('')
+  lines.append('largest allocation sites still held after the run:')
+  for stat in last.compare_to(first, 'lineno')[:sites]:
+    if stat.size_diff <= 0:
+      break
+    frame = stat.traceback[0]
+    lines.append('  {}:{}  {}  {} blocks'.format(
+        frame.filename, frame.lineno, _size(stat.size_diff), stat.count_diff))
+
+  return '\n'.join(lines)
+
+
+def _size(size):
+  '''
+  Bytes as short text, 1536 -> '1.5 KiB'.
+  '''
+  for unit in ('B', 'KiB', 'MiB'):
+    if abs(size) < 1024:
+      return '{} {}'.format(size, unit) if unit == 'B' else '{:.1f} {}'.format(size, unit)
+    size /= 1024
+  return '{:.1f} GiB'.format(size)
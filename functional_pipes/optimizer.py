@@ -0,0 +1,310 @@
+'''
+Rule based rewriting of the steps in a pipe's Blueprint.
+
+Each rule takes a tuple of Step and returns a tuple of Step that builds a pipe
+with the same output. The rules are applied until none of them changes the steps.
+
+Default rules
+single_bypass_to_map - keyed.map(f), dict_key[k].map(f) and dict_key[[k1, k2]].map(f)
+  become one map, so the objects do not go through the Bypass and Drip machinery
+sorted_take_to_top_k - sorted(...).take(n) becomes top_k(n, ...), which keeps n
+  objects in a heap instead of sorting everything
+drop_round_trips - tuple_e or list_e followed by list_e, tuple_e, set_e,
+  frozenset_e or sorted_e drops the first copy
+
+Fusion rules, not in the default rules
+fuse_maps - adjacent maps become one map calling each function in turn
+fuse_filters - adjacent filters become one filter testing each predicate in turn
+  In CPython map and filter hop between segments in C, so the Python function
+  that calls the fused functions costs more than the hop it saves (about 20 %
+  slower for two lambdas). They are kept for interpreters where that is not so.
+'''
+from functional_pipes.blueprint import Step
+from functional_pipes.bypass_methods import _dict_values_getter, _plain_key, _set_dict_values
+
+
+# callables put in place of bypasses and fused segments, picklable for blueprints
+
+class _unpacking:
+  '''
+  Base for callables that call function with the object, unpacked if star.
+  '''
+  __slots__ = ('function', 'star')
+
+  def __init__(self, function, star):
+    self.function = function
+    self.star = star
+
+  def apply(self, obj):
+    return self.function(*obj) if self.star else self.function(obj)
+
+  def __eq__(self, other):
+    return type(self) is type(other) and self.__getstate__() == other.__getstate__()
+
+  def __getstate__(self):
+    return self.function, self.star
+
+  def __setstate__(self, state):
+    self.function, self.star = state
+
+  def __repr__(self):
+    return '{}({})'.format(type(self).__name__, getattr(self.function, '__name__', self.function))
+
+
+class keyed_map(_unpacking):
+  '''
+  keyed.map(function) as a map function: obj -> (obj, function(obj))
+  '''
+  __slots__ = ()
+
+  def __call__(self, obj):
+    return obj, self.apply(obj)
+
+
+class dict_key_map(_unpacking):
+  '''
+  dict_key[key].map(function) as a map function that replaces dictionary[key]
+  with function(dictionary[key]) and returns the dictionary.
+  '''
+  __slots__ = ('key',)
+
+  def __init__(self, key, function, star):
+    self.key = key
+    super().__init__(function, star)
+
+  def __call__(self, dictionary):
+    value = dictionary[self.key]
+    dictionary[self.key] = self.function(*value) if self.star else self.function(value)
+    return dictionary
+
+  def __getstate__(self):
+    return self.function, self.star, self.key
+
+  def __setstate__(self, state):
+    self.function, self.star, self.key = state
+
+
+class dict_keys_map(dict_key_map):
+  '''
+  dict_key[[k1, k2]].map(function) as a map function that replaces the values of
+  the keys with the tuple returned by function(tuple of the values).
+  '''
+  __slots__ = ('values_of',)
+
+  def __init__(self, keys, function, star):
+    super().__init__(keys, function, star)
+    self.values_of = _dict_values_getter(tuple(keys))
+
+  def __call__(self, dictionary):
+    values = self.values_of(dictionary)
+    _set_dict_values(
+        dictionary, self.key, self.function(*values) if self.star else self.function(values))
+    return dictionary
+
+  def __setstate__(self, state):
+    super().__setstate__(state)
+    self.values_of = _dict_values_getter(tuple(self.key))
+
+
+class fused_map(_unpacking):
+  '''
+  Calls each function in turn on the result of the one before.
+  function is a tuple of (function, star) pairs.
+  '''
+  __slots__ = ()
+
+  def __init__(self, functions):
+    super().__init__(tuple(functions), False)
+
+  def __call__(self, obj):
+    for function, star in self.function:
+      obj = function(*obj) if star else function(obj)
+    return obj
+
+  def __repr__(self):
+    return 'fused_map({})'.format(len(self.function))
+
+
+class fused_filter(fused_map):
+  '''
+  True if every predicate is true, testing them in turn.
+  '''
+  __slots__ = ()
+
+  def __call__(self, obj):
+    for predicate, star in self.function:
+      if not (predicate(*obj) if star else predicate(obj)):
+        return False
+    return True
+
+  def __repr__(self):
+    return 'fused_filter({})'.format(len(self.function))
+
+
+def _function_arg(step, name):
+  '''
+  Returns (function, star) if step is a call of name with only a function,
+  else None. star is True if the pipe would unpack the objects into it.
+  '''
+  # imported here because pipe.py imports this module
+  from functional_pipes.pipe import _takes_many
+
+  if step.kind != 'call' or step.name != name or len(step.args) != 1 or step.kargs:
+    return None
+
+  function = step.args[0]
+  if function is None:
+    return None
+
+  return function, _takes_many(function)
+
+
+def _opens_single_bypass(step):
+  '''
+  True if step opens a bypass that is closed by the step after it.
+  '''
+  from functional_pipes.pipe import Pipe
+  return step is not None and step.kind in ('attr', 'item') and \
+      step.name in Pipe.bypass_info and Pipe.bypass_info[step.name] is None
+
+
+def _in_single_bypass(steps, index):
+  '''
+  True if steps[index] is in a bypass that is closed by the step after it, the
+  bypass being opened by the step before it or before the parallel in front of it.
+  '''
+  index -= 1
+  if index >= 0 and steps[index].name == 'parallel':
+    index -= 1
+  return index >= 0 and _opens_single_bypass(steps[index])
+
+
+def single_bypass_to_map(steps):
+  '''
+  keyed.map(f) -> map(keyed_map(f)) and dict_key[k].map(f) -> map(dict_key_map(k, f))
+  '''
+  steps = list(steps)
+
+  for index in range(len(steps) - 1):
+    opener = steps[index]
+    mapped = _function_arg(steps[index + 1], 'map')
+    if mapped is None or _in_single_bypass(steps, index):
+      continue
+
+    if opener == Step('attr', 'keyed'):
+      function = keyed_map(*mapped)
+    elif opener.kind == 'item' and opener.name == 'dict_key':
+      key = _plain_key(opener.args[0])
+      function = (dict_keys_map if isinstance(key, list) else dict_key_map)(key, *mapped)
+    else:
+      continue
+
+    steps[index:index + 2] = [Step('call', 'map', (function,), {})]
+    return tuple(steps)
+
+  return tuple(steps)
+
+
+def sorted_take_to_top_k(steps):
+  '''
+  sorted(key=k, reverse=r).take(n) -> top_k(n, key=k, reverse=r)
+  '''
+  from functional_pipes.pipe import Pipe
+  if not hasattr(Pipe, 'top_k'):
+    return tuple(steps)
+
+  steps = list(steps)
+  for index in range(len(steps) - 1):
+    first, second = steps[index], steps[index + 1]
+    if first.kind != 'call' or first.name != 'sorted' or first.args or \
+        second.kind != 'call' or second.name != 'take' or \
+        _in_single_bypass(steps, index):
+      continue
+
+    take_kargs = dict(second.kargs or {})
+    if len(second.args) + len(take_kargs) != 1:
+      continue
+    n = second.args[0] if second.args else take_kargs['n']
+
+    steps[index:index + 2] = [Step('call', 'top_k', (n,), dict(first.kargs or {}))]
+    return tuple(steps)
+
+  return tuple(steps)
+
+
+_copies = frozenset(('tuple_e', 'list_e'))
+_copy_consumers = frozenset(('tuple_e', 'list_e', 'set_e', 'frozenset_e', 'sorted_e'))
+
+
+def drop_round_trips(steps):
+  '''
+  tuple_e().list_e() -> list_e()
+  '''
+  steps = list(steps)
+  for index in range(len(steps) - 1):
+    first, second = steps[index], steps[index + 1]
+    if first.kind == second.kind == 'call' and not first.args and not first.kargs and \
+        first.name in _copies and second.name in _copy_consumers and \
+        not _in_single_bypass(steps, index):
+      del steps[index]
+      return tuple(steps)
+
+  return tuple(steps)
+
+
+def _fuse(steps, name, fused_class):
+  steps = list(steps)
+  for index in range(len(steps) - 1):
+    if _in_single_bypass(steps, index):
+      continue
+
+    first = _function_arg(steps[index], name)
+    second = _function_arg(steps[index + 1], name)
+    if first is None or second is None:
+      continue
+
+    functions = []
+    for function, star in (first, second):
+      if type(function) is fused_class:
+        functions.extend(function.function)
+      else:
+        functions.append((function, star))
+
+    steps[index:index + 2] = [Step('call', name, (fused_class(functions),), {})]
+    return tuple(steps)
+
+  return tuple(steps)
+
+
+def fuse_maps(steps):
+  '''
+  map(f).map(g) -> map(fused_map(f, g))
+  '''
+  return _fuse(steps, 'map', fused_map)
+
+
+def fuse_filters(steps):
+  '''
+  filter(p).filter(q) -> filter(fused_filter(p, q))
+  '''
+  return _fuse(steps, 'filter', fused_filter)
+
+
+DEFAULT_RULES = (single_bypass_to_map, sorted_take_to_top_k, drop_round_trips)
+FUSION_RULES = (fuse_maps, fuse_filters)
+
+
+def optimize_steps(steps, rules=DEFAULT_RULES):
+  '''
+  Applies rules to steps until none of them changes the steps.
+  Returns the new tuple of steps.
+  '''
+  steps = tuple(steps)
+  while True:
+    optimized = steps
+    for rule in rules:
+      optimized = rule(optimized)
+
+    if optimized == steps:
+      return steps
+    steps = optimized
@@ -0,0 +1,173 @@
+'''
+Runs the segments of a bypass on a pool of threads or processes. Used by
+Pipe.parallel.
+
+The segments between Pipe.parallel and the closing of the bypass are rebuilt
+from their blueprint in each worker. The main thread splits the objects, sends
+the bypassed values to the workers in chunks and keeps the carried values in a
+buffer until the results of their chunk come back. The results are merged in
+the order the objects came in, or as the chunks finish if ordered is False.
+
+Each value is put through the worker's pipe on its own, so a segment that drops
+a value drops its carried value and a segment that gives several objects for a
+value gives the carried value to each, as in a bypass that is not parallel. Only
+segments that handle each object on their own (MethodInfo.per_object) can be run
+this way.
+
+Example:
+>>> Pipe().carry_key.parallel(workers=8).map(fetch).re_key.list()(urls)
+'''
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import partial
+from itertools import islice
+
+from functional_pipes.blueprint import Blueprint, init_worker, run_worker_each
+from functional_pipes.bypass import Bypass
+from functional_pipes.close_iter import close_iter
+
+
+class ParallelBypass(Bypass):
+  '''
+  Use to carry values around pipe segments that run on a pool of workers.
+  The pool is started on the first object. A reusable pipe keeps it for its next
+  runs until the pipe is closed, a preloaded pipe shuts it down when the objects
+  run out.
+  '''
+  __slots__ = (
+      'blueprint', 'workers', 'processes', 'ordered', 'chunk_size', 'reusable', 'pool', 'results',
+    )
+
+  def __init__(self, bypass, iterable, drip_handle, split, merge,
+        workers=None, processes=False, ordered=True, chunk_size=1):
+    '''
+    bypass, iterable, drip_handle, split, merge - as in Bypass
+    workers, processes, ordered, chunk_size - as in Pipe.parallel
+    '''
+    super().__init__(bypass, iterable, drip_handle, split, merge)
+
+    self.blueprint = _bypass_blueprint(bypass, drip_handle)
+    self.workers = workers or os.cpu_count() or 1
+    self.processes = processes
+    self.ordered = ordered
+    self.chunk_size = chunk_size
+    self.reusable = not any(segment.preloaded for segment in bypass.segments())
+    self.pool = None
+    self.results = None
+
+  def __next__(self):
+    if self.results is None:
+      self.results = self.merged()
+
+    try:
+      return next(self.results)
+    except StopIteration:
+      self.results = None
+      if not self.reusable:
+        self.shutdown()
+      raise
+
+  def merged(self):
+    '''
+    Generator of the merged objects of one run.
+    At most two chunks for each worker are sent before waiting for results.
+    '''
+    if self.pool is None:
+      self.pool = self.start_pool()
+
+    pool, run = self.pool
+    iterable, split, merge = self.iterable, self.split, self.merge
+    limit = 2 * self.workers
+
+    # future -> carried values of its chunk, in the order the chunks were sent
+    waiting = {}
+    try:
+      while True:
+        chunk = list(islice(iterable, self.chunk_size))
+        if chunk:
+          carried, values = zip(*map(split, chunk))
+          waiting[pool.submit(run, values)] = carried
+          if len(waiting) < limit:
+            continue
+        elif not waiting:
+          return
+
+        if self.ordered:
+          done = (next(iter(waiting)),)
+        else:
+          done, _ = wait(waiting, return_when=FIRST_COMPLETED)
+
+        for future in done:
+          carried = waiting.pop(future)
+          for store, objects in zip(carried, future.result()):
+            for obj in objects:
+              yield merge(store, obj)
+
+    finally:
+      for future in waiting:
+        future.cancel()
+
+  def start_pool(self):
+    '''
+    Returns (executor, function that runs a chunk of values in a worker).
+    '''
+    if self.processes:
+      pool = ProcessPoolExecutor(
+          self.workers, initializer=init_worker, initargs=(self.blueprint.dumps(),))
+      return pool, run_worker_each
+
+    return ThreadPoolExecutor(self.workers), partial(_run_each, _ThreadPipe(self.blueprint))
+
+  def close(self):
+    '''
+    Drops the carried values waiting for results, shuts the pool down and closes
+    the iterable feeding the bypass.
+    '''
+    close_iter(self.results)
+    self.results = None
+    self.shutdown()
+    super().close()
+
+  def shutdown(self):
+    '''
+    Shuts the pool down if it was started.
+    '''
+    if self.pool is not None:
+      self.pool[0].shutdown()
+      self.pool = None
+
+
+class _ThreadPipe(threading.local):
+  '''
+  The pipe each worker thread builds from the blueprint the first time it runs.
+  '''
+  def __init__(self, blueprint):
+    self.pipe = blueprint.build()
+
+
+def _run_each(thread_pipe, values):
+  pipe = thread_pipe.pipe
+  return [list(pipe((value,))) for value in values]
+
+
+def _bypass_blueprint(bypass, drip_handle):
+  '''
+  Returns the Blueprint of the segments from drip_handle to the end of the bypass
+  pipe. Raises ValueError if one of them does not handle each object on its own.
+  '''
+  pipe_class = bypass.__class__
+
+  steps = []
+  pipe = bypass
+  while pipe.function_pipe is not drip_handle:
+    step = pipe.step
+    if step is not None:
+      info = pipe_class.method_info.get(step.name)
+      if info is not None and not info.per_object:
+        raise ValueError('{} keeps state between objects so it cannot run in parallel'.format(step.name))
+      steps.append(step)
+    pipe = pipe.upstream_pipe if pipe.upstream_pipe is not None else pipe.enclosing_pipe
+
+  steps.reverse()
+  return Blueprint(steps, pipe_class.added_methods)
@@ -1,24 +1,50 @@
-from collections import ChainMap, defaultdict
-from inspect import signature
+from collections import ChainMap, defaultdict, namedtuple
+from functools import partial
+from inspect import Parameter, signature
 from importlib import import_module
+from itertools import chain, repeat, starmap
+from operator import length_hint
+import sys
 
 
-from more_itertools import peekable, consume
+from more_itertools import consume
 
-from functional_pipes.bypass import Bypass, Drip, close_bypass_default
+from functional_pipes.bypass import Bypass, BypassProperties, Drip, close_bypass_default
+from functional_pipes.blueprint import Blueprint, Step
 from functional_pipes.bypass_methods import add_bypasses
-from functional_pipes.more_collections import dotdict
+from functional_pipes.checkpoint import Checkpoint
+from functional_pipes.close_iter import close_iter
+from functional_pipes.explain import explain as explain_pipe
+from functional_pipes.memory import memory_profile as memory_profile_pipe
+from functional_pipes.optimizer import DEFAULT_RULES, optimize_steps
+from functional_pipes.parallel import ParallelBypass
 
 
 
 class Pipe:
+  __slots__ = (
+      'preloaded',
+      'reservoir',
+      'function_pipe',
+      'valve',
+      'enclosing_pipe',
+      'bypass_properties',
+      'upstream_pipe',
+      'keeps_length',
+      'step',
+      'optimized',
+    )
+
   def __init__(self,
         iterable_pre_load = None,
         function_pipe = None,
         reservoir = None,
         valve = False,
         enclosing_pipe = None,
-        bypass_properties = None
+        bypass_properties = None,
+        upstream_pipe = None,
+        keeps_length = True,
+        step = None,
       ):
     # True if an iterable is data is preloaded into the pipe
     # https://github.com/BebeSparkelSparkel/functional_pipes/issues/9
@@ -42,7 +68,29 @@ class Pipe:
     '''
     self.bypass_properties = bypass_properties
 
+    # the pipe segment that this pipe was extended from
+    self.upstream_pipe = upstream_pipe
+
+    # True if this segment passes out one object for each object passed in
+    self.keeps_length = keeps_length
+
+    # the Step that made this segment, None if it is not replayed by a Blueprint
+    self.step = step
+
+    # True once the first call has tried to optimize the pipe
+    self.optimized = False
+
   def __call__(self, iterable):
+    if _is_async(iterable):
+      # imported here so asyncio is only imported by programs that use it
+      from functional_pipes.async_reservoir import run_async
+      return run_async(self, iterable)
+
+    if not self.optimized:
+      self.optimized = True
+      if Pipe.optimize_pipes:
+        self._adopt(self.optimize())
+
     self.reservoir(iterable)
     if self.valve:
       return self.function_pipe.whole_return()
@@ -50,11 +98,259 @@ class Pipe:
     return self
 
   def __iter__(self):
-    return self
+    '''
+    Iterates over the pipe.
+    If the loop is left before the pipe is drained (break, an exception, or the
+    iterator being dropped) the pipe is closed so its source is released right away.
+    Use next(pipe) to read part of the objects and leave the rest in the pipe.
+    '''
+    try:
+      yield from self.function_pipe
+    except GeneratorExit:
+      self.close()
+      raise
 
   def __next__(self):
     return next(self.function_pipe)
 
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  def segments(self):
+    '''
+    Yields this pipe and then each pipe segment it was extended from, back to the
+    segment that holds the reservoir.
+    The start of a bypass is followed by the pipe the bypass was opened on.
+    '''
+    pipe = self
+    while pipe is not None:
+      yield pipe
+      pipe = pipe.upstream_pipe if pipe.upstream_pipe is not None else pipe.enclosing_pipe
+
+  def __length_hint__(self):
+    '''
+    The number of objects left in the pipe if the reservoir is sized and every
+    segment keeps the length, else NotImplemented.
+    Lets list, tuple and the other valves preallocate.
+    '''
+    source = self.source_segment()
+    if source is None:
+      return NotImplemented
+
+    size = length_hint(source.function_pipe, -1)
+    return size if size >= 0 else NotImplemented
+
+  def source_segment(self):
+    '''
+    Returns the segment that feeds this pipe, following closed bypasses back to
+    the pipe they were opened on, if every segment on the way keeps the length.
+    Returns None if a segment changes the length or the pipe is inside an open bypass.
+    '''
+    pipe = self
+    open_bypasses = 0
+
+    while True:
+      if not pipe.keeps_length:
+        return None
+
+      if isinstance(pipe.function_pipe, Bypass):
+        open_bypasses += 1
+
+      if pipe.upstream_pipe is not None:
+        pipe = pipe.upstream_pipe
+
+      elif pipe.enclosing_pipe is not None and open_bypasses:
+        open_bypasses -= 1
+        pipe = pipe.enclosing_pipe
+
+      elif pipe.enclosing_pipe is not None:
+        return None
+
+      else:
+        return pipe
+
+  def close(self):
+    '''
+    Releases everything the pipe is holding.
+    close is called on every segment's iterator (Valve, Bypass, wrap_gener wrappers,
+    generators) and on the reservoir, which closes the loaded source if it has a
+    close method (generators, files, sockets).
+    The pipe stays usable and can be refilled afterwards.
+    '''
+    for segment in self.segments():
+      close_iter(segment.function_pipe)
+    close_iter(self.reservoir)
+
+  def blueprint(self):
+    '''
+    Returns a picklable Blueprint that builds a new reusable pipe like this one.
+    Methods added with Pipe.add_method outside of an add-in must also be added in
+    the process that builds the blueprint.
+    '''
+    steps = [segment.step for segment in self.segments() if segment.step is not None]
+    steps.reverse()
+    return Blueprint(steps, Pipe.added_methods)
+
+  def optimize(self, rules=DEFAULT_RULES):
+    '''
+    Returns a new reusable pipe built from this pipe's blueprint after the rules
+    in functional_pipes.optimizer rewrote it, or self if nothing was rewritten or
+    the pipe cannot be rebuilt (a preloaded pipe, an open bypass, a checkpoint or a
+    segment made without a method).
+    Reusable pipes are optimized with the default rules when they are first called,
+    unless Pipe.optimize_pipes is False.
+
+    rules - functions that rewrite a tuple of Step
+    '''
+    if not self._rebuildable():
+      return self
+
+    blueprint = self.blueprint()
+    steps = optimize_steps(blueprint.steps, rules)
+    if steps == blueprint.steps:
+      return self
+
+    return Blueprint(steps, blueprint.add_ins).build()
+
+  def _rebuildable(self):
+    if self.preloaded or self.__class__ is not Pipe:
+      return False
+
+    for segment in self.segments():
+      if isinstance(segment.function_pipe, Checkpoint):
+        return False
+      if segment.step is None and segment.function_pipe is not segment.reservoir and \
+          not isinstance(segment.function_pipe, Bypass):
+        return False
+
+    return self.enclosing_pipe is None
+
+  def _adopt(self, other):
+    '''
+    Makes this pipe the last segment of other.
+    '''
+    if other is not self:
+      for name in Pipe.__slots__:
+        setattr(self, name, getattr(other, name))
+
+  def explain(self, sample=None):
+    '''
+    Returns a table of the pipe's segments, with bypasses indented and flags for
+    valves, star wrapping, and segments that keep the length, can be fused,
+    vectorized or run in parallel. See functional_pipes.explain.
+
+    sample - optional iterable that a copy of the pipe is run on, adding the
+      number of objects in and out of each segment and its time per object
+
+    Example:
+    >>> print(Pipe().map(abs).filter(lambda x: x > 1).list().explain(range(-3, 4)))
+    '''
+    return explain_pipe(self, sample)
+
+  def memory_profile(self, sample, sites=5):
+    '''
+    Runs a copy of the pipe on sample with tracemalloc and returns a table of the
+    peak and retained bytes of each segment and of the valve, followed by the
+    lines that allocated the most memory still held after the run.
+    See functional_pipes.memory.
+
+    sample - iterable that the copy of the pipe is run on
+    sites - number of allocation sites to list
+
+    Example:
+    >>> print(Pipe().map(lambda x: [x] * 100).sorted().memory_profile(range(1000)))
+    '''
+    return memory_profile_pipe(self, sample, sites)
+
+  def checkpoint(self, path, every=1000):
+    '''
+    Saves the progress of the pipe to the file at path every n objects: the
+    position of the reservoir and the state of the valve at the end of the pipe.
+    Pipe.resume continues from the saved progress.
+    See functional_pipes.checkpoint for which sources and valves are supported.
+
+    path - checkpoint file, replaced atomically on each save
+    every - number of objects between checkpoints
+
+    Example:
+    >>> pipe = Pipe().map(parse).checkpoint('parse.ckpt', every=10000).sum()
+    >>> pipe.resume()(open('big.txt'))  # starts from the beginning if there is no checkpoint
+    '''
+    if self.enclosing_pipe is not None:
+      raise ValueError('checkpoint cannot be used inside a bypass')
+
+    return Pipe(
+        iterable_pre_load = self.preloaded,
+        function_pipe = Checkpoint(self.function_pipe, self.reservoir, path, every),
+        reservoir = self.reservoir,
+        upstream_pipe = self,
+        keeps_length = True,
+        step = Step('call', 'checkpoint', (path, every)),
+      )
+
+  def resume(self, path=None):
+    '''
+    Makes the next run of the pipe continue from the last checkpoint saved by its
+    checkpoint segment.
+    The run raises ValueError if the pipe ends in a valve that does not keep its
+    state in the checkpoints.
+    Returns self.
+
+    path - checkpoint file, defaults to the path given to Pipe.checkpoint
+    '''
+    checkpoint = _find_checkpoint(self)
+    if checkpoint is None:
+      raise ValueError('the pipe has no checkpoint')
+
+    checkpoint.resume(path)
+    return self
+
+  def parallel(self, workers=None, processes=False, ordered=True, chunk_size=1):
+    '''
+    Runs the segments of the bypass that was just opened on a pool of workers
+    while the carried values wait in the main thread. Only segments that handle
+    each object on their own can be in the bypass.
+    A preloaded pipe shuts the pool down when its objects run out, a reusable
+    pipe keeps it until the pipe is closed. See functional_pipes.parallel.
+
+    workers - number of threads or processes, defaults to the number of CPUs
+    processes - True to use processes. The segments are sent to them with
+      Pipe.blueprint, so lambdas need cloudpickle.
+    ordered - True to merge the objects in the order they came in, False to merge
+      them as soon as their chunk is done
+    chunk_size - number of objects sent to a worker at a time
+
+    Example:
+    >>> Pipe().carry_key.parallel(workers=8).map(fetch).re_key.list()(urls)
+    '''
+    b_props = self.bypass_properties
+    if b_props is None or self.function_pipe is not self.reservoir:
+      raise ValueError('parallel must come right after a bypass is opened')
+    if b_props.bypass_class is not None:
+      raise ValueError('parallel does not work with {} bypasses'.format(b_props.open_name))
+
+    return self.__class__(
+        reservoir = self.reservoir,
+        enclosing_pipe = self.enclosing_pipe,
+        bypass_properties = b_props._replace(bypass_class = partial(
+            ParallelBypass,
+            workers = workers,
+            processes = processes,
+            ordered = ordered,
+            chunk_size = chunk_size,
+          )),
+        upstream_pipe = self,
+        step = Step('call', 'parallel', (), dict(
+            workers = workers,
+            processes = processes,
+            ordered = ordered,
+            chunk_size = chunk_size,
+          )),
+      )
+
   @classmethod
   def add_method(
         cls,
@@ -68,6 +364,10 @@ class Pipe:
         double_star_wrap = None,
         as_property = False,
         add_wrapper = True,
+        keeps_length = False,
+        star_gener = None,
+        per_object = False,
+        pass_spout = False,
       ):
     '''
     Used to add methods to the Pipe class.
@@ -108,6 +408,24 @@ class Pipe:
 
     add_wrapper - if True a wrapper will be put on the method else no wrapper
       Should be False if method returns a Pipe object
+
+    keeps_length - True if gener yields exactly one object for each object it
+      draws (map, enumerate). Lets the pipe know its length from a sized reservoir.
+      Can be a function that is given the method's arguments and returns True or
+      False, for methods that only keep the length for some arguments.
+      Ignored for valves.
+
+    star_gener - generator called in place of gener, with the same arguments, when
+      the star_wrap function takes more than one argument. Lets the unpacking run
+      in C instead of in a wrapping function.
+      For map it is itertools.starmap.
+
+    per_object - True if gener handles each object on its own without keeping
+      anything between objects (map, filter). Such segments can be fused with
+      their neighbours and run in parallel.
+
+    pass_spout - True to give gener a Spout of the pipe in place of the pipe's
+      iterator, so it can read the length hint of the pipe. Valves always get one.
     '''
     if not name:
       name = gener.__name__
@@ -125,9 +443,15 @@ class Pipe:
     '''
     if is_valve:
       def wrapper(self, *args, **kargs):
+        step = _make_step(name, args, kargs, as_property)
+        spout = Spout(self)
 
-        args, kargs = _assemble_args(
-            function_pipe = self.function_pipe,
+        checkpoint = spout.checkpoint
+        if checkpoint is not None:
+          checkpoint.valve = True
+
+        args, kargs, _ = _assemble_args(
+            function_pipe = spout,
             iter_index = iter_index,
             args = args,
             kargs = kargs,
@@ -156,6 +480,9 @@ class Pipe:
               valve = True,
               enclosing_pipe = self.enclosing_pipe,
               bypass_properties = self.bypass_properties,
+              upstream_pipe = self,
+              keeps_length = False,
+              step = step,
             )
 
           if to_return.bypass_properties and \
@@ -167,22 +494,29 @@ class Pipe:
 
     elif add_wrapper:
       def wrapper(self, *args, **kargs):
-        args, kargs = _assemble_args(
-            function_pipe = self.function_pipe,
+        step = _make_step(name, args, kargs, as_property)
+        segment_keeps_length = keeps_length(*args, **kargs) if callable(keeps_length) else keeps_length
+
+        args, kargs, starred = _assemble_args(
+            function_pipe = SegmentSpout(self) if pass_spout else self.function_pipe,
             iter_index = iter_index,
             args = args,
             kargs = kargs,
             star_wrap = star_wrap,
             double_star_wrap = double_star_wrap,
+            star_gener = star_gener,
           )
 
         to_return = Pipe(
             iterable_pre_load = self.preloaded,
-            function_pipe = gener(*args, **kargs),
+            function_pipe = (star_gener if starred else gener)(*args, **kargs),
             reservoir = self.reservoir,
             valve = False,
             enclosing_pipe = self.enclosing_pipe,
             bypass_properties = self.bypass_properties,
+            upstream_pipe = self,
+            keeps_length = segment_keeps_length,
+            step = step,
           )
 
         if to_return.bypass_properties and \
@@ -201,6 +535,15 @@ class Pipe:
     # sets the wrapped function as a method in Pipe
     setattr(cls, name, wrapper)
 
+    cls.method_info[name] = MethodInfo(
+        is_valve = is_valve,
+        iter_index = iter_index,
+        star_wrap = star_wrap,
+        double_star_wrap = double_star_wrap,
+        keeps_length = keeps_length and not is_valve,
+        per_object = per_object,
+      )
+
     return name
 
   @classmethod
@@ -235,29 +578,43 @@ class Pipe:
     def map_method_wrap(*args, **kargs):
       '''
       Allows methods to be passed to the function that map will call.
+      The arguments are bound with partial and repeat where possible so map and
+      starmap call func directly.
       '''
       iterator = args[0]
       args = args[1:]
 
       if star_wrap:
-        wrapper = lambda iter_obj: func(*iter_obj, *args, **kargs)
+        if args or kargs:
+          return map(lambda iter_obj: func(*iter_obj, *args, **kargs), iterator)
+        return starmap(func, iterator)
+
       elif double_star_wrap:
-        wrapper = lambda iter_obj: func(*args, **iter_obj, **kargs)
-      elif args or kargs:
-        wrapper = lambda iter_obj: func(iter_obj, *args, **kargs)
-      else:
-        wrapper = func
+        return map(lambda iter_obj: func(*args, **iter_obj, **kargs), iterator)
 
-      return map(wrapper, iterator)
+      return map(
+          partial(func, **kargs) if kargs else func,
+          iterator,
+          *map(repeat, args)
+        )
 
-    # returns the string of the method name
-    return cls.add_method(
+    name = cls.add_method(
         gener = map_method_wrap,
         name = name if name else func.__name__,
         no_over_write = no_over_write,
         as_property = as_property,
+        keeps_length = True,
+        per_object = True,
+      )
+
+    cls.method_info[name] = cls.method_info[name]._replace(
+        star_wrap = star_wrap or None,
+        double_star_wrap = double_star_wrap or None,
       )
 
+    # returns the string of the method name
+    return name
+
   @classmethod
   def add_bypass(cls,
         open_name,
@@ -312,18 +669,20 @@ class Pipe:
         return Pipe(
             reservoir = Drip(),
             enclosing_pipe = self,
-            bypass_properties = dotdict(
+            bypass_properties = BypassProperties(
                 open_name = open_name,
                 close_name = close_name,
                 split = split,
                 merge = merge,
                 close_bypass = close_bypass,
               ),
+            step = Step('attr', open_name),
           )
 
       open_bypass = property(open_bypass)
 
     setattr(cls, open_name, open_bypass)  # bypass opener
+    cls.bypass_info[open_name] = close_name
 
     if close_name:
       setattr(cls, close_name, property(close_bypass))
@@ -368,18 +727,47 @@ class Pipe:
 
       for method in cls.added_methods[add_in]:
         delattr(Pipe, method)
+        cls.method_info.pop(method, None)
 
       del cls.added_methods[add_in]
 
   added_methods = defaultdict(set)
 
+  # MethodInfo of each method added with Pipe.add_method, by name
+  method_info = {}
+
+  # close name of each bypass by open name, None for bypasses of a single segment
+  bypass_info = {}
+
+  # set to False to stop reusable pipes from being optimized on their first call
+  optimize_pipes = True
+
 
 add_bypasses(Pipe)  # Addes all the bypasses defined in bypass.py
 
 
-def _assemble_args(function_pipe, iter_index, args, kargs, star_wrap, double_star_wrap):
+'''
+How a method added with Pipe.add_method handles the objects passing through it.
+The fields are the add_method arguments of the same names.
+'''
+MethodInfo = namedtuple(
+    'MethodInfo',
+    ('is_valve', 'iter_index', 'star_wrap', 'double_star_wrap', 'keeps_length', 'per_object'),
+  )
+
+
+def _assemble_args(
+      function_pipe,
+      iter_index,
+      args,
+      kargs,
+      star_wrap,
+      double_star_wrap,
+      star_gener = None,
+    ):
   '''
   Process all the arguments to pass into a function that is a method of Pipe.
+  Returns (args, kargs, starred)
 
   iter_index - the index of the iterator argument to be passed into the function.
     ars will be split and function_pipe will be inserted in between the splits
@@ -396,6 +784,10 @@ def _assemble_args(function_pipe, iter_index, args, kargs, star_wrap, double_sta
     If None then no arguments are wrapped.
 
   double_star_wrap - is the same as star_wrap but applies the ** operator
+
+  star_gener - if not None and the star_wrap function takes more than one argument
+    the function is left unwrapped and starred is returned True so the caller
+    can call star_gener instead of the method's gener
   '''
   if star_wrap is not None and double_star_wrap is not None:
     raise ValueError('star_wrap and double_star_wrap cannot both not be None.')
@@ -419,12 +811,23 @@ def _assemble_args(function_pipe, iter_index, args, kargs, star_wrap, double_sta
   else:
     wrap_val = None
 
+  starred = False
+
   if isinstance(wrap_val, int):
+    if (wrap_val if wrap_val < iter_index else wrap_val - 1) >= len(args):
+      # the argument was passed by name and is not wrapped
+      return args[:iter_index] + (function_pipe,) + args[iter_index:], kargs, False
+
     # this could be functionalized
     to_star = args[wrap_val] if wrap_val < iter_index else args[wrap_val - 1]
-    star_function = (wrap_func(to_star)
-                     if len(signature(to_star).parameters) > 1
-                     else to_star)
+
+    if not _takes_many(to_star):
+      star_function = to_star
+    elif star_gener is not None and star_wrap is not None:
+      star_function = to_star
+      starred = True
+    else:
+      star_function = wrap_func(to_star)
 
     split_index = wrap_val if wrap_val < iter_index else wrap_val - 1
     args = args[:split_index] + (star_function,) + args[split_index + 1:]
@@ -433,7 +836,7 @@ def _assemble_args(function_pipe, iter_index, args, kargs, star_wrap, double_sta
     if wrap_val in kargs.keys():
       to_star = kargs[wrap_val]
       star_function = (wrap_func(to_star)
-                     if len(signature(to_star).parameters) > 1
+                     if _takes_many(to_star)
                      else to_star)
 
       kargs = ChainMap(
@@ -448,50 +851,293 @@ def _assemble_args(function_pipe, iter_index, args, kargs, star_wrap, double_sta
 
   args = args[:iter_index] + (function_pipe,) + args[iter_index:]
 
-  return args, kargs
+  return args, kargs, starred
+
+
+def _make_step(name, args, kargs, as_property):
+  '''
+  Returns the Step for a call to the method name, or for reading it if it is a
+  property.
+  '''
+  if as_property:
+    return Step('attr', name)
+  return Step('call', name, args, kargs)
+
+
+def _takes_many(func):
+  '''
+  True if func takes more than one argument and objects from the pipe should be
+  unpacked into it.
+  Builtins without a signature (bool, len, str.upper) take the object whole, as
+  do functions like numpy ufuncs whose other parameters all have defaults or are
+  keyword only.
+  '''
+  try:
+    parameters = signature(func).parameters.values()
+  except (TypeError, ValueError):
+    return False
+
+  if len(parameters) < 2:
+    return False
+  return any(parameter.kind is parameter.VAR_POSITIONAL for parameter in parameters) or \
+      sum(parameter.kind in _POSITIONAL and parameter.default is parameter.empty
+          for parameter in parameters) > 1
+
+
+_POSITIONAL = Parameter.POSITIONAL_ONLY, Parameter.POSITIONAL_OR_KEYWORD
+
+
+def _find_checkpoint(pipe):
+  '''
+  Returns the nearest Checkpoint segment upstream of pipe, not looking past the
+  start of a bypass, or None.
+  '''
+  while pipe is not None:
+    if isinstance(pipe.function_pipe, Checkpoint):
+      return pipe.function_pipe
+    pipe = pipe.upstream_pipe
+
+  return None
+
+
+class Spout:
+  '''
+  The iterator passed into valve functions.
+  Gives the function the values from the end of pipe and the length of the pipe
+  when it is known, so list, tuple, numpy.fromiter and the other consumers can
+  allocate their buffers once instead of growing them.
+  '''
+  __slots__ = ('pipe',)
+
+  def __init__(self, pipe):
+    '''
+    pipe - the Pipe whose values are passed out
+    '''
+    self.pipe = pipe
+
+  def __iter__(self):
+    return iter(self.pipe.function_pipe)
+
+  def __next__(self):
+    return next(self.pipe.function_pipe)
+
+  def __length_hint__(self):
+    return self.pipe.__length_hint__()
+
+  @property
+  def checkpoint(self):
+    '''
+    The Checkpoint segment feeding the valve, or None.
+    '''
+    return _find_checkpoint(self.pipe)
+
+  def empty(self):
+    '''
+    Drops the values left in the pipe's reservoir without running the pipe or
+    closing the loaded source.
+    '''
+    self.pipe.reservoir.empty()
+
+  def close(self):
+    '''
+    Closes the pipe feeding the valve.
+    '''
+    self.pipe.close()
+
+
+class SegmentSpout(Spout):
+  '''
+  The Spout passed to the generators of methods added with pass_spout.
+  Closing it only closes the iterator of the pipe segment it reads from, so a
+  bypass closing its segments does not close the pipe it was opened on.
+  '''
+  __slots__ = ()
+
+  def close(self):
+    close_iter(self.pipe.function_pipe)
+
+
+def _is_async(iterable):
+  '''
+  True if iterable is an async iterable, an asyncio.Queue or an AsyncReservoir.
+  '''
+  if hasattr(iterable, '__aiter__'):
+    return True
+
+  asyncio = sys.modules.get('asyncio')
+  if asyncio is not None and isinstance(iterable, asyncio.Queue):
+    return True
+
+  async_reservoir = sys.modules.get('functional_pipes.async_reservoir')
+  return async_reservoir is not None and isinstance(iterable, async_reservoir.AsyncReservoir)
 
 
 class Reservoir:
   '''
   Single threaded iterator that gives a handle to the beginning of the function pipe.
+
+  Values are drawn straight from iter(iterable) so no python level code runs
+  between the source and the first pipe segment.
+  Sized iterables (list, tuple, range, numpy arrays, ...) are checked for
+  remaining values with their iterator's length hint. Other iterables are only
+  peeked when the reservoir is refilled before it was drained.
+  Seekable files are read with readline so their tell() stays usable for
+  checkpoints.
   '''
+  __slots__ = ('source', 'iterator', 'sized', 'seekable')
 
   def __init__(self, iterable=None):
     '''
     iterable - preloads the instance with values to return when __next__ is called
     '''
-    self.iterator = peekable(iterable) if iterable else None
+    self.source = self.iterator = None
+    self.sized = self.seekable = False
+
+    if iterable is not None:
+      self.load(iterable)
 
   def __call__(self, iterable):
     '''
     Reloads the instance with values.
     Checks if self is empty and raises an error if not empty.
 
-    Adds an extra check from Reservoir because
-
     iterable - must be iterable
     '''
-    if self.iterator and self.iterator.peek(ReservoirEmpty) is not ReservoirEmpty:
+    if not self.drained():
       raise ValueError('{} is not empty.'.format(self))
 
-    self.iterator = peekable(iterable)
+    self.load(iterable)
+
+  def load(self, iterable):
+    '''
+    Fills the reservoir with iterable without checking if it is empty.
+    '''
+    seekable = hasattr(iterable, 'readline') and getattr(iterable, 'seekable', bool)()
+    if seekable:
+      # iterating a text file with next() disables its tell()
+      iterator = iter(iterable.readline, iterable.read(0))
+    else:
+      iterator = iter(iterable)
+
+    self.source = iterable
+    self.iterator = iterator
+    self.sized = hasattr(iterable, '__len__') and hasattr(iterator, '__length_hint__')
+    self.seekable = seekable
+
+  def drained(self):
+    '''
+    Returns True if there are no values left in the reservoir.
+    An iterable without a length hint is peeked at and the peeked value is put back.
+    '''
+    iterator = self.iterator
+
+    if iterator is None:
+      return True
+
+    if self.sized:
+      return not length_hint(iterator)
+
+    if self.seekable:
+      position = self.source.tell()
+
+    peeked = next(iterator, ReservoirEmpty)
+    if peeked is ReservoirEmpty:
+      return True
+
+    if self.seekable:
+      self.source.seek(position)
+    else:
+      self.iterator = chain((peeked,), iterator)
+    return False
 
   def __next__(self):
     '''
     Returns a value as long as there are loaded values.
     If there are no loaded values StopIteration is raised.
     '''
+    iterator = self.iterator
+    if iterator is None:
+      raise StopIteration('Reservoir is empty.')
+
     try:
-      return next(self.iterator)
+      return next(iterator)
     except StopIteration as err:
-      self.iterator = None
+      self.source = self.iterator = None
       raise err
-    except TypeError:
-      raise StopIteration('Reservoir is empty.')
 
   def __iter__(self):
     return self
 
+  def __length_hint__(self):
+    '''
+    The number of values left if the loaded iterable is sized, else NotImplemented.
+    '''
+    if self.iterator is None:
+      return 0
+
+    if self.sized:
+      return length_hint(self.iterator)
+
+    return NotImplemented
+
+  def position(self):
+    '''
+    Where the next value will be drawn from: the index into a sized iterable or
+    the tell() of a seekable file.
+    None for other iterables and an empty reservoir.
+    '''
+    if self.iterator is None:
+      return None
+
+    if self.sized:
+      return len(self.source) - length_hint(self.iterator)
+
+    if self.seekable:
+      return self.source.tell()
+
+    return None
+
+  def seek(self, position):
+    '''
+    Moves to a position returned by Reservoir.position for the same source.
+    Returns False if the loaded iterable cannot be moved.
+    '''
+    if self.iterator is None:
+      return False
+
+    if self.sized:
+      iterator = iter(self.source)
+      if hasattr(iterator, '__setstate__'):
+        # list, tuple and range iterators jump straight to the index
+        iterator.__setstate__(position)
+      else:
+        consume(iterator, position)
+      self.iterator = iterator
+      return True
+
+    if self.seekable:
+      self.source.seek(position)
+      return True
+
+    return False
+
+  def empty(self):
+    '''
+    Drops the values left in the reservoir without closing the loaded iterable.
+    The reservoir can be refilled afterwards.
+    '''
+    self.source = self.iterator = None
+
+  def close(self):
+    '''
+    Empties the reservoir and calls close on the loaded iterable if it has one, so
+    generators are finalized and files and sockets are closed.
+    The reservoir can be refilled afterwards.
+    '''
+    source = self.source
+    self.empty()
+    close_iter(source)
+
   def not_empty(self):
     # https://github.com/BebeSparkelSparkel/functional_pipes/issues/9
     return self.iterator is not None
@@ -499,7 +1145,7 @@ class Reservoir:
 
 class ReservoirEmpty:
   '''
-  Class to return if the peekable iterator is empty in Reservoir.__call__
+  Class returned when peeking at an empty iterator in Reservoir.drained
   '''
   pass
 
@@ -532,6 +1178,7 @@ class Valve:
     >>> result_1 = next(valve_1)
     raises StopIteration
   '''
+  __slots__ = ('func', 'iterator', 'pass_args', 'pass_kargs', 'empty_error', 'post_iterator')
 
   def __init__(self, func, iterator, pass_args, pass_kargs=None, empty_error=None):
     '''
@@ -582,6 +1229,14 @@ class Valve:
 
     return to_return
 
+  def close(self):
+    '''
+    Drops any values left over from func and closes the iterator feeding the valve.
+    '''
+    close_iter(self.post_iterator)
+    self.post_iterator = iter(())
+    close_iter(self.iterator)
+
   def whole_return(self):
     '''
     Returns the object created by the function and iterable.
@@ -1,8 +1,11 @@
 from functional_pipes import Pipe
+from functional_pipes.close_iter import close_iter
 from functional_pipes.pipe import Reservoir
 
 
 class PipeMulti(Pipe):
+  __slots__ = ()
+
   def __init__(self, function_pipe=None, reservoir=None, valve=False,
         iterable_pre_load=None  # placeholder for superclass pipe arguments
       ):
@@ -17,6 +20,13 @@ class PipeMulti(Pipe):
     # True if the end of the pipe is a valve function else False
     self.valve = valve
 
+    self.enclosing_pipe = None
+    self.bypass_properties = None
+    self.upstream_pipe = None
+    self.keeps_length = True
+    self.step = None
+    self.optimized = True
+
   def __call__(self, iterable=None):
     return self.reservoir.new_handle(iterable)
 
@@ -28,6 +38,8 @@ class ResHandle:
   '''
   Handle to a thread of a Confluence instance.
   '''
+  __slots__ = ('confluence',)
+
   def __init__(self, confluence):
     self.confluence = confluence
 
@@ -40,12 +52,17 @@ class ResHandle:
   def __next__(self):
     return self.confluence.next(self)
 
+  def close(self):
+    self.confluence.close_res(self)
+
 
 class Confluence:
   '''
   Multi threaded iterator that gives multiple handles to the beginning
   of the function pipe.
   '''
+  __slots__ = ('reservoirs',)
+
   def __init__(self):
     self.reservoirs = {}
 
@@ -59,3 +76,13 @@ class Confluence:
 
   def fill_res(self, iterable, res_handle):
     self.reservoirs[res_handle](iterable)
+
+  def close_res(self, res_handle):
+    close_iter(self.reservoirs[res_handle])
+
+  def close(self):
+    '''
+    Closes the reservoirs of every handle.
+    '''
+    for reservoir in self.reservoirs.values():
+      close_iter(reservoir)
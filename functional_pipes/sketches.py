@@ -0,0 +1,511 @@
+'''
+Compact data structures for summarizing streams that are too large to keep.
+
+Keys are reduced to blake2b digests of a stable encoding of the key that starts
+with a tag for its kind, so keys of different kinds do not collide and keys that
+are equal in python give the same digest: equal numbers of any type (1, 1.0,
+True, Fraction(1)), bytes and bytearray, set and frozenset, and dicts with the
+same items in any order.
+Supported keys are None, numbers, str, bytes, bytearray and tuples, lists, sets
+and dicts of them. Other objects raise TypeError, use a key function that
+returns one of these instead.
+'''
+from bisect import bisect_left
+from hashlib import blake2b
+from itertools import accumulate, chain
+from math import asin, ceil, isfinite, log, pi, sin
+from numbers import Complex, Integral, Number
+
+
+def key_digest(key, digest_size=16):
+  '''
+  Returns the blake2b digest of the encoding of key described in the module
+  docstring.
+
+  key - object to digest
+  digest_size - number of bytes in the digest
+  '''
+  kind = type(key)
+  # the most common keys first
+  if kind is str:
+    data = b's' + key.encode('utf-8', 'surrogatepass')
+  elif kind is int:
+    data = b'i' + _int_bytes(key)
+  elif kind is bytes:
+    data = b'b' + key
+  else:
+    data = _encode(key)
+
+  return blake2b(data, digest_size=digest_size).digest()
+
+
+def _int_bytes(value):
+  return value.to_bytes((value.bit_length() + 8) // 8, 'little', signed=True)
+
+
+def _encode(key):
+  '''
+  Returns the tagged bytes of key.
+  '''
+  if key is None:
+    return b'n'
+  if isinstance(key, str):
+    return b's' + key.encode('utf-8', 'surrogatepass')
+  if isinstance(key, (bytes, bytearray)):
+    return b'b' + key
+  if isinstance(key, Number):
+    return _encode_number(key)
+  if isinstance(key, tuple):
+    return _encode_items(b't', map(_encode, key))
+  if isinstance(key, list):
+    return _encode_items(b'l', map(_encode, key))
+  if isinstance(key, (set, frozenset)):
+    # sorted so the order the items were added in does not matter
+    return _encode_items(b'e', sorted(map(_encode, key)))
+  if isinstance(key, dict):
+    pairs = (_encode_items(b'p', (_encode(name), _encode(value))) for name, value in key.items())
+    return _encode_items(b'd', sorted(pairs))
+
+  raise TypeError('cannot digest a key of type {}, use a key function that returns a '
+                  'number, str, bytes or a tuple of them'.format(type(key).__name__))
+
+
+def _encode_items(tag, encoded):
+  '''
+  Joins encoded items with the length of each in front so nested keys cannot run
+  into each other.
+  '''
+  parts = [tag]
+  for data in encoded:
+    parts.append(len(data).to_bytes(8, 'little'))
+    parts.append(data)
+  return b''.join(parts)
+
+
+def _encode_number(number):
+  '''
+  Encodes numbers that are equal the same way: integral values as ints and other
+  finite real values as the exact ratio of two ints.
+  '''
+  if isinstance(number, Integral):
+    return b'i' + _int_bytes(int(number))
+
+  if isinstance(number, Complex) and not hasattr(number, 'as_integer_ratio'):
+    if number.imag:
+      return _encode_items(b'c', (_encode_number(number.real), _encode_number(number.imag)))
+    number = number.real
+
+  if not isfinite(number):
+    # nan and the infinities
+    return b'f' + repr(float(number)).encode()
+
+  numerator, denominator = number.as_integer_ratio()
+  if denominator == 1:
+    return b'i' + _int_bytes(numerator)
+  return _encode_items(b'q', (_int_bytes(numerator), _int_bytes(denominator)))
+
+
+class DigestSet:
+  '''
+  Set of keys that stores a fixed size digest of each key in an open addressing
+  table instead of the keys themselves.
+  With 16 byte digests the chance of two different keys colliding is negligible
+  (about n**2 / 2**129) and each key costs 16 to 64 bytes.
+
+  Example:
+  >>> seen = DigestSet()
+  >>> seen.add('a'), seen.add('b'), seen.add('a')
+  (True, True, False)
+  '''
+  __slots__ = ('digest_size', 'table', 'slots', 'count')
+
+  def __init__(self, capacity=1024, digest_size=16):
+    '''
+    capacity - number of keys expected, the table grows past it
+    digest_size - bytes stored for each key, 8 to 64
+    '''
+    if not 8 <= digest_size <= 64:
+      raise ValueError('digest_size must be from 8 to 64 not {}'.format(digest_size))
+
+    self.digest_size = digest_size
+    self.count = 0
+
+    slots = 8
+    while slots < 2 * capacity:
+      slots *= 2
+    self._allocate(slots)
+
+  def _allocate(self, slots):
+    self.slots = slots
+    self.table = bytearray(slots * self.digest_size)
+
+  def __len__(self):
+    return self.count
+
+  def __contains__(self, key):
+    return self._find(self._digest(key))[1]
+
+  def add(self, key):
+    '''
+    Adds key to the set.
+    Returns True if key was not in the set.
+    '''
+    digest = self._digest(key)
+    offset, found = self._find(digest)
+
+    if found:
+      return False
+
+    self.table[offset:offset + self.digest_size] = digest
+    self.count += 1
+
+    if 2 * self.count > self.slots:
+      self._grow()
+
+    return True
+
+  def _digest(self, key):
+    digest = key_digest(key, self.digest_size)
+    if not any(digest):
+      # all zero marks an empty slot
+      digest = b'\x01' + digest[1:]
+    return digest
+
+  def _find(self, digest):
+    '''
+    Returns (offset, found) of the slot holding digest or of the empty slot where
+    it would go.
+    '''
+    table = self.table
+    size = self.digest_size
+    mask = self.slots - 1
+    empty = bytes(size)
+
+    index = int.from_bytes(digest[:8], 'little') & mask
+    while True:
+      offset = index * size
+      entry = table[offset:offset + size]
+
+      if entry == digest:
+        return offset, True
+      if entry == empty:
+        return offset, False
+
+      index = (index + 1) & mask
+
+  def _grow(self):
+    old_table = self.table
+    size = self.digest_size
+    empty = bytes(size)
+
+    self._allocate(2 * self.slots)
+    table = self.table
+
+    for offset in range(0, len(old_table), size):
+      digest = old_table[offset:offset + size]
+      if digest != empty:
+        new_offset = self._find(digest)[0]
+        table[new_offset:new_offset + size] = digest
+
+
+class BloomFilter:
+  '''
+  Bit array Bloom filter.
+  A key that was added is always found. A key that was not added is found with
+  probability error_rate once capacity keys have been added.
+
+  Example:
+  >>> seen = BloomFilter(capacity=1000, error_rate=0.01)
+  >>> seen.add('a'), seen.add('a'), 'a' in seen
+  (True, False, True)
+  '''
+  __slots__ = ('bits', 'size', 'hashes')
+
+  def __init__(self, capacity=1000000, error_rate=0.001):
+    '''
+    capacity - number of keys the error rate is sized for
+    error_rate - chance that a key that was not added is found
+    '''
+    if not 0 < error_rate < 1:
+      raise ValueError('error_rate must be between 0 and 1 not {}'.format(error_rate))
+
+    self.size = max(8, ceil(-capacity * log(error_rate) / log(2) ** 2))
+    self.hashes = max(1, round(self.size / capacity * log(2)))
+    self.bits = bytearray((self.size + 7) // 8)
+
+  def _positions(self, key):
+    '''
+    Bit positions of key by double hashing two halves of its digest.
+    '''
+    digest = key_digest(key, 16)
+    first = int.from_bytes(digest[:8], 'little')
+    second = int.from_bytes(digest[8:], 'little') | 1
+    size = self.size
+    return [(first + i * second) % size for i in range(self.hashes)]
+
+  def __contains__(self, key):
+    bits = self.bits
+    return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+  def add(self, key):
+    '''
+    Adds key to the filter.
+    Returns True if key was not found before it was added.
+    '''
+    bits = self.bits
+    new = False
+
+    for position in self._positions(key):
+      byte = position >> 3
+      bit = 1 << (position & 7)
+      if not bits[byte] & bit:
+        bits[byte] |= bit
+        new = True
+
+    return new
+
+
+class HyperLogLog:
+  '''
+  Estimates the number of distinct keys with 2 ** precision one byte registers.
+  The relative error is about 1.04 / sqrt(2 ** precision), 0.8 % for the default
+  precision of 14 which takes 16 KiB.
+  Sketches with the same precision merge into the sketch of the combined keys.
+
+  Example:
+  >>> sketch = HyperLogLog()
+  >>> sketch.update(range(1000))
+  >>> abs(sketch.count() - 1000) < 30
+  True
+  '''
+  __slots__ = ('precision', 'registers')
+
+  def __init__(self, precision=14):
+    '''
+    precision - number of hash bits that pick the register, 4 to 18
+    '''
+    if not 4 <= precision <= 18:
+      raise ValueError('precision must be from 4 to 18 not {}'.format(precision))
+
+    self.precision = precision
+    self.registers = bytearray(1 << precision)
+
+  def add(self, key):
+    '''
+    Adds key to the sketch.
+    '''
+    precision = self.precision
+    hashed = int.from_bytes(key_digest(key, 8), 'little')
+
+    index = hashed >> (64 - precision)
+    rest_bits = 64 - precision
+    rank = rest_bits - (hashed & ((1 << rest_bits) - 1)).bit_length() + 1
+
+    if rank > self.registers[index]:
+      self.registers[index] = rank
+
+  def update(self, keys):
+    '''
+    Adds every key in keys to the sketch.
+    '''
+    for key in keys:
+      self.add(key)
+
+  def merge(self, other):
+    '''
+    Adds the keys counted by other to this sketch.
+    '''
+    if other.precision != self.precision:
+      raise ValueError('cannot merge HyperLogLog sketches with different precision')
+
+    self.registers = bytearray(map(max, self.registers, other.registers))
+
+  def count(self):
+    '''
+    Returns the estimated number of distinct keys added.
+    '''
+    registers = self.registers
+    size = len(registers)
+
+    if size >= 128:
+      alpha = 0.7213 / (1 + 1.079 / size)
+    else:
+      alpha = {16: 0.673, 32: 0.697, 64: 0.709}[size]
+
+    estimate = alpha * size * size / sum(2. ** -register for register in registers)
+
+    zeros = registers.count(0)
+    if zeros and estimate <= 2.5 * size:
+      # linear counting is more accurate for small counts
+      estimate = size * log(size / zeros)
+
+    return round(estimate)
+
+  def __eq__(self, other):
+    return (isinstance(other, HyperLogLog) and self.precision == other.precision
+            and self.registers == other.registers)
+
+
+class TDigest:
+  '''
+  Merging t-digest that estimates quantiles from weighted centroids.
+  Centroids are small near the ends of the distribution so the tails are accurate.
+  At most about compression centroids are kept.
+  Digests merge into the digest of the combined values.
+
+  Example:
+  >>> digest = TDigest()
+  >>> digest.update(range(1001))
+  >>> digest.quantile(0.5)
+  500.0
+  '''
+  __slots__ = ('compression', 'means', 'weights', 'buffer', 'low', 'high')
+
+  def __init__(self, compression=100):
+    '''
+    compression - size limit of the digest, higher is more accurate
+    '''
+    if compression < 10:
+      raise ValueError('compression must be at least 10 not {}'.format(compression))
+
+    self.compression = compression
+    self.means = []
+    self.weights = []
+    self.buffer = []
+    self.low = self.high = None
+
+  def add(self, value, weight=1):
+    '''
+    Adds value to the digest weight times.
+    '''
+    self.buffer.append((value, weight))
+    if len(self.buffer) >= 5 * self.compression:
+      self._compress()
+
+  def update(self, values):
+    '''
+    Adds every value in values to the digest.
+    '''
+    buffer = self.buffer
+    size = 5 * self.compression
+
+    for value in values:
+      buffer.append((value, 1))
+      if len(buffer) >= size:
+        self._compress()
+        buffer = self.buffer
+
+  def merge(self, other):
+    '''
+    Adds the values summarized by other to this digest.
+    '''
+    # the centroid means of other are inside its extremes so keep them
+    if other.low is not None:
+      self.low = other.low if self.low is None else min(self.low, other.low)
+      self.high = other.high if self.high is None else max(self.high, other.high)
+
+    self.buffer.extend(zip(other.means, other.weights))
+    self.buffer.extend(other.buffer)
+    self._compress()
+
+  def total(self):
+    '''
+    Total weight of the values added.
+    '''
+    return sum(self.weights) + sum(weight for _, weight in self.buffer)
+
+  def _compress(self):
+    '''
+    Merges the buffer into the centroids.
+    '''
+    if not self.buffer:
+      return
+
+    buffer_low = min(self.buffer)[0]
+    buffer_high = max(self.buffer)[0]
+    self.low = buffer_low if self.low is None else min(self.low, buffer_low)
+    self.high = buffer_high if self.high is None else max(self.high, buffer_high)
+
+    points = sorted(chain(zip(self.means, self.weights), self.buffer))
+    self.buffer = []
+
+    total = sum(weight for _, weight in points)
+    scale = self.compression / (2 * pi)
+    k_max = self.compression / 4
+
+    def q_limit(before):
+      k = scale * asin(2 * before / total - 1) + 1
+      return 1. if k >= k_max else (sin(k / scale) + 1) / 2
+
+    means = []
+    weights = []
+    mean, weight = points[0]
+    before = 0
+    limit = q_limit(before)
+
+    for point_mean, point_weight in points[1:]:
+      if (before + weight + point_weight) / total <= limit:
+        weight += point_weight
+        mean += (point_mean - mean) * point_weight / weight
+      else:
+        means.append(mean)
+        weights.append(weight)
+        before += weight
+        limit = q_limit(before)
+        mean, weight = point_mean, point_weight
+
+    means.append(mean)
+    weights.append(weight)
+
+    self.means = means
+    self.weights = weights
+
+  def quantile(self, q):
+    '''
+    Returns the estimated value at quantile q.
+    Raises ValueError if the digest is empty.
+
+    q - number from 0 to 1
+    '''
+    if not 0 <= q <= 1:
+      raise ValueError('q must be from 0 to 1 not {}'.format(q))
+
+    self._compress()
+    means = self.means
+    weights = self.weights
+
+    if not means:
+      raise ValueError('quantile of an empty TDigest')
+
+    if len(means) == 1:
+      return float(means[0])
+
+    # the weight before the center of each centroid
+    centers = [before - weight / 2 for before, weight in zip(accumulate(weights), weights)]
+    target = q * sum(weights)
+
+    if target <= centers[0]:
+      return _between(self.low, means[0], target / centers[0] if centers[0] else 1.)
+
+    if target >= centers[-1]:
+      tail = sum(weights) - centers[-1]
+      return _between(means[-1], self.high, (target - centers[-1]) / tail if tail else 0.)
+
+    index = bisect_left(centers, target)
+    left, right = centers[index - 1], centers[index]
+    return _between(means[index - 1], means[index], (target - left) / (right - left))
+
+  def __eq__(self, other):
+    if not isinstance(other, TDigest):
+      return False
+    self._compress()
+    other._compress()
+    return (self.compression == other.compression and self.means == other.means
+            and self.weights == other.weights)
+
+
+def _between(low, high, fraction):
+  '''
+  Linear interpolation from low to high.
+  '''
+  return float(low + (high - low) * fraction)
@@ -0,0 +1,238 @@
+'''
+Sampling tracer that writes Chrome trace event JSON, which opens in
+chrome://tracing and https://ui.perfetto.dev.
+
+A traced copy of a pipe is rebuilt from its blueprint with a probe at the end.
+One in every n objects that come out of the end of the pipe is traced: the probe
+records when it was asked for the object and when it got it. The other objects
+only pass a counter check in that probe, so the cost does not grow with the
+number of segments and the recording falls with the sampling rate.
+
+Tracer(segments=True) also puts a probe after each step that records the time
+the step took to give a sampled object, so a slow object shows as a long bar
+with the segments that took the time nested under it. Every object passes
+through those probes, sampled or not, which costs a Python level __next__ per
+segment for each object. For pipes of cheap C segments that is several times
+the time of the untraced pipe, so trace a part of the input that way.
+
+Garbage collections while the tracer is started and spans marked with
+Tracer.span (worker threads, worker processes, batches) are recorded too.
+
+Example:
+>>> tracer = Tracer(every=100)
+>>> tracer.run(Pipe().map(parse).filter(valid).list(), open('big.txt'))
+>>> tracer.write('trace.json')
+'''
+import gc
+import json
+import os
+import threading
+from contextlib import contextmanager
+from time import perf_counter_ns
+
+from functional_pipes.close_iter import close_iter
+from functional_pipes.explain import build_probed, label
+
+
+class Tracer:
+  '''
+  Collects trace events from traced pipes, spans and garbage collections.
+  Events are kept as tuples of (name, category, start ns, end ns, pid, tid) so
+  they can be returned from worker processes and added with Tracer.extend.
+  '''
+  __slots__ = ('every', 'segments', 'events', 'gc_start', 'thread_names')
+
+  def __init__(self, every=100, segments=False):
+    '''
+    every - trace one in every n objects out of each traced pipe
+    segments - True to also time each segment for the sampled objects, at the
+      cost of a probe after every segment that all objects pass through
+    '''
+    if every < 1:
+      raise ValueError('every must be at least 1 not {}'.format(every))
+
+    self.every = every
+    self.segments = segments
+    self.events = []
+    self.gc_start = None
+    self.thread_names = {}
+
+  def record(self, name, category, start, end):
+    '''
+    Adds an event for the current thread.
+
+    start, end - perf_counter_ns times
+    '''
+    tid = threading.get_ident()
+    if tid not in self.thread_names:
+      self.thread_names[tid] = threading.current_thread().name
+    self.events.append((name, category, start, end, os.getpid(), tid))
+
+  def extend(self, events):
+    '''
+    Adds events recorded by another Tracer, such as one in a worker process.
+    perf_counter_ns uses the same clock in every process on one machine.
+    '''
+    self.events.extend(events)
+
+  @contextmanager
+  def span(self, name, category='span'):
+    '''
+    Context manager that records the time spent inside it as an event.
+    '''
+    start = perf_counter_ns()
+    try:
+      yield
+    finally:
+      self.record(name, category, start, perf_counter_ns())
+
+  def trace(self, pipe):
+    '''
+    Returns a reusable copy of pipe, rebuilt from its blueprint, that records its
+    sampled objects in this tracer.
+    Each copy samples on its own, so one copy can be used in each thread.
+    '''
+    sampler = _Sampler(self.every)
+
+    if self.segments:
+      probed = build_probed(pipe, lambda built: TraceProbe(built.function_pipe, label(built), self, sampler))
+      last = next(built for built in reversed(probed) if not built.valve)
+      last.function_pipe.decides = True
+      return probed[-1]
+
+    # build_probed is called once for the empty pipe and each step that is not a
+    # valve, only the last of those calls gets the probe
+    probes = sum(not built.valve for built in build_probed(pipe, _unprobed))
+    calls = iter(range(probes - 1, -1, -1))
+
+    def make_probe(built):
+      if next(calls):
+        return built.function_pipe
+
+      probe = TraceProbe(built.function_pipe, label(built), self, sampler)
+      probe.decides = True
+      return probe
+
+    return build_probed(pipe, make_probe)[-1]
+
+  def run(self, pipe, iterable):
+    '''
+    Runs a traced copy of pipe on iterable inside a 'run' span with garbage
+    collections recorded.
+    Returns the valve's result, or a list of the objects if the pipe has no valve.
+    '''
+    traced = self.trace(pipe)
+
+    with self, self.span('run'):
+      result = traced(iterable)
+      return result if traced.valve else list(result)
+
+  def __enter__(self):
+    '''
+    Starts recording garbage collections.
+    '''
+    gc.callbacks.append(self._gc_callback)
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    gc.callbacks.remove(self._gc_callback)
+
+  def _gc_callback(self, phase, info):
+    if phase == 'start':
+      self.gc_start = perf_counter_ns()
+    elif self.gc_start is not None:
+      self.record('gc gen {}'.format(info['generation']), 'gc', self.gc_start, perf_counter_ns())
+      self.gc_start = None
+
+  def trace_events(self):
+    '''
+    Returns the events as a list of Chrome trace event dicts, with thread names.
+    '''
+    trace_events = [
+        dict(name=name, cat=category, ph='X', ts=start / 1000, dur=(end - start) / 1000,
+             pid=pid, tid=tid)
+        for name, category, start, end, pid, tid in self.events
+      ]
+
+    trace_events.extend(
+        dict(name='thread_name', ph='M', pid=os.getpid(), tid=tid, args=dict(name=name))
+        for tid, name in self.thread_names.items()
+      )
+
+    return trace_events
+
+  def write(self, path):
+    '''
+    Writes the events to path as Chrome trace event JSON.
+    '''
+    with open(path, 'w') as file:
+      json.dump(dict(traceEvents=self.trace_events(), displayTimeUnit='ns'), file)
+
+
+def _unprobed(built):
+  return built.function_pipe
+
+
+class _Sampler:
+  '''
+  Sampling state shared by the probes of one traced pipe.
+  '''
+  __slots__ = ('every', 'count', 'active')
+
+  def __init__(self, every):
+    self.every = every
+    self.count = 0
+    self.active = False
+
+
+class TraceProbe:
+  '''
+  Iterator put after a segment of a traced pipe that records how long the segment
+  took to give each sampled object.
+  The probe at the end of the pipe decides which objects are sampled.
+  '''
+  __slots__ = ('iterable', 'name', 'tracer', 'sampler', 'decides')
+
+  def __init__(self, iterable, name, tracer, sampler):
+    self.iterable = iterable
+    self.name = name
+    self.tracer = tracer
+    self.sampler = sampler
+    self.decides = False
+
+  def __iter__(self):
+    return self
+
+  def __next__(self):
+    sampler = self.sampler
+
+    if self.decides:
+      sampler.count += 1
+      if sampler.count < sampler.every:
+        return next(self.iterable)
+
+      sampler.count = 0
+      sampler.active = True
+      try:
+        return self.traced_next()
+      finally:
+        sampler.active = False
+
+    if not sampler.active:
+      return next(self.iterable)
+
+    return self.traced_next()
+
+  def traced_next(self):
+    '''
+    Draws the next object and records the time it took.
+    Nothing is recorded when the segment raises (StopIteration, a Drip inside a
+    bypass).
+    '''
+    start = perf_counter_ns()
+    obj = next(self.iterable)
+    self.tracer.record(self.name, 'stage', start, perf_counter_ns())
+    return obj
+
+  def close(self):
+    close_iter(self.iterable)
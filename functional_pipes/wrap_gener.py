@@ -1,31 +1,45 @@
+from functional_pipes.close_iter import close_iter
+
+
 def wrap_gener(generator):
   '''
   Used to wrap generators so that they can be reused.
 
   generator - any generator that cannot be reused once StopIteration is thrown
+    The iterable must be its first argument. Any other arguments are passed to it
+    each time it is reloaded.
   '''
   class wrapper_class:
-    def __init__(self, iterable):
+    def __init__(self, iterable, *args, **kargs):
       self.iterable = iterable
+      self.args = args
+      self.kargs = kargs
       self.gener_iter = None
 
     def __iter__(self):
       return self
 
     def __next__(self):
+      if self.gener_iter is None:
+        # reload the generator
+        self.gener_iter = generator(self.iterable, *self.args, **self.kargs)
+
       try:
         return next(self.gener_iter)
 
-      except TypeError:
-        # reload the generator and return the next value
-        self.gener_iter = generator(self.iterable)
-        return next(self)
-
       except StopIteration as err:
         # empty gener_iter and then let StopIteration propigate
         self.gener_iter = None
         raise err
 
+    def close(self):
+      '''
+      Closes the running generator and the iterable it draws from.
+      '''
+      close_iter(self.gener_iter)
+      self.gener_iter = None
+      close_iter(self.iterable)
+
   # sets the wrapper to have the same name as the generator it is wrapping
   wrapper_class.__name__ = generator.__name__
 
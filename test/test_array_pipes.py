@@ -0,0 +1,90 @@
+import unittest
+import struct
+from array import array
+
+from functional_pipes import Pipe
+from functional_pipes.add_ins import array_pipes
+
+
+class TestMethods(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    Pipe.load('built_in_functions', 'array_pipes')
+
+  @classmethod
+  def tearDownClass(self):
+    Pipe.unload('built_in_functions', 'array_pipes')
+
+  def test_to_array(self):
+    data_1 = tuple(range(3 * array_pipes.CHUNK + 5))
+
+    for typecode in 'q', 'l', 'd':
+      self.assertEqual(Pipe(data_1).to_array(typecode), array(typecode, data_1))
+
+    # unknown length
+    self.assertEqual(Pipe(iter(data_1)).to_array('q'), array('q', data_1))
+    self.assertEqual(
+        Pipe(data_1).filter(lambda x: x % 3).to_array('i'),
+        array('i', filter(lambda x: x % 3, data_1))
+      )
+
+    # length hint larger and smaller than the values
+    self.assertEqual(array_pipes.to_array(Hinted(data_1, 10), 'q'), array('q', data_1))
+    self.assertEqual(array_pipes.to_array(Hinted(data_1[:10], 100), 'q'), array('q', data_1[:10]))
+
+    self.assertEqual(Pipe(()).to_array('q'), array('q'))
+    self.assertEqual(Pipe('ab').to_array('u'), array('u', 'ab'))
+
+    with self.assertRaises(struct.error):
+      Pipe((1000,)).to_array('b')
+
+    pipe_1 = Pipe().map(lambda x: 2 * x).to_array('H')
+    self.assertEqual(pipe_1((1, 2)), array('H', (2, 4)))
+    self.assertEqual(pipe_1(iter((3,))), array('H', (6,))) # reload the pipe
+
+  def test_to_bytearray(self):
+    data_1 = 1, 2, 255
+
+    self.assertEqual(Pipe(data_1).to_bytearray(), bytearray(data_1))
+    self.assertEqual(Pipe(iter(data_1)).to_bytearray(), bytearray(data_1))
+
+  def test_to_bytes(self):
+    data_1 = tuple(range(array_pipes.CHUNK + 3))
+    data_2 = tuple((i, i / 2) for i in range(array_pipes.CHUNK + 3))
+
+    self.assertEqual(
+        Pipe(data_1).to_bytes('<i'),
+        struct.pack('<{}i'.format(len(data_1)), *data_1)
+      )
+    self.assertEqual(
+        Pipe(data_2).to_bytes('>Hd'),
+        b''.join(struct.pack('>Hd', *values) for values in data_2)
+      )
+    # native alignment
+    self.assertEqual(
+        Pipe(data_2).map(lambda v: v[::-1]).to_bytes('dH'),
+        b''.join(struct.pack('dH', *values[::-1]) for values in data_2)
+      )
+    self.assertEqual(Pipe(()).to_bytes('<i'), b'')
+
+    # buffer protocol
+    self.assertEqual(memoryview(Pipe((1, 2)).to_bytes('<i')).cast('i').tolist(), [1, 2])
+
+
+class Hinted:
+  '''
+  Iterable with a wrong length hint.
+  '''
+  def __init__(self, values, hint):
+    self.values = values
+    self.hint = hint
+
+  def __iter__(self):
+    return iter(self.values)
+
+  def __length_hint__(self):
+    return self.hint
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,119 @@
+import asyncio
+import time
+import unittest
+
+from functional_pipes import Pipe
+from functional_pipes.async_reservoir import AsyncReservoir, QueueEnd
+
+
+async def count_up(n, delay=0):
+  for i in range(n):
+    if delay:
+      await asyncio.sleep(delay)
+    yield i
+
+
+class RecordingReservoir(AsyncReservoir):
+  '''
+  Keeps the size of each batch.
+  '''
+  def __init__(self, *args, **kargs):
+    super().__init__(*args, **kargs)
+    self.sizes = []
+
+  async def batch(self):
+    batch = await super().batch()
+    if batch:
+      self.sizes.append(len(batch))
+    return batch
+
+
+def slow(x):
+  time.sleep(0.002)
+  return x
+
+
+class TestAsyncReservoir(unittest.IsolatedAsyncioTestCase):
+  @classmethod
+  def setUpClass(cls):
+    Pipe.load('built_in_functions')
+
+  @classmethod
+  def tearDownClass(self):
+    Pipe.unload('built_in_functions')
+
+  async def test_async_iterable(self):
+    pipe_1 = Pipe().filter(lambda k, v: v % 3).carry_key.map(str).re_key
+    data_1 = [(i, i * 2) for i in range(50)]
+
+    async def source():
+      for obj in data_1:
+        yield obj
+
+    self.assertEqual([obj async for obj in pipe_1(source())], list(pipe_1(data_1)))
+
+    # the pipe is still usable with sync iterables
+    self.assertEqual(list(pipe_1(data_1[:2])), [(1, '2')])
+
+  async def test_queue(self):
+    queue_1 = asyncio.Queue()
+    pipe_1 = Pipe().map(abs)
+
+    async def producer():
+      for i in range(-10, 0):
+        await queue_1.put(i)
+        await asyncio.sleep(0)
+      await queue_1.put(QueueEnd)
+
+    task_1 = asyncio.ensure_future(producer())
+    self.assertEqual([obj async for obj in pipe_1(queue_1)], list(range(10, 0, -1)))
+    await task_1
+
+  async def test_batches(self):
+    # the batch size doubles up to size
+    reservoir_1 = RecordingReservoir(count_up(20), size=8)
+    self.assertEqual([obj async for obj in Pipe().map(abs)(reservoir_1)], list(range(20)))
+    self.assertEqual(reservoir_1.sizes, [1, 2, 4, 8, 5])
+
+    # objects that come slowly are sent before the batch is full
+    reservoir_2 = RecordingReservoir(count_up(6, 0.02), time_slice=0.001)
+    self.assertEqual([obj async for obj in Pipe().map(abs)(reservoir_2)], list(range(6)))
+    self.assertEqual(reservoir_2.sizes, [1] * 6)
+
+    with self.assertRaises(ValueError):
+      AsyncReservoir(count_up(1), size=0)
+
+  async def test_valve(self):
+    # a result for each batch would depend on when the objects arrive
+    with self.assertRaises(ValueError):
+      Pipe().map(abs).sum()(count_up(3))
+
+  async def test_time_slice(self):
+    ticks = 0
+
+    async def ticker():
+      nonlocal ticks
+      while True:
+        ticks += 1
+        await asyncio.sleep(0)
+
+    task_1 = asyncio.ensure_future(ticker())
+    reservoir_1 = AsyncReservoir(count_up(50), time_slice=0.005)
+
+    # 100 ms of work, the event loop runs every few objects
+    results_1 = [obj async for obj in Pipe().map(slow)(reservoir_1)]
+    task_1.cancel()
+
+    self.assertEqual(results_1, list(range(50)))
+    self.assertGreater(ticks, 10)
+
+  async def test_break(self):
+    async for obj in Pipe().map(abs)(count_up(100)):
+      if obj == 3:
+        break
+
+    self.assertEqual(list(Pipe().map(abs)((-1,))), [1])
+
+
+if __name__ == '__main__':
+  unittest.main()
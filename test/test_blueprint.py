@@ -0,0 +1,82 @@
+import pickle
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from operator import neg
+
+from functional_pipes import Pipe
+from functional_pipes.blueprint import Blueprint, Step, init_worker, run_worker
+
+
+class TestBlueprint(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    Pipe.load('built_in_functions')
+
+  @classmethod
+  def tearDownClass(self):
+    Pipe.unload('built_in_functions')
+
+  def assertRebuilds(self, pipe, data):
+    blueprint = pipe.blueprint()
+    rebuilt = Blueprint.loads(blueprint.dumps()).build()
+
+    # unpickled lambdas are new functions so only the kinds and names are compared
+    self.assertEqual(
+        [step[:2] for step in rebuilt.blueprint().steps],
+        [step[:2] for step in blueprint.steps]
+      )
+    self.assertEqual(tuple(rebuilt(data)), tuple(pipe(data)))
+    self.assertEqual(tuple(rebuilt(data)), tuple(pipe(data))) # reusable
+
+  def test_steps(self):
+    pipe_1 = Pipe().map(neg).filter(bool).tuple()
+    self.assertEqual(
+        pipe_1.blueprint().steps,
+        (
+          Step('call', 'map', (neg,), {}),
+          Step('call', 'filter', (bool,), {}),
+          Step('call', 'tuple', (), {}),
+        )
+      )
+    self.assertEqual(Pipe().blueprint().steps, ())
+    self.assertIn('built_in_functions', pipe_1.blueprint().add_ins)
+
+  def test_by_reference(self):
+    # functions from modules pickle without cloudpickle
+    blueprint_1 = Pipe().map(neg).enumerate().list().blueprint()
+    rebuilt_1 = pickle.loads(pickle.dumps(blueprint_1)).build()
+    self.assertEqual(rebuilt_1((1, 2)), [(0, -1), (1, -2)])
+    self.assertEqual(pickle.loads(pickle.dumps(blueprint_1)), blueprint_1)
+
+  def test_lambdas(self):
+    self.assertRebuilds(
+        Pipe().map(lambda x, y: x + y).filter(lambda x: x > 2),
+        ((1, 1), (2, 2), (3, 3))
+      )
+
+  def test_bypasses(self):
+    data_1 = (1, 2), (3, 4)
+    self.assertRebuilds(Pipe().carry_key.map(neg).re_key, data_1)
+    self.assertRebuilds(Pipe().carry_value.map(neg).re_value.drop_key, data_1)
+    self.assertRebuilds(Pipe().keyed.map(neg).grab[1], (1, 2))
+
+    data_2 = ({'a': 1, 'b': 2},)
+    self.assertRebuilds(Pipe().map(dict).dict_key['a'].map(neg), data_2)
+    self.assertRebuilds(Pipe().map(dict).carry_dict['b'].map(neg).return_dict, data_2)
+
+  def test_valve(self):
+    blueprint_1 = Pipe().map(neg).max().blueprint()
+    self.assertEqual(Blueprint.loads(blueprint_1.dumps()).build()((1, 2, 3)), -1)
+
+  def test_worker(self):
+    data_1 = Pipe().map(lambda x: x * x).sum().blueprint().dumps()
+    with ProcessPoolExecutor(1, initializer=init_worker, initargs=(data_1,)) as pool:
+      self.assertEqual(list(pool.map(run_worker, ((1, 2), (3,)))), [5, 9])
+
+    data_2 = Pipe().map(neg).blueprint().dumps()
+    with ProcessPoolExecutor(1, initializer=init_worker, initargs=(data_2,)) as pool:
+      self.assertEqual(list(pool.map(run_worker, ((1, 2),))), [[-1, -2]])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -290,6 +290,13 @@ class TestMethods(unittest.TestCase):
         tuple(filter(lambda kargs: func_3(**kargs), data_3))
       )
 
+    # builtins without a signature
+    self.assertEqual(tuple(Pipe((0, 1, '', 'a')).filter(bool)), (1, 'a'))
+
+    pipe_1 = Pipe().filter(func_2).tuple()
+    self.assertEqual(pipe_1(data_2), ((3, 4), (5, 6)))
+    self.assertEqual(pipe_1(iter(data_2)), ((3, 4), (5, 6))) # reload the pipe
+
   def test_zip(self):
     data_1 = 1, 2, 3, 4
 
@@ -112,6 +112,27 @@ class TestBypass(unittest.TestCase):
     self.assertEqual(tuple(bpp_2), ())
 
 
+  def test_close(self):
+    data_1 = (1, 2), (3, 4), (5, 6)
+    drip_1 = Drip()
+    res_1 = Reservoir(data_1)
+
+    bpp = Bypass(
+        bypass = map(lambda b: 2 * b, drip_1),
+        iterable = res_1,
+        drip_handle = drip_1,
+        split = lambda key_val: key_val,
+        merge = lambda key, bypass_val: (key, bypass_val),
+      )
+
+    self.assertEqual(next(bpp), (1, 4))
+    bpp.close()
+    self.assertIsNone(bpp.store)
+    self.assertFalse(res_1.not_empty())
+    with self.assertRaises(StopIteration):
+      next(bpp)
+
+
 class TestDrip(unittest.TestCase):
   def test_init_call_next_iter(self):
     drip_1 = Drip()
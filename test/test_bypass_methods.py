@@ -1,6 +1,7 @@
 import unittest
 
 from functional_pipes import Pipe
+from functional_pipes.bypass_methods import RowMask
 from test_bypass import Expand
 
 
@@ -10,12 +11,14 @@ class TestPipeBypasses(unittest.TestCase):
     Pipe.add_method(gener=filter, iter_index=1)
     Pipe.add_method(Expand)
     Pipe.add_method(gener=tuple, is_valve=True)
+    Pipe.add_method(gener=zip)
 
   @classmethod
   def tearDownClass(self):
     delattr(Pipe, 'filter')
     delattr(Pipe, 'Expand')
     delattr(Pipe, 'tuple')
+    delattr(Pipe, 'zip')
 
   def test_carry_key_no_size_change(self):
     data_1 = (1, 2), (3, 4), (5, 6)
@@ -99,6 +102,175 @@ class TestPipeBypasses(unittest.TestCase):
         (dict(a=1, b=4, c=3), dict(a=4, b=10, c=6), dict(a=7, b=16, c=9))
       )
 
+  def test_carry_column(self):
+    batch_1 = dict(a=[1, 2, 3], b=[4, 5, 6], c=('x', 'y', 'z'))
+
+    # the whole column goes through the bypass
+    columns = []
+    self.assertEqual(
+        Pipe([batch_1]
+          ).carry_column['b'].map(lambda col: columns.append(col) or [2 * val for val in col]
+          ).return_column.tuple(),
+        (dict(a=[1, 2, 3], b=[8, 10, 12], c=('x', 'y', 'z')),)
+      )
+    self.assertEqual(columns, [[4, 5, 6]])
+    self.assertEqual(batch_1['b'], [4, 5, 6])
+
+    # a row mask drops rows from every column
+    batch_2 = dict(a=[1, 2, 3], b=[4, 5, 6], c=('x', 'y', 'z'))
+    pipe_2 = Pipe().carry_column['b'].map(lambda col: RowMask([val != 5 for val in col])
+      ).return_column.tuple()
+    self.assertEqual(
+        pipe_2([batch_2]),
+        (dict(a=[1, 3], b=[4, 6], c=('x', 'z')),)
+      )
+    self.assertEqual(
+        pipe_2([dict(a=[7], b=[5])]),
+        (dict(a=[], b=[]),)
+      )
+
+    # a row mask with new values for the kept rows
+    self.assertEqual(
+        Pipe([batch_2]
+          ).carry_column['b'].map(lambda col: RowMask([True, False, True], [-1, -2])
+          ).return_column.tuple(),
+        (dict(a=[1, 3], b=[-1, -2], c=('x', 'z')),)
+      )
+
+    # a filtered column drops the batch and an expanded one repeats it
+    self.assertEqual(
+        Pipe([batch_1]).carry_column['b'].filter(lambda col: len(col) > 3).return_column.tuple(),
+        ()
+      )
+    self.assertEqual(
+        Pipe([dict(a=[1], b=[4])]
+          ).carry_column['b'].Expand().map(lambda i: [i]
+          ).return_column.tuple(),
+        (dict(a=[1], b=[0]), dict(a=[1], b=[1]))
+      )
+
+    with self.assertRaises(ValueError):
+      Pipe([batch_1]).carry_column['b'].map(lambda col: col[1:]).return_column.tuple()
+    with self.assertRaises(ValueError):
+      Pipe([batch_1]).carry_column['b'].map(lambda col: RowMask([True])).return_column.tuple()
+
+  def test_carry_column_ndarray(self):
+    import numpy as np
+
+    batch = dict(a=np.array([1, 2, 3]), b=np.array([4., 5., 6.]), c=['x', 'y', 'z'])
+    result = Pipe([batch]
+      ).carry_column['b'].map(lambda col: RowMask(col > 4, col[col > 4] * 2)
+      ).return_column.tuple()
+
+    self.assertEqual(len(result), 1)
+    self.assertTrue(np.array_equal(result[0]['a'], [2, 3]))
+    self.assertTrue(np.array_equal(result[0]['b'], [10., 12.]))
+    self.assertEqual(result[0]['c'], ['y', 'z'])
+
+    # every row masked out keeps the dtypes
+    batch = dict(a=np.array([1, 2]), b=np.array([4, 5]))
+    result = Pipe([batch]).carry_column['b'].map(lambda col: RowMask(col > 9)).return_column.tuple()
+    self.assertEqual(result[0]['a'].dtype, batch['a'].dtype)
+    self.assertEqual(result[0]['b'].dtype, batch['b'].dtype)
+    self.assertEqual(len(result[0]['b']), 0)
+
+  def test_block_carry_key(self):
+    blocks_1 = [(1, 2), (3, 4), (5, 6)], [(7, 8)]
+
+    # no size change
+    pipe_1 = Pipe().block_carry_key.map(lambda b: 2 * b).block_re_key
+    self.assertEqual(tuple(pipe_1(blocks_1)), ([(1, 4), (3, 8), (5, 12)], [(7, 16)]))
+    self.assertEqual(tuple(pipe_1(blocks_1)), ([(1, 4), (3, 8), (5, 12)], [(7, 16)]))  # not a repeat
+
+    # shrink, an empty block stays
+    self.assertEqual(
+        Pipe(blocks_1).block_carry_key.filter(lambda b: b not in (4, 8)).block_re_key.tuple(),
+        ([(1, 2), (5, 6)], [])
+      )
+
+    # expand
+    self.assertEqual(
+        Pipe([((1, 2), (3, 4))]).block_carry_key.Expand().block_re_key.tuple(),
+        (((1, 0), (1, 1), (3, 0), (3, 1)),)
+      )
+
+    # carry_value and nested bypasses
+    self.assertEqual(
+        Pipe([[(1, (2, 3)), (4, (5, 6))]]
+          ).block_carry_value.map(lambda a: -a
+          ).block_re_value.block_carry_key.carry_key.map(lambda c: 10 * c).re_key.filter(
+            lambda pair: pair[0] != 5
+          ).block_re_key.tuple(),
+        ([(-1, (2, 30))],)
+      )
+
+  def test_block_carry_key_state(self):
+    Pipe.load('rolling_pipes')
+    try:
+      blocks = [[(1, 10), (2, 20), (3, 30)], [(4, 40), (5, 50)], [(6, 60)]]
+      pairs = [pair for block in blocks for pair in block]
+
+      # segments keep their state from one block to the next like in carry_key
+      pipe_1 = Pipe().block_carry_key.rolling_sum(2).block_re_key
+      expected = [[(2, 30), (3, 50)], [(4, 70), (5, 90)], [(6, 110)]]
+      self.assertEqual(list(pipe_1(blocks)), expected)
+      self.assertEqual(list(pipe_1(blocks)), expected)  # emptied between uses
+      self.assertEqual(
+          [pair for block in expected for pair in block],
+          list(Pipe(pairs).carry_key.rolling_sum(2).re_key)
+        )
+    finally:
+      Pipe.unload('rolling_pipes')
+
+  def test_block_carry_key_ndarray(self):
+    import numpy as np
+
+    block = np.array([[1., 2.], [3., 4.], [5., 6.]])
+    result = Pipe([block]
+      ).block_carry_key.filter(lambda b: b > 2).map(lambda b: 10 * b
+      ).block_re_key.tuple()
+
+    self.assertEqual(len(result), 1)
+    self.assertTrue(np.array_equal(result[0], [[3., 40.], [5., 60.]]))
+
+    result = Pipe([block]).block_carry_value.map(lambda a: -a).block_re_value.tuple()
+    self.assertTrue(np.array_equal(result[0], [[-1., 2.], [-3., 4.], [-5., 6.]]))
+
+    # maps of ufuncs get the whole column
+    pipe_1 = Pipe().block_carry_key.map(np.negative).map(np.exp2).block_re_key
+    self.assertEqual(pipe_1.function_pipe.column_functions, [np.negative, np.exp2])
+    result = tuple(pipe_1([block, block[:1]]))
+    self.assertTrue(np.array_equal(result[0], [[1., .25], [3., .0625], [5., .015625]]))
+    self.assertTrue(np.array_equal(result[1], [[1., .25]]))
+
+    # lists of pairs still go through one value at a time
+    self.assertEqual(tuple(pipe_1([[(1, 2)]])), ([(1, .25)],))
+
+    self.assertIsNone(Pipe().block_carry_key.map(np.add).block_re_key.function_pipe.column_functions)
+    self.assertIsNone(
+        Pipe().block_carry_key.map(np.negative).map(abs).block_re_key.function_pipe.column_functions)
+
+  def test_block_carry_dict(self):
+    block_1 = [dict(a=1, b=2), dict(a=3, b=4)]
+    self.assertEqual(
+        Pipe([block_1]
+          ).block_carry_dict['b'].filter(lambda b: b > 2).map(lambda b: 10 * b
+          ).block_return_dict.tuple(),
+        ([dict(a=3, b=40)],)
+      )
+
+    block_2 = dict(a=1, b=2), dict(a=3, b=4)
+    self.assertEqual(
+        Pipe([block_2]
+          ).block_carry_dict[['a', 'b']].map(lambda a, b: (b, a)
+          ).block_return_dict.tuple(),
+        ((dict(a=2, b=1), dict(a=4, b=3)),)
+      )
+
+    # repeated rows are copies
+    result = Pipe([[dict(a=5)]]).block_carry_dict['a'].Expand().block_return_dict.tuple()
+    self.assertEqual(result, ([dict(a=0), dict(a=1)],))
+
   def test_keyed(self):
     data = 1, 2, 3, 4
     ref = tuple((val, 2 * val) for val in data)
@@ -121,3 +293,75 @@ class TestPipeBypasses(unittest.TestCase):
           ).tuple(),
         (dict(a=1, b=4, c=3), dict(a=4, b=10, c=6), dict(a=7, b=16, c=9))
       )
+
+  def test_dict_key_list(self):
+    data = lambda: (dict(a=1, b=2, c=3), dict(a=4, b=5, c=6), dict(a=7, b=8, c=9))
+
+    self.assertEqual(
+        Pipe(data()
+          ).dict_key[['a', 'c']].map(lambda a, c: (c, a)
+          ).tuple(),
+        (dict(a=3, b=2, c=1), dict(a=6, b=5, c=4), dict(a=9, b=8, c=7))
+      )
+
+    # a list of one key is the same as the key
+    self.assertEqual(
+        Pipe(data()).dict_key[['b']].map(lambda b: b + 1).tuple()[0],
+        dict(a=1, b=3, c=3)
+      )
+    self.assertEqual(
+        Pipe([data()]).block_carry_dict[['b']].map(lambda b: b + 1).block_return_dict.tuple()[0][0],
+        dict(a=1, b=3, c=3)
+      )
+
+    self.assertEqual(
+        Pipe(data()
+          ).carry_dict[['a', 'b']].filter(lambda values: values[0] > 1
+            ).map(lambda a, b: (a + b, a - b)
+          ).return_dict.tuple(),
+        (dict(a=9, b=-1, c=6), dict(a=15, b=-1, c=9))
+      )
+
+    with self.assertRaises(ValueError):
+      Pipe(data()).dict_key[['a', 'b']].map(lambda a, b: (a,)).tuple()
+    with self.assertRaises(ValueError):
+      Pipe(data()).carry_dict[[]]
+
+  def test_close(self):
+    closed = []
+    def source(data):
+      try:
+        yield from data
+      finally:
+        closed.append(True)
+
+    data = (1, 2), (3, 4), (5, 6)
+
+    pipe_1 = Pipe().carry_key.map(lambda b: 2 * b).re_key
+    self.assertEqual(next(pipe_1(source(data))), (1, 4))
+    pipe_1.close()
+    self.assertEqual(closed, [True])
+    self.assertEqual(tuple(pipe_1(data)), ((1, 4), (3, 8), (5, 12)))
+
+  def test_end_keeps_source_open(self):
+    '''
+    The end of the stream only closes the segments of the bypass, not the source.
+    '''
+    from io import StringIO
+
+    file = StringIO('a\nb\nc\n')
+    result = Pipe(file).zip((1,)).carry_value.map(str.strip).re_value.tuple()
+    self.assertEqual(result, (('a', 1),))
+    self.assertFalse(file.closed)
+    self.assertEqual(file.readline(), 'c\n')  # zip drew 'b' before it stopped
+
+    class Blocks(list):
+      closed = False
+      def close(self):
+        self.closed = True
+
+    blocks = Blocks(([(1, 2)], [(3, 4)], [(5, 6)]))
+    result = Pipe(blocks).zip((1,)).map(lambda block, one: block
+      ).block_carry_key.map(lambda b: -b).block_re_key.tuple()
+    self.assertEqual(result, ([(1, -2)],))
+    self.assertFalse(blocks.closed)
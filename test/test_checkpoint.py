@@ -0,0 +1,150 @@
+import os
+import unittest
+from operator import add
+from tempfile import TemporaryDirectory
+
+from functional_pipes import Pipe
+from functional_pipes.checkpoint import read_checkpoint
+from functional_pipes.sketches import HyperLogLog
+
+
+class Crash(Exception):
+  pass
+
+
+class TestCheckpoint(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    Pipe.load('built_in_functions', 'custom_pipes', 'sketch_pipes')
+
+  @classmethod
+  def tearDownClass(self):
+    Pipe.unload('built_in_functions', 'custom_pipes', 'sketch_pipes')
+
+  def setUp(self):
+    self.directory = TemporaryDirectory()
+    self.path = os.path.join(self.directory.name, 'run.ckpt')
+    self.seen = []
+
+  def tearDown(self):
+    self.directory.cleanup()
+
+  def make_pipe(self, crash_at=None, valve='sum', every=100):
+    '''
+    Pipe that records what map sees and raises Crash on crash_at.
+    '''
+    def record(x):
+      x = int(x)
+      if x == crash_at:
+        raise Crash
+      self.seen.append(x)
+      return x
+
+    return getattr(Pipe().map(record).checkpoint(self.path, every=every), valve)
+
+  def test_sequence(self):
+    data_1 = tuple(range(1000))
+
+    with self.assertRaises(Crash):
+      self.make_pipe(crash_at=550)()(data_1)
+
+    checkpoint_1 = read_checkpoint(self.path)
+    self.assertEqual(checkpoint_1['offset'], 500)
+    self.assertEqual(checkpoint_1['passed'], 500)
+    self.assertEqual(checkpoint_1['state'], [sum(range(500))])
+
+    self.seen = []
+    self.assertEqual(self.make_pipe()().resume()(data_1), sum(data_1))
+    self.assertEqual(self.seen, list(range(500, 1000)))
+
+    # a pipe that is not resumed starts from the beginning
+    self.seen = []
+    self.assertEqual(self.make_pipe()()(data_1), sum(data_1))
+    self.assertEqual(len(self.seen), 1000)
+
+  def test_file(self):
+    source = os.path.join(self.directory.name, 'numbers.txt')
+    with open(source, 'w') as file:
+      file.writelines('{}\n'.format(i) for i in range(1000))
+
+    with self.assertRaises(Crash), open(source) as file:
+      self.make_pipe(crash_at=777)()(file)
+
+    self.seen = []
+    with open(source) as file:
+      self.assertEqual(self.make_pipe()().resume()(file), sum(range(1000)))
+    self.assertEqual(self.seen, list(range(700, 1000)))
+
+    with open(source, 'rb') as file:
+      self.assertEqual(self.make_pipe()()(file), sum(range(1000)))
+
+  def test_iterator(self):
+    # without a position the objects are recomputed but not passed on again
+    with self.assertRaises(Crash):
+      self.make_pipe(crash_at=250)()(iter(range(300)))
+    self.assertIsNone(read_checkpoint(self.path)['offset'])
+
+    self.seen = []
+    self.assertEqual(self.make_pipe()().resume()(iter(range(300))), sum(range(300)))
+    self.assertEqual(len(self.seen), 300)
+
+  def test_preloaded(self):
+    def crash(x):
+      if x == 150:
+        raise Crash
+      return x
+
+    with self.assertRaises(Crash):
+      Pipe(range(200)).map(crash).checkpoint(self.path, every=100).aggregate(add, 0)
+
+    self.assertEqual(
+        Pipe(range(200)).checkpoint(self.path).resume().aggregate(add, 0),
+        sum(range(200))
+      )
+
+  def test_sketch(self):
+    data_1 = tuple(range(1000))
+
+    with self.assertRaises(Crash):
+      self.make_pipe(crash_at=900, valve='hyperloglog')(precision=10)(data_1)
+    self.assertIsInstance(read_checkpoint(self.path)['state'], HyperLogLog)
+
+    sketch_1 = self.make_pipe(valve='hyperloglog')(precision=10).resume()(data_1)
+    sketch_2 = Pipe(data_1).hyperloglog(precision=10)
+    self.assertEqual(sketch_1, sketch_2)
+
+  def test_no_checkpoint_file(self):
+    self.assertIsNone(read_checkpoint(self.path))
+    self.assertEqual(self.make_pipe()().resume()(range(10)), 45)
+
+  def test_valve_without_state(self):
+    pipe_1 = self.make_pipe(valve='list', every=3)()
+    self.assertEqual(pipe_1(range(10)), list(range(10)))
+    self.assertEqual(read_checkpoint(self.path)['passed'], 9)
+
+    # list would only get the objects after the checkpoint
+    with self.assertRaises(ValueError):
+      pipe_1.resume()(range(10))
+    self.assertEqual(pipe_1(range(10)), list(range(10)))
+
+    # without a valve the processed input is skipped
+    pipe_2 = Pipe().checkpoint(self.path)
+    self.assertEqual(list(pipe_2.resume()(range(12))), [9, 10, 11])
+
+  def test_atomic(self):
+    self.make_pipe(every=10)()(range(100))
+    self.assertEqual(os.listdir(self.directory.name), ['run.ckpt'])
+
+  def test_errors(self):
+    with self.assertRaises(ValueError):
+      Pipe().checkpoint(self.path, every=0)
+
+    with self.assertRaises(ValueError):
+      Pipe().carry_key.checkpoint(self.path)
+
+    with self.assertRaises(ValueError):
+      Pipe().map(abs).resume()
+
+
+if __name__ == '__main__':
+  unittest.main()
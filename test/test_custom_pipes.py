@@ -49,6 +49,119 @@ class TestMethods(unittest.TestCase):
     pipe_1 = Pipe().zip_to_dict().limit_size(2).tuple()
     self.assertEqual(pipe_1(data_1), result_1)
 
+  def test_count(self):
+    data_1 = 1, 2, 3
+
+    self.assertEqual(Pipe(data_1).count(), 3)
+    self.assertEqual(Pipe(range(10)).map(lambda x: x * 2).count(), 10)
+    self.assertEqual(Pipe(range(10)).filter(lambda x: x % 2).count(), 5)
+    self.assertEqual(Pipe(iter(data_1)).count(), 3)
+    self.assertEqual(Pipe(()).count(), 0)
+
+    # known length does not run the pipe
+    ran = []
+    self.assertEqual(Pipe(data_1).map(ran.append).count(), 3)
+    self.assertEqual(ran, [])
+
+    pipe_1 = Pipe().map(lambda x: x * 2).count()
+    self.assertEqual(pipe_1(data_1), 3)
+    self.assertEqual(pipe_1(data_1), 3) # reload the pipe
+    self.assertEqual(pipe_1(iter(data_1)), 3)
+
+    # the source is not closed
+    class Source(list):
+      closed = False
+      def close(self):
+        self.closed = True
+
+    source = Source(data_1)
+    self.assertEqual(pipe_1(source), 3)
+    self.assertFalse(source.closed)
+
+  def test_join(self):
+    names = (1, 'John'), (2, 'Billy'), (4, 'Cait')
+    ages = (1, 5), (1, 6), (3, 9), (4, 12)
+    id_key = lambda id, value: id
+    inner = (
+        ((1, 'John'), (1, 5)),
+        ((1, 'John'), (1, 6)),
+        ((4, 'Cait'), (4, 12)),
+      )
+
+    # hash built from ages
+    self.assertEqual(Pipe(iter(names)).join(ages, id_key).tuple(), inner)
+    self.assertEqual(
+        Pipe(iter(names)).join(ages, id_key, how='left').tuple(),
+        inner[:2] + (((2, 'Billy'), None),) + inner[2:]
+      )
+
+    # hash built from the shorter names
+    self.assertEqual(Pipe(names).join(ages, id_key).tuple(), inner)
+    self.assertEqual(
+        Pipe(names).join(ages, id_key, how='left').tuple(),
+        inner + (((2, 'Billy'), None),)
+      )
+
+    # keys by name and different keys for each side
+    self.assertEqual(
+        Pipe(names).join(ages, left_key=lambda name: name[0]).tuple(),
+        inner
+      )
+    self.assertEqual(
+        Pipe(names).join(tuple(age for id, age in ages), id_key, lambda age: age // 5).tuple(),
+        (((1, 'John'), 5), ((1, 'John'), 6), ((1, 'John'), 9), ((2, 'Billy'), 12))
+      )
+
+    # star wrapped keys however they are passed
+    self.assertEqual(Pipe(names).join(ages, id_key, id_key).tuple(), inner)
+    self.assertEqual(Pipe(names).join(ages, left_key=id_key, right_key=id_key).tuple(), inner)
+    self.assertEqual(Pipe(iter(names)).join(ages, left_key=id_key).tuple(), inner)
+
+    # the length of the pipe is known through length keeping segments
+    self.assertEqual(
+        Pipe(names).map(lambda id, name: (id, name)).join(ages, id_key, how='left').tuple(),
+        inner + (((2, 'Billy'), None),)
+      )
+
+    # carry_key keeps the left object
+    self.assertEqual(
+        Pipe(names).join(ages, id_key).carry_key.map(id_key).re_key.tuple(),
+        tuple((left, id) for left, (id, age) in inner)
+      )
+
+    pipe_1 = Pipe().join(ages, id_key).tuple()
+    self.assertEqual(pipe_1(names), inner)
+    self.assertEqual(pipe_1(names[:1]), inner[:2]) # reload the pipe
+
+    with self.assertRaises(ValueError):
+      Pipe(names).join(ages, id_key, how='outer').tuple()
+
+  def test_merge_join(self):
+    left = 1, 2, 2, 4, 6
+    right = 2, 3, 4, 4, 5
+    identity = lambda x: x
+
+    self.assertEqual(
+        Pipe(left).merge_join(right, identity).tuple(),
+        ((2, 2), (2, 2), (4, 4), (4, 4))
+      )
+    self.assertEqual(
+        Pipe(left).merge_join(right, identity, how='left').tuple(),
+        ((1, None), (2, 2), (2, 2), (4, 4), (4, 4), (6, None))
+      )
+    self.assertEqual(
+        Pipe((('a', 1), ('b', 3))).merge_join(((1, 'x'), (3, 'y')), lambda name, id: id, lambda r: r[0]).tuple(),
+        ((('a', 1), (1, 'x')), (('b', 3), (3, 'y')))
+      )
+
+    # right side is streamed
+    self.assertEqual(
+        Pipe(left).merge_join(iter(right), identity).tuple(),
+        ((2, 2), (2, 2), (4, 4), (4, 4))
+      )
+    self.assertEqual(Pipe(()).merge_join(right, identity).tuple(), ())
+    self.assertEqual(Pipe(left).merge_join((), identity).tuple(), ())
+
 
 if __name__ == '__main__':
   unittest.main()
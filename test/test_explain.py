@@ -0,0 +1,69 @@
+import unittest
+
+from functional_pipes import Pipe
+
+
+class TestExplain(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    Pipe.load('built_in_functions')
+
+  @classmethod
+  def tearDownClass(self):
+    Pipe.unload('built_in_functions')
+
+  def rows(self, text):
+    '''
+    The segment and flags columns of each row after the header.
+    '''
+    lines = text.split('\n')
+    segment_at = lines[0].index('segment')
+    flags_at = lines[0].index('flags')
+    return [(line[segment_at:flags_at].rstrip(), line[flags_at:].split('  ')[0])
+            for line in lines[1:]]
+
+  def test_segments(self):
+    pipe_1 = Pipe().map(lambda x, y: x + y).filter(abs).carry_key.map(abs).re_key.list()
+
+    self.assertEqual(
+        self.rows(pipe_1.explain()),
+        [
+          ('reservoir', ''),
+          ('map(<lambda>)', 'star, keeps length, fusable, parallel'),
+          ('filter(abs)', 'fusable, vectorizable, parallel'),
+          ('carry_key', 'bypass open'),
+          ('  map(abs)', 'keeps length, fusable, vectorizable, parallel'),
+          ('re_key', 'bypass close'),
+          ('list()', 'valve'),
+        ]
+      )
+
+  def test_item_bypass(self):
+    pipe_1 = Pipe().dict_key['a'].map(abs).enumerate()
+    self.assertEqual(
+        self.rows(pipe_1.explain()),
+        [
+          ('reservoir', ''),
+          ("dict_key['a']", 'bypass open'),
+          ('  map(abs)', 'keeps length, fusable, vectorizable, parallel'),
+          ('close bypass', 'bypass close'),
+          ('enumerate()', 'keeps length, vectorizable'),
+        ]
+      )
+
+  def test_sample(self):
+    pipe_1 = Pipe().filter(lambda x, y: x % 2).carry_key.map(abs).re_key.list()
+    lines = pipe_1.explain(((i, -i) for i in range(10))).split('\n')
+
+    in_at = lines[0].index('in')
+    counts = [line[in_at:].split()[:2] for line in lines[1:]]
+    self.assertEqual(counts, [[], ['10', '5'], ['5'], ['5', '5'], ['5', '5'], ['5', '1']])
+
+    self.assertTrue(all(line.endswith(' us') for line in lines[2:] if 'bypass open' not in line))
+
+    # the explained pipe is not run
+    self.assertEqual(pipe_1(((1, -1),)), [(1, 1)])
+
+
+if __name__ == '__main__':
+  unittest.main()
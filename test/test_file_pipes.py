@@ -0,0 +1,142 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from functional_pipes import Pipe
+from functional_pipes.add_ins import file_pipes
+from functional_pipes.add_ins.file_pipes import Written
+
+
+def write_three(fd, blocks):
+  '''
+  Writes at most 3 bytes like a slow pipe or socket would.
+  '''
+  return os.write(fd, b''.join(blocks)[:3])
+
+
+class TestMethods(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    Pipe.load('file_pipes')
+
+  @classmethod
+  def tearDownClass(self):
+    Pipe.unload('file_pipes')
+
+  def setUp(self):
+    self.directory = TemporaryDirectory()
+
+  def tearDown(self):
+    self.directory.cleanup()
+
+  def path(self, name):
+    return os.path.join(self.directory.name, name)
+
+  def read(self, name, mode='r', **kargs):
+    with open(self.path(name), mode, **kargs) as file:
+      return file.read()
+
+  def test_write_lines(self):
+    data_1 = [str(i) for i in range(5000)]
+    self.assertEqual(Pipe(data_1).write_lines(self.path('a.txt')), Written(5000, 23890))
+    self.assertEqual(self.read('a.txt'), '\n'.join(data_1) + '\n')
+
+    # objects that are not str, other newlines and encodings, many small writes
+    data_2 = 1, 'é', None
+    written_2 = Pipe(data_2).write_lines(self.path('b.txt'), 'latin-1', buffer_size=1, newline='\r\n')
+    self.assertEqual(written_2, Written(3, 12))
+    self.assertEqual(self.read('b.txt', 'rb'), b'1\r\n\xe9\r\nNone\r\n')
+
+    self.assertEqual(Pipe(()).write_lines(self.path('c.txt')), Written(0, 0))
+    self.assertEqual(self.read('c.txt'), '')
+
+    # reusable pipes replace the file
+    pipe_1 = Pipe().write_lines(self.path('d.txt'))
+    pipe_1('abc')
+    self.assertEqual(pipe_1('de'), Written(2, 4))
+    self.assertEqual(self.read('d.txt'), 'd\ne\n')
+
+    with self.assertRaises(ValueError):
+      Pipe(data_1).write_lines(self.path('e.txt'), buffer_size=0)
+
+  def test_write_bytes(self):
+    data_1 = b'ab', bytearray(b'cd'), memoryview(b'ef')
+    self.assertEqual(Pipe(data_1).write_bytes(self.path('a.bin')), Written(3, 6))
+    self.assertEqual(self.read('a.bin', 'rb'), b'abcdef')
+
+    # large objects are written without being joined
+    data_2 = [bytes([i]) * 100000 for i in range(3)]
+    self.assertEqual(Pipe(data_2).write_bytes(self.path('b.bin'), 1000), Written(3, 300000))
+    self.assertEqual(self.read('b.bin', 'rb'), b''.join(data_2))
+
+  def test_partial_writes(self):
+    data_1 = [bytes([i]) * 10 for i in range(5)] + [b'x' * 100000]
+    with mock.patch.object(file_pipes, '_writev', write_three):
+      written_1 = Pipe(data_1).write_bytes(self.path('a.bin'), buffer_size=7)
+    self.assertEqual(written_1, Written(6, 100050))
+    self.assertEqual(self.read('a.bin', 'rb'), b''.join(data_1))
+
+  def test_write_sharded(self):
+    pattern = self.path('part-{}.txt')
+
+    written_1 = Pipe(range(10)).write_sharded(pattern, 3, lambda x: x // 4)
+    self.assertEqual(written_1, (Written(4, 8), Written(4, 8), Written(2, 4)))
+    self.assertEqual(self.read('part-1.txt'), '4\n5\n6\n7\n')
+    self.assertEqual(self.read('part-2.txt'), '8\n9\n')
+
+    # dealt in turn
+    written_2 = Pipe(range(5000)).write_sharded(pattern, 2)
+    self.assertEqual([written.objects for written in written_2], [2500, 2500])
+    self.assertEqual(self.read('part-0.txt').split(), [str(i) for i in range(0, 5000, 2)])
+
+    # star wrapped key and bytes
+    data_3 = (b'a', 1), (b'b', 2), (b'c', 3), (b'd', 4)
+    written_3 = Pipe(data_3).map(lambda value, shard: value) \
+      .write_sharded(pattern, 2, binary=True)
+    self.assertEqual(written_3, (Written(2, 2), Written(2, 2)))
+    self.assertEqual(self.read('part-1.txt'), 'bd')
+
+    written_4 = Pipe(data_3).write_sharded(pattern, 2, lambda value, shard: shard, newline=',')
+    self.assertEqual(self.read('part-0.txt'), "(b'b', 2),(b'd', 4),")
+    self.assertEqual(written_4[1].objects, 2)
+
+    with self.assertRaises(ValueError):
+      Pipe(range(3)).write_sharded(pattern, 0)
+
+  def test_errors(self):
+    def fail(fd, blocks):
+      raise OSError('disk full')
+
+    def upstream(x):
+      raise KeyError(x)
+
+    # the error of the pipe is not hidden by writing what is left
+    with mock.patch.object(file_pipes, '_writev', fail):
+      with self.assertRaises(KeyError):
+        Pipe(range(3)).map(upstream).write_lines(self.path('a.txt'))
+      with self.assertRaises(KeyError):
+        Pipe(range(3)).map(upstream).write_sharded(self.path('part-{}.txt'), 2)
+
+    # a shard that fails to close does not leave the other files open
+    opened = []
+    file_open = os.open
+
+    def record_open(*args):
+      fd = file_open(*args)
+      opened.append(fd)
+      return fd
+
+    with mock.patch.object(file_pipes.os, 'open', record_open), \
+        mock.patch.object(file_pipes, '_writev', fail):
+      with self.assertRaises(OSError):
+        Pipe(range(10)).write_sharded(self.path('part-{}.txt'), 3)
+
+    self.assertEqual(len(opened), 3)
+    for fd in opened:
+      with self.assertRaises(OSError):
+        os.fstat(fd)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -34,6 +34,26 @@ class TestMethods(unittest.TestCase):
         tuple(map(lambda kargs: func_3(**kargs), data_3))
       )
 
+    # starmap fast path keeps the pipe reusable
+    pipe_1 = Pipe().map(func_2).tuple()
+    self.assertEqual(pipe_1(data_2), tuple(map(lambda pair: func_2(*pair), data_2)))
+    self.assertEqual(pipe_1(data_2[:1]), (False,)) # reload the pipe
+
+    self.assertEqual(tuple(Pipe(data_1).map(str)), ('1', '2', '3', '4'))
+
+  def test_call_method(self):
+    data = 'a b', 'c-d'
+
+    self.assertEqual(Pipe(data).call_method('split').tuple(), (['a', 'b'], ['c-d']))
+    self.assertEqual(
+        Pipe(data).call_method('split', '-').tuple(),
+        (['a b'], ['c', 'd'])
+      )
+    self.assertEqual(
+        Pipe(data).call_method('split', maxsplit=0).tuple(),
+        (['a b'], ['c-d'])
+      )
+
   def test_flatten(self):
     data = (1, 2), (3, 4, 5)
     ref = 1, 2, 3, 4, 5
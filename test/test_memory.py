@@ -0,0 +1,85 @@
+import tracemalloc
+import unittest
+
+from functional_pipes import Pipe
+
+
+def make_list(x):
+  return [x] * 1000
+
+
+class TestMemoryProfile(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    Pipe.load('built_in_functions')
+
+  @classmethod
+  def tearDownClass(self):
+    Pipe.unload('built_in_functions')
+
+  def rows(self, text):
+    '''
+    segment: (in, out, peak, retained) for each segment, sizes in bytes.
+    '''
+    lines = text.split('\n')
+    header = lines[0]
+    starts = [header.index(name) for name in ('segment', 'in', 'out', 'peak', 'retained')]
+
+    rows = {}
+    for line in lines[1:lines.index('')]:
+      cells = [line[start:end].rstrip() for start, end in zip(starts, starts[1:] + [None])]
+      cells[1:] = [cell.strip() for cell in cells[1:]]
+      rows[cells[0]] = cells[1:3] + [self.size(cell) for cell in cells[3:]]
+    return rows
+
+  def size(self, text):
+    number, unit = text.split()
+    return float(number) * dict(B=1, KiB=2**10, MiB=2**20, GiB=2**30)[unit]
+
+  def test_segments(self):
+    pipe_1 = Pipe().filter(lambda x: x % 2).map(make_list).sorted()
+    text = pipe_1.memory_profile(range(200))
+    rows = self.rows(text)
+
+    self.assertEqual(list(rows), ['reservoir', 'filter(<lambda>)', 'map(make_list)', 'sorted()'])
+    self.assertEqual(rows['filter(<lambda>)'][:2], ['200', '100'])
+    self.assertEqual(rows['sorted()'][:2], ['100', '1'])
+
+    # each list is 8 kB of pointers, kept by the valve
+    self.assertGreater(rows['map(make_list)'][3], 100 * 8000)
+    self.assertLess(rows['filter(<lambda>)'][3], 100 * 8000)
+    self.assertGreater(rows['sorted()'][2], 100 * 8000)
+    self.assertLess(rows['map(make_list)'][2], 2 * 8000)
+
+    # the lists were made in make_list
+    lines = text.split('\n')
+    self.assertIn('test_memory.py:8 ', lines[lines.index('') + 2])
+
+    self.assertFalse(tracemalloc.is_tracing())
+    self.assertEqual(pipe_1(range(4)), [[1] * 1000, [3] * 1000])
+
+  def test_bypass(self):
+    pipe_1 = Pipe().keyed.map(make_list).carry_key.map(len).re_key
+    rows = self.rows(pipe_1.memory_profile(range(50), sites=0))
+
+    self.assertEqual(
+        list(rows),
+        ['reservoir', 'keyed', '  map(make_list)', 'carry_key', '  map(len)', 're_key'])
+    self.assertEqual(rows['re_key'][:2], ['50', '50'])
+    self.assertEqual(rows['  map(make_list)'][:2], ['50', '50'])
+
+    # the lists are dropped when re_key puts the lengths in their place
+    self.assertGreater(rows['  map(make_list)'][3], 50 * 8000)
+    self.assertLess(rows['re_key'][3], -50 * 8000)
+
+  def test_already_tracing(self):
+    tracemalloc.start()
+    try:
+      Pipe().map(abs).list().memory_profile(range(10))
+      self.assertTrue(tracemalloc.is_tracing())
+    finally:
+      tracemalloc.stop()
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+from itertools import count
+
+from functional_pipes import Pipe
+
+
+class TestMethods(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    Pipe.load('built_in_functions', 'more_itertools_pipes')
+
+  @classmethod
+  def tearDownClass(self):
+    Pipe.unload('built_in_functions', 'more_itertools_pipes')
+
+  def test_chunked(self):
+    data_1 = tuple(range(5))
+    ref = [0, 1], [2, 3], [4]
+
+    self.assertEqual(Pipe(data_1).chunked(2).tuple(), ref)
+
+    pipe_1 = Pipe().chunked(2).tuple()
+    self.assertEqual(pipe_1(data_1), ref)
+    self.assertEqual(pipe_1(data_1), ref) # reload the pipe
+
+    # streams without buffering the reservoir
+    drawn = []
+    pipe_2 = Pipe(count()).map(lambda x: drawn.append(x) or x).chunked(3)
+    self.assertEqual(next(pipe_2), [0, 1, 2])
+    self.assertEqual(drawn, [0, 1, 2])
+
+  def test_windowed(self):
+    data_1 = tuple(range(5))
+
+    self.assertEqual(
+        Pipe(data_1).windowed(3).tuple(),
+        ((0, 1, 2), (1, 2, 3), (2, 3, 4))
+      )
+    self.assertEqual(
+        Pipe(data_1).windowed(2, step=2, fillvalue=-1).tuple(),
+        ((0, 1), (2, 3), (4, -1))
+      )
+
+    pipe_1 = Pipe().windowed(2).tuple()
+    self.assertEqual(pipe_1((1, 2, 3)), ((1, 2), (2, 3)))
+    self.assertEqual(pipe_1((4, 5)), ((4, 5),)) # reload the pipe
+
+  def test_sliced(self):
+    data_1 = tuple(range(5))
+    ref = (0, 1), (2, 3), (4,)
+
+    self.assertEqual(Pipe(data_1).sliced(2).tuple(), ref)
+    self.assertEqual(Pipe(iter(data_1)).sliced(2).tuple(), ref)
+    self.assertEqual(Pipe(()).sliced(2).tuple(), ())
+
+    pipe_1 = Pipe().sliced(2).tuple()
+    self.assertEqual(pipe_1(data_1), ref)
+    self.assertEqual(pipe_1(data_1), ref) # reload the pipe
+
+  def test_ichunked(self):
+    data_1 = tuple(range(5))
+
+    self.assertEqual(
+        Pipe(data_1).ichunked(2).map(tuple).tuple(),
+        ((0, 1), (2, 3), (4,))
+      )
+
+  def test_split_before_split_after(self):
+    data_1 = tuple(range(6))
+    data_2 = (1, 2), (3, 1), (2, 5)
+    data_3 = tuple(dict(a=a, b=b) for a, b in data_2)
+
+    self.assertEqual(
+        Pipe(data_1).split_before(lambda x: x % 3 == 0).tuple(),
+        ([0, 1, 2], [3, 4, 5])
+      )
+    self.assertEqual(
+        Pipe(data_1).split_after(lambda x: x % 3 == 0).tuple(),
+        ([0], [1, 2, 3], [4, 5])
+      )
+
+    # star wrapped
+    self.assertEqual(
+        Pipe(data_2).split_before(lambda a, b: a > b).tuple(),
+        ([(1, 2)], [(3, 1), (2, 5)])
+      )
+    self.assertEqual(
+        Pipe(data_2).split_after(lambda a, b: a > b).tuple(),
+        ([(1, 2), (3, 1)], [(2, 5)])
+      )
+    self.assertEqual(
+        Pipe(data_3).split_before_kargs(lambda a, b: a > b).tuple(),
+        ([data_3[0]], list(data_3[1:]))
+      )
+    self.assertEqual(
+        Pipe(data_3).split_after_kargs(lambda a, b: a > b).tuple(),
+        (list(data_3[:2]), [data_3[2]])
+      )
+
+    pipe_1 = Pipe().split_before(lambda x: x == 0).tuple()
+    self.assertEqual(pipe_1((0, 1, 0)), ([0, 1], [0]))
+    self.assertEqual(pipe_1((2, 0)), ([2], [0])) # reload the pipe
+
+  def test_distribute(self):
+    data_1 = tuple(range(5))
+
+    self.assertEqual(
+        Pipe(data_1).distribute(2).map(tuple).tuple(),
+        ((0, 2, 4), (1, 3))
+      )
+
+  def test_divide(self):
+    data_1 = tuple(range(5))
+
+    self.assertEqual(
+        tuple(map(tuple, Pipe(data_1).divide(2))),
+        ((0, 1, 2), (3, 4))
+      )
+
+
+if __name__ == '__main__':
+  unittest.main()
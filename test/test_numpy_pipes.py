@@ -7,11 +7,11 @@ from functional_pipes import Pipe
 class TestMethods(unittest.TestCase):
   @classmethod
   def setUpClass(cls):
-    Pipe.load('numpy_pipes')
+    Pipe.load('built_in_functions', 'numpy_pipes')
 
   @classmethod
   def tearDownClass(self):
-    Pipe.unload('numpy_pipes')
+    Pipe.unload('built_in_functions', 'numpy_pipes')
 
   def test_fromiter(self):
     data_1 = 1, 2, 3
@@ -27,6 +27,99 @@ class TestMethods(unittest.TestCase):
         np.array(data_1)
       ))
 
+    # length passed as count
+    self.assertTrue(np.array_equal(
+        Pipe(range(3)).map(float).fromiter(float),
+        np.arange(3.)
+      ))
+    self.assertTrue(np.array_equal(
+        Pipe(iter(range(3))).map(float).fromiter(float),
+        np.arange(3.)
+      ))
+
+  def test_np_blocks(self):
+    data_1 = tuple(range(5))
+
+    blocks = Pipe(data_1).np_blocks(2, int).tuple()
+    self.assertEqual(tuple(map(len, blocks)), (2, 2, 1))
+    self.assertEqual(blocks[0].dtype, int)
+    self.assertEqual(Pipe(()).np_blocks().tuple(), ())
+
+    self.assertEqual(Pipe(data_1).np_blocks(2, int).np_unblock().tuple(), data_1)
+    self.assertEqual(Pipe(data_1).np_blocks(10).np_unblock().tuple(), tuple(map(float, data_1)))
+
+    pipe_1 = Pipe().np_blocks(3, int).np_unblock().tuple()
+    self.assertEqual(pipe_1(data_1), data_1)
+    self.assertEqual(pipe_1(data_1), data_1) # reload the pipe
+
+  def test_map_methods(self):
+    data_1 = -4, 1, 9
+
+    self.assertEqual(
+        Pipe(data_1).np_blocks(2).np_add(1).np_unblock().tuple(),
+        (-3., 2., 10.)
+      )
+    self.assertEqual(
+        Pipe(data_1).np_blocks(2).np_clip(0, 4).np_sqrt().np_unblock().tuple(),
+        (0., 1., 2.)
+      )
+    self.assertEqual(
+        Pipe(data_1).np_blocks(2).np_where(lambda b: b > 0).np_unblock().tuple(),
+        (0., 1., 9.)
+      )
+    self.assertEqual(
+        Pipe(data_1).np_blocks(2).np_where(lambda b: b < 0, -1).np_unblock().tuple(),
+        (-4., -1., -1.)
+      )
+
+  def test_reductions(self):
+    data_1 = 3, 1, 4, 1, 5, 9, 2, 6
+
+    for size in 1, 3, 8, 100:
+      self.assertEqual(Pipe(data_1).np_blocks(size).np_sum(), sum(data_1))
+      self.assertEqual(Pipe(data_1).np_blocks(size).np_mean(), sum(data_1) / len(data_1))
+      self.assertEqual(Pipe(data_1).np_blocks(size).np_argmax(), 5)
+
+    # first index of ties
+    self.assertEqual(Pipe((1, 7, 7, 7)).np_blocks(2).np_argmax(), 1)
+
+    self.assertEqual(Pipe(()).np_blocks().np_sum(), 0)
+    with self.assertRaises(ValueError):
+      Pipe(()).np_blocks().np_mean()
+    with self.assertRaises(ValueError):
+      Pipe(()).np_blocks().np_argmax()
+
+    pipe_1 = Pipe().np_blocks(3).np_mean()
+    self.assertEqual(pipe_1(data_1), sum(data_1) / len(data_1))
+    self.assertEqual(pipe_1(range(3)), 1.)
+
+  def test_np_rolling(self):
+    data_1 = 3, 1, 4, 1, 5, 9, 2, 6, 5, 3
+    window = 3
+    windows = np.lib.stride_tricks.sliding_window_view(np.array(data_1, float), window)
+
+    refs = dict(
+        np_rolling_sum = windows.sum(axis=1),
+        np_rolling_mean = windows.mean(axis=1),
+        np_rolling_var = windows.var(axis=1, ddof=1),
+        np_rolling_min = windows.min(axis=1),
+        np_rolling_max = windows.max(axis=1),
+      )
+
+    for name, ref in refs.items():
+      for size in 1, 2, 4, 100:
+        blocks = Pipe(data_1).np_blocks(size)
+        self.assertTrue(
+            np.allclose(getattr(blocks, name)(window).np_unblock().tuple(), ref),
+            (name, size)
+          )
+
+    self.assertEqual(Pipe((1, 2)).np_blocks(1).np_rolling_sum(3).tuple(), ())
+
+    pipe_1 = Pipe().np_blocks(2).np_rolling_max(2).np_unblock().tuple()
+    self.assertEqual(pipe_1((1, 3, 2)), (3., 3.))
+    self.assertEqual(pipe_1((0, 1)), (1.,)) # reload the pipe
+
 
 if __name__ == '__main__':
   unittest.main()
\ No newline at end of file
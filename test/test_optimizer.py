@@ -0,0 +1,188 @@
+import pickle
+import random
+import unittest
+from operator import neg
+
+from functional_pipes import Pipe
+from functional_pipes.blueprint import Step
+from functional_pipes.optimizer import (
+    DEFAULT_RULES, FUSION_RULES, dict_key_map, dict_keys_map, fused_filter, fused_map, keyed_map,
+    optimize_steps,
+  )
+
+
+def add_one(x):
+  return x + 1
+
+
+def add(x, y):
+  return x + y
+
+
+def odd(x):
+  return x % 2
+
+
+def not_three(x):
+  return x % 3
+
+
+# segments that take and give ints, as functions of a pipe
+SEGMENTS = (
+    lambda pipe: pipe.map(abs),
+    lambda pipe: pipe.map(add_one),
+    lambda pipe: pipe.map(neg),
+    lambda pipe: pipe.filter(odd),
+    lambda pipe: pipe.filter(not_three),
+    lambda pipe: pipe.filter(bool),
+    lambda pipe: pipe.keyed.map(neg).map(add),
+    lambda pipe: pipe.keyed.map(lambda x: x * 2).map(lambda k, v: k - v),
+    lambda pipe: pipe.map(lambda x: {'a': x}).dict_key['a'].map(add_one).map(lambda d: d['a']),
+    lambda pipe: pipe.map(lambda x: (x, x)).tuple_e().list_e().map(add),
+    lambda pipe: pipe.map(lambda x: (x, 1)).list_e().tuple_e().map(add),
+    lambda pipe: pipe.map(lambda x: (x, x)).carry_key.map(neg).re_key.map(add),
+    lambda pipe: pipe.map(lambda x: {'a': x, 'b': 1}).dict_key[['a', 'b']].map(lambda a, b: (b, a)) \
+        .map(lambda d: d['a'] - d['b']),
+    lambda pipe: pipe.map(lambda x: {'a': x, 'b': 1}).carry_dict[['b', 'a']].map(add).map(lambda x: (x, 0)) \
+        .return_dict.map(lambda d: d['b']),
+  )
+
+# segments that end the pipe
+ENDS = (
+    lambda pipe: pipe.list(),
+    lambda pipe: pipe.sorted().take(3),
+    lambda pipe: pipe.sorted(reverse=True).take(4),
+    lambda pipe: pipe.sorted(key=lambda x: x % 5).take(5),
+    lambda pipe: pipe.sorted(key=abs, reverse=True).take(2),
+    lambda pipe: pipe.map(lambda x: (x,)).tuple_e().list_e().list(),
+  )
+
+
+class TestOptimizer(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    Pipe.load('built_in_functions', 'custom_pipes')
+
+  @classmethod
+  def tearDownClass(self):
+    Pipe.unload('built_in_functions', 'custom_pipes')
+    Pipe.optimize_pipes = True
+
+  def tearDown(self):
+    Pipe.optimize_pipes = True
+
+  def test_single_bypass(self):
+    steps = Pipe().keyed.map(neg).dict_key['a'].map(add).blueprint().steps
+    self.assertEqual(
+        optimize_steps(steps),
+        (
+          Step('call', 'map', (keyed_map(neg, False),), {}),
+          Step('call', 'map', (dict_key_map('a', add, True),), {}),
+        )
+      )
+
+    steps = Pipe().dict_key[['a', 'b']].map(add).blueprint().steps
+    self.assertEqual(optimize_steps(steps), (Step('call', 'map', (dict_keys_map(['a', 'b'], add, True),), {}),))
+
+    # only the segment right after the bypass is inside it
+    self.assertEqual(Pipe().keyed.map(neg).map(add).list()((1, 2)), [0, 0])
+
+  def test_parallel_single_bypass(self):
+    # the segment after keyed.parallel is the only one inside the bypass
+    steps = Pipe().keyed.parallel(workers=2).tuple_e().list_e().sorted().take(1).blueprint().steps
+    self.assertEqual(optimize_steps(steps), steps[:4] + (Step('call', 'top_k', (1,), {}),))
+
+    data = ((1, 2), (3, 4))
+    pipe = Pipe().keyed.parallel(workers=2).tuple_e().list_e().list()
+    self.assertEqual(pipe(data), [[(1, 2), (1, 2)], [(3, 4), (3, 4)]])
+    pipe.close()
+
+    Pipe.optimize_pipes = False
+    pipe = Pipe().keyed.parallel(workers=2).tuple_e().list_e().list()
+    self.assertEqual(pipe(data), [[(1, 2), (1, 2)], [(3, 4), (3, 4)]])
+    pipe.close()
+
+  def test_top_k(self):
+    steps = Pipe().map(abs).sorted(key=neg).take(2).blueprint().steps
+    self.assertEqual(
+        optimize_steps(steps),
+        (
+          Step('call', 'map', (abs,), {}),
+          Step('call', 'top_k', (2,), {'key': neg}),
+        )
+      )
+    self.assertEqual(Pipe().sorted(key=neg).take(2)((3, 1, 4, 1, 5)), [5, 4])
+
+  def test_round_trips(self):
+    steps = Pipe().tuple_e().list_e().set_e().blueprint().steps
+    self.assertEqual(optimize_steps(steps), (Step('call', 'set_e', (), {}),))
+
+  def test_fusion(self):
+    steps = Pipe().map(abs).map(add_one).map(neg).filter(odd).filter(bool).blueprint().steps
+    self.assertEqual(
+        optimize_steps(steps, FUSION_RULES),
+        (
+          Step('call', 'map', (fused_map(((abs, False), (add_one, False), (neg, False))),), {}),
+          Step('call', 'filter', (fused_filter(((odd, False), (bool, False))),), {}),
+        )
+      )
+
+    # a map inside a single segment bypass is not fused with the map after it
+    steps = Pipe().keyed.map(neg).map(add).blueprint().steps
+    self.assertEqual(optimize_steps(steps, FUSION_RULES), steps)
+
+  def test_first_call(self):
+    pipe_1 = Pipe().keyed.map(neg).list()
+    self.assertEqual(pipe_1((1, 2)), [(1, -1), (2, -2)])
+    self.assertIsInstance(pipe_1.upstream_pipe.step.args[0], keyed_map)
+    self.assertEqual(pipe_1((3,)), [(3, -3)])
+
+    # off switch
+    Pipe.optimize_pipes = False
+    pipe_2 = Pipe().keyed.map(neg).list()
+    self.assertEqual(pipe_2((1, 2)), [(1, -1), (2, -2)])
+    self.assertEqual(pipe_2.upstream_pipe.step, None)
+
+    # optimized blueprints pickle
+    blueprint_1 = Pipe().keyed.map(neg).optimize().blueprint()
+    self.assertEqual(pickle.loads(pickle.dumps(blueprint_1)), blueprint_1)
+
+  def test_not_rebuilt(self):
+    pipe_1 = Pipe(range(3)).keyed.map(neg)
+    self.assertIs(pipe_1.optimize(), pipe_1)
+
+    pipe_2 = Pipe().map(abs).list()
+    self.assertIs(pipe_2.optimize(), pipe_2)
+
+  def test_random_pipes(self):
+    rand = random.Random(2024)
+    rules = DEFAULT_RULES + FUSION_RULES
+    rewritten = 0
+
+    for _ in range(300):
+      segments = [rand.choice(SEGMENTS) for _ in range(rand.randrange(6))]
+      end = rand.choice(ENDS)
+      data = [rand.randrange(-20, 20) for _ in range(rand.randrange(30))]
+
+      def make():
+        pipe = Pipe()
+        for segment in segments:
+          pipe = segment(pipe)
+        return end(pipe)
+
+      Pipe.optimize_pipes = False
+      expected = make()(data)
+
+      pipe = make()
+      optimized = pipe.optimize(rules)
+      rewritten += optimized is not pipe
+      self.assertEqual(optimized(data), expected)
+
+      Pipe.optimize_pipes = True
+      self.assertEqual(make()(data), expected)
+
+    self.assertGreater(rewritten, 200)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,108 @@
+import threading
+import time
+import unittest
+from operator import neg
+
+from functional_pipes import Pipe
+from functional_pipes.blueprint import Blueprint
+
+
+class TestParallel(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    Pipe.load('built_in_functions')
+
+  @classmethod
+  def tearDownClass(self):
+    Pipe.unload('built_in_functions')
+
+  def test_ordered(self):
+    data = [(i, i) for i in range(30)]
+
+    def slow(b):
+      # later objects finish first
+      time.sleep((30 - b) / 10000)
+      return 2 * b
+
+    pipe = Pipe().carry_key.parallel(workers=4).map(slow).filter(lambda b: b % 3).re_key.tuple()
+    expected = tuple((a, 2 * b) for a, b in data if 2 * b % 3)
+    self.assertEqual(pipe(data), expected)
+    self.assertEqual(pipe(data), expected)  # the pool is kept for the next run
+    pipe.close()
+
+  def test_threads(self):
+    names = set()
+
+    def record(b):
+      names.add(threading.current_thread().name)
+      time.sleep(0.001)
+      return b
+
+    pipe = Pipe().carry_key.parallel(workers=3).map(record).re_key.list()
+    pipe([(i, i) for i in range(20)])
+    pipe.close()
+    self.assertGreater(len(names), 1)
+    self.assertNotIn(threading.current_thread().name, names)
+
+  def test_unordered(self):
+    data = [(i, i) for i in range(20)]
+    pipe = Pipe().carry_value.parallel(workers=4, ordered=False, chunk_size=3).map(str).re_value.list()
+    self.assertEqual(sorted(pipe(data), key=lambda pair: pair[1]), [(str(a), b) for a, b in data])
+    pipe.close()
+
+  def test_processes(self):
+    pipe = Pipe().dict_key['a'].parallel(workers=2, processes=True, chunk_size=2).map(neg).list()
+    self.assertEqual(pipe([dict(a=1, b=1), dict(a=2, b=2)]), [dict(a=-1, b=1), dict(a=-2, b=2)])
+    pipe.close()
+
+  def test_one_shot_shuts_down(self):
+    import multiprocessing
+
+    result = Pipe([(1, -2), (3, -4)]
+      ).carry_key.parallel(workers=2, processes=True).map(abs).re_key.list()
+    self.assertEqual(result, [(1, 2), (3, 4)])
+    self.assertEqual(multiprocessing.active_children(), [])
+
+    before = threading.active_count()
+    self.assertEqual(Pipe([(1, -2)]).carry_key.parallel(workers=3).map(abs).re_key.list(), [(1, 2)])
+    self.assertEqual(threading.active_count(), before)
+
+  def test_nested_bypass(self):
+    data = [(1, (2, 3)), (4, (5, 6))]
+    self.assertEqual(
+        Pipe(data).carry_key.parallel(workers=2).carry_key.map(neg).re_key.re_key.tuple(),
+        ((1, (2, -3)), (4, (5, -6)))
+      )
+
+  def test_break(self):
+    pipe = Pipe().carry_key.parallel(workers=2).map(neg).re_key
+    with pipe([(i, i) for i in range(100)]):
+      for obj in pipe:
+        break
+    self.assertEqual(obj, (0, 0))
+    self.assertEqual(tuple(pipe([(1, 2)])), ((1, -2),))
+
+  def test_blueprint(self):
+    pipe = Pipe().carry_key.parallel(workers=2).map(neg).re_key.tuple()
+    rebuilt = Blueprint.loads(pipe.blueprint().dumps()).build()
+    self.assertEqual(rebuilt([(1, 2)]), ((1, -2),))
+
+  def test_errors(self):
+    with self.assertRaises(ValueError):
+      Pipe().carry_key.map(neg).parallel()
+    with self.assertRaises(ValueError):
+      Pipe().map(neg).parallel()
+    with self.assertRaises(ValueError):
+      Pipe().block_carry_key.parallel()
+    with self.assertRaises(ValueError):
+      Pipe().carry_key.parallel().enumerate().re_key
+
+    def fail(b):
+      raise KeyError(b)
+
+    with self.assertRaises(KeyError):
+      Pipe().carry_key.parallel(workers=2).map(fail).re_key.list()([(1, 2)])
+
+
+if __name__ == '__main__':
+  unittest.main()
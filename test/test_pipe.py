@@ -1,6 +1,7 @@
-import unittest, types
-from itertools import zip_longest
+import unittest, types, io
+from itertools import islice, zip_longest
 from functools import partial
+from operator import length_hint
 
 from functional_pipes import Pipe
 from functional_pipes.pipe import Reservoir, Valve
@@ -24,6 +25,7 @@ class TestPipe(unittest.TestCase):
         'expand',
         'add',
         'tuple',
+        'pass_through',
       )
 
     for attr in to_del:
@@ -338,6 +340,19 @@ class TestPipe(unittest.TestCase):
         (3, 7)
       )
 
+    # single star with a value
+    Pipe.add_map_method(lambda a, b, c: a + b - c, 'add', star_wrap=True, no_over_write=False)
+
+    self.assertEqual(
+        tuple(Pipe(data_2).add(1)),
+        (2, 6)
+      )
+
+    # reusable
+    pipe_1 = Pipe().min(5)
+    self.assertEqual(tuple(pipe_1(data_1)), (1, 2, 5, 5))
+    self.assertEqual(tuple(pipe_1(data_1[2:])), (5, 5)) # reload the pipe
+
     # double star
     Pipe.add_map_method(lambda a, b: a + b, 'add', double_star_wrap=True, no_over_write=False)
 
@@ -420,6 +435,171 @@ class TestPipe(unittest.TestCase):
         list(data_1)
       )
 
+  def test_close(self):
+    closed = []
+    def source(data):
+      try:
+        yield from data
+      finally:
+        closed.append(True)
+
+    Pipe.add_map_method(lambda val: val, 'pass_through')
+
+    # close after partly draining
+    pipe_1 = Pipe(source((1, 2, 3))).pass_through()
+    self.assertEqual(next(pipe_1), 1)
+    pipe_1.close()
+    self.assertEqual(closed, [True])
+    with self.assertRaises(StopIteration):
+      next(pipe_1)
+
+    # closed pipe can be refilled
+    pipe_2 = Pipe().pass_through()
+    next(pipe_2(source((1, 2, 3))))
+    pipe_2.close()
+    self.assertEqual(closed, [True, True])
+    self.assertEqual(tuple(pipe_2((4, 5))), (4, 5))
+
+    # valve pipe
+    Pipe.add_method(gener=list, is_valve=True)
+    pipe_3 = Pipe().pass_through().list().pass_through()
+    next(pipe_3(source((1, 2, 3))))
+    pipe_3.close()
+    self.assertEqual(closed, [True, True, True])
+    self.assertEqual(tuple(pipe_3((4, 5))), (4, 5))
+
+  def test_with(self):
+    closed = []
+    def source(data):
+      try:
+        yield from data
+      finally:
+        closed.append(True)
+
+    with Pipe(source((1, 2, 3))) as pipe_1:
+      self.assertEqual(next(pipe_1), 1)
+    self.assertEqual(closed, [True])
+
+  def test_break_closes(self):
+    closed = []
+    def source(data):
+      try:
+        yield from data
+      finally:
+        closed.append(True)
+
+    Pipe.add_map_method(lambda val: val, 'pass_through')
+
+    pipe_1 = Pipe().pass_through()
+    for val in pipe_1(source((1, 2, 3))):
+      break
+    self.assertEqual(closed, [True])
+
+    # not closed when drained
+    self.assertEqual(tuple(pipe_1((4, 5))), (4, 5))
+    self.assertEqual(closed, [True])
+
+    # islice drops its iterator of the pipe when it stops
+    self.assertEqual(tuple(islice(pipe_1(source((6, 7, 8))), 1)), (6,))
+    self.assertEqual(closed, [True, True])
+
+  def test_next_keeps_open(self):
+    closed = []
+    def source(data):
+      try:
+        yield from data
+      finally:
+        closed.append(True)
+
+    Pipe.add_map_method(lambda val: val, 'pass_through')
+
+    # partial reads with next leave the rest of the objects in the pipe
+    pipe_1 = Pipe().pass_through()
+    pipe_1(source((1, 2, 3)))
+    self.assertEqual(next(pipe_1), 1)
+    self.assertEqual(next(pipe_1), 2)
+    self.assertEqual(closed, [])
+    self.assertEqual(tuple(pipe_1), (3,))
+
+  def test_slots(self):
+    self.assertFalse(hasattr(Pipe(), '__dict__'))
+    with self.assertRaises(AttributeError):
+      Pipe().not_an_attribute = 1
+
+    # subclasses without __slots__ still work
+    class SubPipe(Pipe):
+      def __init__(self, *args, **kargs):
+        super().__init__(*args, **kargs)
+        self.extra = True
+
+    self.assertEqual(tuple(SubPipe((1, 2))), (1, 2))
+    self.assertTrue(SubPipe().extra)
+
+    # bypass properties are immutable
+    bypass_properties = Pipe().carry_key.bypass_properties
+    self.assertEqual(bypass_properties.close_name, 're_key')
+    with self.assertRaises(AttributeError):
+      bypass_properties.close_name = 're_value'
+
+  def test_length_hint(self):
+    data_1 = 1, 2, 3
+
+    Pipe.add_map_method(lambda val: val, 'pass_through')
+    Pipe.add_method(gener=filter, iter_index=1)
+    Pipe.add_method(gener=enumerate, keeps_length=True)
+
+    self.assertEqual(length_hint(Pipe(data_1)), 3)
+    self.assertEqual(length_hint(Pipe(range(5)).pass_through().enumerate()), 5)
+    self.assertEqual(length_hint(Pipe(iter(data_1)).pass_through(), -1), -1)
+    self.assertEqual(length_hint(Pipe(data_1).filter(bool), -1), -1)
+    self.assertEqual(length_hint(Pipe(data_1).filter(bool).pass_through(), -1), -1)
+
+    # map keeps the length only without other iterables
+    self.assertEqual(length_hint(Pipe(data_1).map(abs)), 3)
+    self.assertEqual(length_hint(Pipe(data_1).map(max, (2,)), -1), -1)
+    self.assertEqual(length_hint(Pipe(data_1).map_kargs(dict, ({},)), -1), -1)
+
+    # partly drained
+    pipe_1 = Pipe(data_1).pass_through()
+    next(pipe_1)
+    self.assertEqual(length_hint(pipe_1), 2)
+
+    # reloaded
+    pipe_2 = Pipe().pass_through()
+    self.assertEqual(length_hint(pipe_2), 0)
+    pipe_2(range(4))
+    self.assertEqual(length_hint(pipe_2), 4)
+
+    # bypasses
+    data_2 = (1, 2), (3, 4)
+    self.assertEqual(length_hint(Pipe(data_2).carry_key.pass_through().re_key), 2)
+    self.assertEqual(length_hint(Pipe(data_2).carry_key.pass_through(), -1), -1)
+    self.assertEqual(
+        length_hint(Pipe(data_2).carry_key.filter(bool).re_key, -1),
+        -1
+      )
+
+  def test_valve_length_hint(self):
+    hints = []
+    def record_hint(iterable):
+      hints.append(length_hint(iterable, -1))
+      return list(iterable)
+
+    Pipe.add_map_method(lambda val: val, 'pass_through')
+    Pipe.add_method(gener=record_hint, is_valve=True)
+    Pipe.add_method(gener=filter, iter_index=1)
+
+    self.assertEqual(Pipe(range(3)).pass_through().record_hint(), [0, 1, 2])
+    self.assertEqual(hints, [3])
+
+    pipe_1 = Pipe().pass_through().record_hint()
+    self.assertEqual(list(pipe_1((1, 2))), [1, 2])
+    self.assertEqual(list(pipe_1(iter((1, 2)))), [1, 2])
+    self.assertEqual(Pipe(range(3)).filter(bool).record_hint(), [1, 2])
+    self.assertEqual(hints, [3, 2, -1, -1])
+
+    delattr(Pipe, 'record_hint')
+
   # def test_preloading_existing_pipe(self):
   #   '''
   #   https://github.com/BebeSparkelSparkel/functional_pipes/issues/9
@@ -547,6 +727,18 @@ class TestValve(unittest.TestCase):
 
     self.assertEqual(valve_1.whole_return(), list(data_1))
 
+  def test_close(self):
+    data_1 = 2, 1, 3
+
+    resv_1 = Reservoir(data_1)
+    valve_1 = Valve(func=sorted, iterator=resv_1, pass_args=(resv_1,))
+    self.assertEqual(next(valve_1), 1)
+    valve_1.close()
+    self.assertFalse(resv_1.not_empty())
+
+    resv_1(data_1)
+    self.assertEqual(tuple(valve_1), (1, 2, 3))
+
 
 class TestReservoir(unittest.TestCase):
   def test_init(self):
@@ -630,6 +822,62 @@ class TestReservoir(unittest.TestCase):
     res_2(data_1)
     self.assertTrue(res_2.not_empty())
 
+  def test_refill_not_drained(self):
+    '''
+    Refilling a reservoir that still holds values raises a ValueError and does
+    not lose any values, sized or not.
+    '''
+    data_1 = 1, 2, 3
+
+    res_1 = Reservoir(iter(data_1))
+    next(res_1)
+    with self.assertRaises(ValueError):
+      res_1(data_1)
+    self.assertEqual(tuple(res_1), (2, 3))
+    res_1(iter(data_1))
+    for i in range(len(data_1)):
+      next(res_1)
+    res_1(data_1)  # drained without StopIteration
+    self.assertTrue(res_1.sized)
+    next(res_1)
+    with self.assertRaises(ValueError):
+      res_1(data_1)
+    self.assertEqual(tuple(res_1), (2, 3))
+
+  def test_sized(self):
+    import numpy as np
+
+    self.assertTrue(Reservoir([1, 2]).sized)
+    self.assertTrue(Reservoir(range(2)).sized)
+    self.assertTrue(Reservoir(np.arange(2)).sized)
+    self.assertFalse(Reservoir(iter([1, 2])).sized)
+
+    self.assertEqual(tuple(Reservoir(np.arange(3))), (0, 1, 2))
+
+  def test_close(self):
+    data_1 = 1, 2, 3
+    source_1 = io.StringIO('a\nb\n')
+
+    res_1 = Reservoir(source_1)
+    self.assertEqual(next(res_1), 'a\n')
+    res_1.close()
+    self.assertTrue(source_1.closed)
+    self.assertFalse(res_1.not_empty())
+    with self.assertRaises(StopIteration):
+      next(res_1)
+
+    res_1(data_1)
+    self.assertEqual(tuple(res_1), data_1)
+
+  def test_length_hint(self):
+    res_1 = Reservoir((1, 2, 3))
+    self.assertEqual(length_hint(res_1), 3)
+    next(res_1)
+    self.assertEqual(length_hint(res_1), 2)
+
+    self.assertEqual(length_hint(Reservoir(iter((1, 2))), -1), -1)
+    self.assertEqual(length_hint(Reservoir()), 0)
+
 
 
 
@@ -0,0 +1,88 @@
+import unittest
+import random
+import statistics
+
+from functional_pipes import Pipe
+
+
+class TestMethods(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    Pipe.load('built_in_functions', 'rolling_pipes')
+
+  @classmethod
+  def tearDownClass(self):
+    Pipe.unload('built_in_functions', 'rolling_pipes')
+
+  def setUp(self):
+    rand = random.Random(35)
+    self.data = tuple(rand.randint(-50, 50) for _ in range(200))
+
+  def windows(self, window):
+    data = self.data
+    return tuple(data[i:i + window] for i in range(len(data) - window + 1))
+
+  def test_rolling_sum_mean(self):
+    for window in 1, 2, 7:
+      self.assertEqual(
+          Pipe(self.data).rolling_sum(window).tuple(),
+          tuple(map(sum, self.windows(window)))
+        )
+      for result, values in zip(Pipe(self.data).rolling_mean(window), self.windows(window)):
+        self.assertAlmostEqual(result, statistics.mean(values))
+
+    self.assertEqual(Pipe((1, 2)).rolling_sum(3).tuple(), ())
+
+    with self.assertRaises(ValueError):
+      Pipe(self.data).rolling_sum(0)
+
+  def test_rolling_var(self):
+    for window in 2, 7:
+      for result, values in zip(Pipe(self.data).rolling_var(window), self.windows(window)):
+        self.assertAlmostEqual(result, statistics.variance(values))
+      for result, values in zip(Pipe(self.data).rolling_var(window, ddof=0), self.windows(window)):
+        self.assertAlmostEqual(result, statistics.pvariance(values))
+
+    self.assertEqual(Pipe((3, 3, 3)).rolling_var(2).tuple(), (0., 0.))
+
+    with self.assertRaises(ValueError):
+      Pipe(self.data).rolling_var(1)
+
+  def test_rolling_min_max(self):
+    for window in 1, 2, 7:
+      self.assertEqual(
+          Pipe(self.data).rolling_min(window).tuple(),
+          tuple(map(min, self.windows(window)))
+        )
+      self.assertEqual(
+          Pipe(self.data).rolling_max(window).tuple(),
+          tuple(map(max, self.windows(window)))
+        )
+
+  def test_key(self):
+    data_1 = ('a', 1), ('b', 5), ('c', 3)
+
+    self.assertEqual(Pipe(data_1).rolling_sum(2, key=lambda name, val: val).tuple(), (6, 8))
+    self.assertEqual(Pipe(data_1).rolling_max(2, key=lambda pair: pair[1]).tuple(), (5, 5))
+
+  def test_carry_key(self):
+    data_1 = ('a', 1), ('b', 5), ('c', 3), ('d', 0)
+
+    self.assertEqual(
+        Pipe(data_1).carry_key.rolling_max(2).re_key.tuple(),
+        (('b', 5), ('c', 5), ('d', 3))
+      )
+
+    # window is emptied between uses of the pipe
+    pipe_1 = Pipe().carry_key.rolling_sum(3).re_key.tuple()
+    self.assertEqual(pipe_1(data_1), (('c', 9), ('d', 8)))
+    self.assertEqual(pipe_1(data_1[:3]), (('c', 9),)) # reload the pipe
+
+  def test_reuse(self):
+    pipe_1 = Pipe().rolling_min(2).tuple()
+    self.assertEqual(pipe_1((3, 1, 2)), (1, 1))
+    self.assertEqual(pipe_1((5, 4)), (4,)) # reload the pipe
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from collections import Counter
+
+from functional_pipes import Pipe
+
+
+class TestMethods(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    Pipe.load('built_in_functions', 'sample_pipes')
+
+  @classmethod
+  def tearDownClass(self):
+    Pipe.unload('built_in_functions', 'sample_pipes')
+
+  def test_sample(self):
+    data_1 = tuple(range(100))
+
+    sample_1 = Pipe(data_1).sample(10, seed=1)
+    self.assertEqual(len(sample_1), 10)
+    self.assertEqual(len(set(sample_1)), 10)
+    self.assertTrue(set(sample_1) <= set(data_1))
+    self.assertEqual(Pipe(data_1).sample(10, seed=1), sample_1)
+    self.assertEqual(Pipe(iter(data_1)).sample(10, seed=1), sample_1)
+
+    self.assertEqual(Pipe(range(5)).sample(10), [0, 1, 2, 3, 4])
+    self.assertEqual(Pipe(data_1).sample(0), [])
+    with self.assertRaises(ValueError):
+      Pipe(data_1).sample(-1)
+
+    # every object is equally likely
+    counts = Counter()
+    for seed in range(3000):
+      counts.update(Pipe(range(10)).sample(3, seed=seed))
+    for value in range(10):
+      self.assertAlmostEqual(counts[value] / 3000, 0.3, delta=0.04)
+
+    pipe_1 = Pipe().sample(3, seed=2)
+    self.assertEqual(pipe_1(data_1), pipe_1(data_1)) # reload the pipe
+
+  def test_sample_rate(self):
+    data_1 = tuple(range(20000))
+
+    sample_1 = Pipe(data_1).sample_rate(0.1, seed=3).tuple()
+    self.assertAlmostEqual(len(sample_1) / len(data_1), 0.1, delta=0.01)
+    self.assertEqual(sample_1, tuple(sorted(set(sample_1))))
+
+    self.assertEqual(Pipe(range(5)).sample_rate(1).tuple(), (0, 1, 2, 3, 4))
+    self.assertEqual(Pipe(range(5)).sample_rate(0).tuple(), ())
+    with self.assertRaises(ValueError):
+      Pipe(data_1).sample_rate(2)
+
+    # the seed restarts each time the pipe runs dry
+    pipe_1 = Pipe().sample_rate(0.5, seed=4).tuple()
+    self.assertEqual(pipe_1(range(50)), pipe_1(range(50))) # reload the pipe
+
+    # the skip survives a bypass
+    pairs = tuple((value, -value) for value in range(50))
+    self.assertEqual(
+        Pipe(pairs).carry_key.sample_rate(0.5, seed=4).re_key.drop_key.tuple(),
+        tuple(-value for value in pipe_1(range(50)))
+      )
+
+  def test_sample_weighted(self):
+    data_1 = ('a', 1), ('b', 0), ('c', 5)
+
+    self.assertEqual(
+        Pipe(data_1).sample_weighted(2, lambda name, w: w, seed=1),
+        [('a', 1), ('c', 5)]
+      )
+    self.assertEqual(Pipe(data_1).sample_weighted(5, lambda pair: pair[1]), [('a', 1), ('c', 5)])
+    self.assertEqual(Pipe(data_1).sample_weighted(0, lambda name, w: w), [])
+
+    # chance of each object is proportional to its weight
+    counts = Counter()
+    for seed in range(4000):
+      counts.update(Pipe(range(1, 5)).sample_weighted(1, lambda x: x, seed=seed))
+    for value in range(1, 5):
+      self.assertAlmostEqual(counts[value] / 4000, value / 10, delta=0.03)
+
+    sample_1 = Pipe(range(1000)).sample_weighted(20, lambda x: x, seed=5)
+    self.assertEqual(len(set(sample_1)), 20)
+    self.assertNotIn(0, sample_1)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import pickle
+import random
+
+from functional_pipes import Pipe
+from functional_pipes.sketches import HyperLogLog, TDigest
+
+
+class TestMethods(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    Pipe.load('built_in_functions', 'sketch_pipes')
+
+  @classmethod
+  def tearDownClass(self):
+    Pipe.unload('built_in_functions', 'sketch_pipes')
+
+  def test_unique(self):
+    rand = random.Random(37)
+    data_1 = tuple(rand.randrange(100) for _ in range(1000))
+    ref = tuple(dict.fromkeys(data_1))
+
+    self.assertEqual(Pipe(data_1).unique().tuple(), ref)
+    self.assertEqual(Pipe(data_1).unique(mode='bloom', capacity=100, error_rate=1e-6).tuple(), ref)
+    self.assertEqual(Pipe(()).unique().tuple(), ())
+    self.assertEqual(
+        Pipe(('a', 97, b'a', 1, 1.0, True, '\x01')).unique().tuple(),
+        tuple(dict.fromkeys(('a', 97, b'a', 1, 1.0, True, '\x01')))
+      )
+
+    # key
+    data_2 = ('a', 1), ('b', 1), ('c', 2)
+    self.assertEqual(Pipe(data_2).unique(key=lambda name, id: id).tuple(), (('a', 1), ('c', 2)))
+    self.assertEqual(Pipe(data_2).unique(key=lambda pair: pair[1]).tuple(), (('a', 1), ('c', 2)))
+
+    # seen keys are forgotten between uses of the pipe
+    pipe_1 = Pipe().unique().tuple()
+    self.assertEqual(pipe_1((1, 2, 1)), (1, 2))
+    self.assertEqual(pipe_1((2, 3)), (2, 3)) # reload the pipe
+
+    # inside a bypass
+    self.assertEqual(
+        Pipe((('a', 1), ('b', 1), ('c', 2))).carry_key.unique().re_key.tuple(),
+        (('a', 1), ('c', 2))
+      )
+
+    with self.assertRaises(ValueError):
+      Pipe(data_1).unique(mode='approximate')
+
+  def test_unique_sorted(self):
+    data_1 = 1, 1, 2, 3, 3, 3
+
+    self.assertEqual(Pipe(data_1).unique_sorted().tuple(), (1, 2, 3))
+    self.assertEqual(
+        Pipe((('a', 1), ('b', 1), ('c', 2))).unique_sorted(key=lambda name, id: id).tuple(),
+        (('a', 1), ('c', 2))
+      )
+
+    pipe_1 = Pipe().unique_sorted().tuple()
+    self.assertEqual(pipe_1(data_1), (1, 2, 3))
+    self.assertEqual(pipe_1((3, 4)), (3, 4)) # reload the pipe
+
+  def test_count_distinct_approx(self):
+    data_1 = tuple(i % 500 for i in range(5000))
+
+    self.assertLessEqual(abs(Pipe(data_1).count_distinct_approx() - 500), 15)
+    self.assertEqual(Pipe(()).count_distinct_approx(), 0)
+    self.assertLessEqual(
+        abs(Pipe(data_1).map(lambda x: (x, 'a')).count_distinct_approx(key=lambda x, a: x) - 500),
+        15
+      )
+
+    pipe_1 = Pipe().count_distinct_approx(precision=12)
+    self.assertLessEqual(abs(pipe_1(data_1) - 500), 30)
+    self.assertLessEqual(abs(pipe_1(range(100)) - 100), 5) # reload the pipe
+
+    # shards merge
+    sketch = Pipe(data_1[:3000]).hyperloglog()
+    self.assertIsInstance(sketch, HyperLogLog)
+    sketch.merge(pickle.loads(pickle.dumps(Pipe(data_1[3000:]).hyperloglog())))
+    self.assertEqual(sketch, Pipe(data_1).hyperloglog())
+
+  def test_quantiles_approx(self):
+    data_1 = tuple(range(1001))
+
+    self.assertEqual(Pipe(data_1).quantiles_approx((0, 0.5, 1)), (0., 500., 1000.))
+
+    quartiles = Pipe(iter(data_1)).map(float).quantiles_approx((0.25, 0.75))
+    self.assertAlmostEqual(quartiles[0], 250, delta=2)
+    self.assertAlmostEqual(quartiles[1], 750, delta=2)
+
+    with self.assertRaises(ValueError):
+      Pipe(()).quantiles_approx((0.5,))
+
+    pipe_1 = Pipe().quantiles_approx((0.5,))
+    self.assertEqual(pipe_1(range(11)), (5.,))
+    self.assertEqual(pipe_1(range(21)), (10.,)) # reload the pipe
+
+    digest = Pipe(data_1[:500]).tdigest()
+    self.assertIsInstance(digest, TDigest)
+    digest.merge(Pipe(data_1[500:]).tdigest())
+    self.assertAlmostEqual(digest.quantile(0.5), 500, delta=2)
+
+
+if __name__ == '__main__':
+  unittest.main()
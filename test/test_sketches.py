@@ -0,0 +1,164 @@
+import unittest
+import pickle
+import random
+
+from functional_pipes.sketches import BloomFilter, DigestSet, HyperLogLog, TDigest, key_digest
+
+
+class TestKeyDigest(unittest.TestCase):
+  def test_key_digest(self):
+    self.assertEqual(len(key_digest('a')), 16)
+    self.assertEqual(len(key_digest('a', 8)), 8)
+    self.assertEqual(key_digest((1, 'a')), key_digest((1, 'a')))
+    self.assertNotEqual(key_digest(1), key_digest(-1))
+    self.assertNotEqual(key_digest(255), key_digest(-1))
+
+    # keys of different kinds do not collide
+    keys = 'a', 97, b'a', '\x01', 1, (1,), [1], ('a', 'b'), ('ab',), 0.5, None, {1: 2}
+    self.assertEqual(len(set(map(key_digest, keys))), len(keys))
+
+    # keys python treats as equal digest the same
+    from decimal import Decimal
+    from fractions import Fraction
+    for equal in ((1, 1.0, True, Fraction(1), Decimal(1), 1 + 0j), (0.5, Fraction(1, 2), Decimal('0.5')),
+        (b'a', bytearray(b'a')), ({1, 2}, frozenset((2, 1))), (dict(a=1, b=2), dict(b=2, a=1.0))):
+      self.assertEqual(len(set(map(key_digest, equal))), 1, equal)
+
+    with self.assertRaises(TypeError):
+      key_digest(object())
+
+
+class TestDigestSet(unittest.TestCase):
+  def test_add_contains(self):
+    rand = random.Random(37)
+    keys = [rand.randrange(10**9) for _ in range(5000)] + ['a', b'b', (1, 2)]
+
+    seen = DigestSet(capacity=4)
+    reference = set()
+    for key in keys:
+      self.assertEqual(seen.add(key), key not in reference)
+      reference.add(key)
+
+    self.assertEqual(len(seen), len(reference))
+    for key in reference:
+      self.assertIn(key, seen)
+    self.assertNotIn(-5, seen)
+
+  def test_digest_size(self):
+    seen = DigestSet(digest_size=8)
+    self.assertTrue(seen.add('a'))
+    self.assertFalse(seen.add('a'))
+
+    with self.assertRaises(ValueError):
+      DigestSet(digest_size=4)
+
+
+class TestBloomFilter(unittest.TestCase):
+  def test_add_contains(self):
+    capacity = 2000
+    error_rate = 0.01
+
+    seen = BloomFilter(capacity=capacity, error_rate=error_rate)
+    for key in range(capacity):
+      seen.add(key)
+
+    for key in range(capacity):
+      self.assertIn(key, seen)
+
+    false_positives = sum(key in seen for key in range(capacity, 11 * capacity))
+    self.assertLess(false_positives / (10 * capacity), 2 * error_rate)
+
+    self.assertTrue(BloomFilter().add('a'))
+
+    with self.assertRaises(ValueError):
+      BloomFilter(error_rate=1)
+
+
+class TestHyperLogLog(unittest.TestCase):
+  def test_count(self):
+    for size in 0, 10, 1000, 50000:
+      sketch = HyperLogLog()
+      sketch.update(range(size))
+      sketch.update(range(size // 2))
+      self.assertLessEqual(abs(sketch.count() - size), 0.03 * size)
+
+    sketch = HyperLogLog(precision=10)
+    sketch.update(map(str, range(20000)))
+    self.assertLessEqual(abs(sketch.count() - 20000), 0.1 * 20000)
+
+    with self.assertRaises(ValueError):
+      HyperLogLog(precision=3)
+
+  def test_merge_pickle(self):
+    whole = HyperLogLog()
+    whole.update(range(30000))
+
+    shards = [HyperLogLog() for _ in range(3)]
+    for start, shard in zip(range(0, 30000, 10000), shards):
+      shard.update(range(start, min(start + 12000, 30000)))  # shards overlap
+
+    merged = shards[0]
+    merged.merge(shards[1])
+    merged.merge(shards[2])
+    self.assertEqual(merged, whole)
+
+    self.assertEqual(pickle.loads(pickle.dumps(merged)), merged)
+
+    with self.assertRaises(ValueError):
+      merged.merge(HyperLogLog(precision=10))
+
+
+class TestTDigest(unittest.TestCase):
+  def setUp(self):
+    rand = random.Random(38)
+    self.values = [rand.gauss(0, 1) for _ in range(20000)]
+    self.sorted_values = sorted(self.values)
+
+  def assert_quantiles(self, digest, tolerance):
+    for q in 0.001, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 0.999:
+      estimate = digest.quantile(q)
+      # the rank of the estimate should be close to q
+      rank = sum(value <= estimate for value in self.sorted_values) / len(self.values)
+      self.assertLess(abs(rank - q), tolerance, q)
+
+  def test_quantile(self):
+    digest = TDigest()
+    digest.update(self.values)
+
+    self.assert_quantiles(digest, 0.005)
+    self.assertEqual(digest.quantile(0), self.sorted_values[0])
+    self.assertEqual(digest.quantile(1), self.sorted_values[-1])
+    self.assertEqual(digest.total(), len(self.values))
+    self.assertLess(len(digest.means), 2 * digest.compression)
+
+    single = TDigest()
+    single.add(3)
+    self.assertEqual(single.quantile(0.3), 3.)
+
+    with self.assertRaises(ValueError):
+      TDigest().quantile(0.5)
+    with self.assertRaises(ValueError):
+      digest.quantile(2)
+
+  def test_merge_pickle(self):
+    shards = [TDigest() for _ in range(4)]
+    for index, value in enumerate(self.values):
+      shards[index % 4].add(value)
+
+    merged = TDigest()
+    for shard in shards:
+      merged.merge(pickle.loads(pickle.dumps(shard)))
+
+    self.assert_quantiles(merged, 0.01)
+    self.assertEqual(merged.total(), len(self.values))
+
+    # the extremes of the shards are kept
+    self.assertEqual(merged.quantile(0), min(self.values))
+    self.assertEqual(merged.quantile(1), max(self.values))
+
+    with self.assertRaises(TypeError):
+      hash(merged)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,102 @@
+import gc
+import json
+import os
+import unittest
+from collections import Counter
+from tempfile import TemporaryDirectory
+
+from functional_pipes import Pipe
+from functional_pipes.tracer import Tracer
+
+
+class TestTracer(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    Pipe.load('built_in_functions')
+
+  @classmethod
+  def tearDownClass(self):
+    Pipe.unload('built_in_functions')
+
+  def test_sampling(self):
+    tracer_1 = Tracer(every=100, segments=True)
+    pipe_1 = Pipe().map(abs).filter(lambda x: x % 2).map(lambda x: (x, x)) \
+        .carry_key.map(str).re_key.list()
+    data_1 = range(-2000, 0)
+
+    self.assertEqual(tracer_1.run(pipe_1, data_1), pipe_1(data_1))
+
+    names = Counter(event[0] for event in tracer_1.events)
+    self.assertEqual(names['re_key'], 10)
+    self.assertEqual(names['run'], 1)
+    # the filter drops every other object so each sampled object is two pulls upstream
+    self.assertEqual(names['reservoir'], 20)
+    self.assertEqual(names['map(abs)'], 20)
+    self.assertEqual(names['filter(<lambda>)'], 10)
+    self.assertEqual(names['map(str)'], 10)
+
+    # spans nest inside the run
+    run = next(event for event in tracer_1.events if event[0] == 'run')
+    for name, category, start, end, pid, tid in tracer_1.events:
+      self.assertTrue(run[2] <= start <= end <= run[3])
+      self.assertEqual(pid, os.getpid())
+
+  def test_output_only(self):
+    tracer_1 = Tracer(every=100)
+    pipe_1 = Pipe().map(abs).filter(lambda x: x % 2).map(lambda x: (x, x)) \
+        .carry_key.map(str).re_key
+    data_1 = range(-2000, 0)
+
+    traced_1 = tracer_1.trace(pipe_1)
+    self.assertEqual(list(traced_1(data_1)), list(pipe_1(data_1)))
+    self.assertEqual(Counter(event[0] for event in tracer_1.events), {'re_key': 10})
+
+    # only the segment before the valve is probed
+    tracer_2 = Tracer(every=2)
+    self.assertEqual(tracer_2.run(Pipe().map(abs).sum(), range(-4, 4)), 16)
+    self.assertEqual(Counter(event[0] for event in tracer_2.events), {'map(abs)': 4, 'run': 1})
+
+  def test_reusable(self):
+    tracer_1 = Tracer(every=3, segments=True)
+    traced_1 = tracer_1.trace(Pipe().map(abs))
+    self.assertEqual(list(traced_1(range(-5, 5))), list(map(abs, range(-5, 5))))
+    self.assertEqual(list(traced_1(range(3))), [0, 1, 2])
+    self.assertEqual(
+        Counter(event[0] for event in tracer_1.events), {'reservoir': 4, 'map(abs)': 4})
+
+  def test_gc_and_spans(self):
+    tracer_1 = Tracer()
+    with tracer_1, tracer_1.span('batch', 'worker'):
+      gc.collect()
+
+    categories = [event[1] for event in tracer_1.events]
+    self.assertIn('gc', categories)
+    self.assertEqual(categories[-1], 'worker')
+
+    tracer_2 = Tracer()
+    tracer_2.extend(tracer_1.events)
+    self.assertEqual(tracer_2.events, tracer_1.events)
+
+  def test_write(self):
+    tracer_1 = Tracer(every=1, segments=True)
+    tracer_1.run(Pipe().map(abs).sum(), range(-3, 3))
+
+    with TemporaryDirectory() as directory:
+      path = os.path.join(directory, 'trace.json')
+      tracer_1.write(path)
+      with open(path) as file:
+        trace = json.load(file)
+
+    events = trace['traceEvents']
+    complete = [event for event in events if event['ph'] == 'X']
+    self.assertEqual(Counter(event['name'] for event in complete), {'reservoir': 6, 'map(abs)': 6, 'run': 1})
+    self.assertTrue(all(event['dur'] >= 0 for event in complete))
+    self.assertIn('M', [event['ph'] for event in events])
+
+  def test_errors(self):
+    with self.assertRaises(ValueError):
+      Tracer(every=0)
+
+
+if __name__ == '__main__':
+  unittest.main()